@@ -0,0 +1,66 @@
+"""
+Measure the per-keystroke latency of search suggestions at catalog
+sizes far above the sample catalog.
+
+The titles, publishers and tags of the catalog CSV are repeated with
+numbered suffixes until the requested number of suggestions is
+reached and indexed in a PrefixIndex. Every prefix of a sample of the
+titles is then looked up, as if typed one key at a time, and the
+median and 99th percentile lookup times are reported.
+
+Usage:
+    python -m benchmarks.autocomplete_latency [suggestions] [path/to/games.csv]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+from games.adapters.datareader.ingestion import read_game_chunks
+from games.adapters.indexes import PrefixIndex, Suggestion
+
+DEFAULT_DATA_PATH = Path('games') / 'adapters' / 'data' / 'games.csv'
+
+
+def synthetic_suggestions(games, count: int) -> list:
+    templates = []
+    for game in games:
+        templates.append((game.title, 'title'))
+        templates.append((game.publisher.publisher_name, 'publisher'))
+        templates.extend((tag, 'tag') for tag in game.tags)
+    generator = random.Random(235)
+    suggestions = []
+    for index in range(count):
+        text, kind = templates[index % len(templates)]
+        copy = index // len(templates)
+        if copy:
+            text = f'{text} {copy}'
+        suggestions.append(Suggestion(text, kind, index if kind == 'title'
+                                      else None, generator.randint(0, 1000)))
+    return suggestions
+
+
+def main(count=300_000, data_path=DEFAULT_DATA_PATH):
+    count = int(count)
+    games = [game for chunk in read_game_chunks(data_path)
+             for game in chunk]
+    suggestions = synthetic_suggestions(games, count)
+    started = time.perf_counter()
+    index = PrefixIndex(suggestions)
+    print(f'{count} suggestions indexed in '
+          f'{time.perf_counter() - started:.2f} s')
+
+    timings = []
+    for game in random.Random(235).sample(games, min(len(games), 200)):
+        for end in range(1, len(game.title) + 1):
+            started = time.perf_counter()
+            index.search(game.title[:end], 10)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f'{len(timings)} keystrokes: '
+          f'p50 {timings[len(timings) // 2] * 1e6:.0f} us, '
+          f'p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} us')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,123 @@
+"""
+Measure the throughput of concurrent readers of the database
+repository, with the engine create_app used to build (a NullPool and
+the SQLite defaults) and with the pooled engine and pragmas of the
+default configuration.
+
+The catalog CSV is loaded into a temporary SQLite file once. For each
+engine, reader threads then serve requests while one writer thread
+keeps adding reviews, first single game lookups and then catalog
+pages (a filter_game_ids call and a get_games_by_ids call for the
+page). The requests and reviews served per second are reported.
+
+Usage:
+    python -m benchmarks.database_concurrency [readers] [seconds] [path/to/games.csv]
+"""
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import clear_mappers, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from config import Config
+from games.adapters.database_engine import (create_database_engine,
+                                            sqlite_pragmas)
+from games.adapters.database_repository import SqlAlchemyRepository
+from games.adapters.orm import map_model_to_tables, metadata
+from games.adapters.populate_database import GameFileCSVReader
+from games.domainmodel.model import User
+
+DEFAULT_DATA_PATH = Path('games') / 'adapters' / 'data' / 'games.csv'
+PAGE_SIZE = 20
+
+
+def populate(database_uri: str, data_path) -> None:
+    engine = create_engine(database_uri)
+    metadata.create_all(engine)
+    repo = SqlAlchemyRepository(sessionmaker(bind=engine))
+    GameFileCSVReader(data_path, repo, True).read_csv_file()
+    repo.add_user(User('benchmark', 'Benchmark1234'))
+    repo.close_session()
+    engine.dispose()
+
+
+def run(label: str, engine, readers: int, seconds: float,
+        pages: bool) -> None:
+    repo = SqlAlchemyRepository(sessionmaker(bind=engine))
+    genres = [genre.genre_name for genre in repo.get_genres()]
+    game_ids = repo.filter_game_ids('game_id')
+    repo.close_session()
+    stop = time.perf_counter() + seconds
+    requests = [0] * readers
+    reviews = [0]
+
+    def read(reader: int) -> None:
+        generator = random.Random(reader)
+        while time.perf_counter() < stop:
+            if pages:
+                page_ids = repo.filter_game_ids(
+                    genre=generator.choice(genres))
+                offset = generator.randrange(max(len(page_ids), 1))
+                repo.get_games_by_ids(page_ids[offset:offset + PAGE_SIZE])
+            else:
+                repo.get_games_by_id(generator.choice(game_ids))
+            requests[reader] += 1
+        repo.close_session()
+
+    def write() -> None:
+        generator = random.Random(-1)
+        user = repo.get_user('benchmark')
+        while time.perf_counter() < stop:
+            game = repo.get_games_by_id(generator.choice(game_ids))
+            repo.add_review(user, game, 5, 'Benchmark review')
+            reviews[0] += 1
+        repo.close_session()
+
+    threads = [threading.Thread(target=read, args=(reader,))
+               for reader in range(readers)]
+    threads.append(threading.Thread(target=write))
+    # add_review prints every review it adds.
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    engine.dispose()
+    print(f'{label:<22} {sum(requests) / seconds:10.0f} requests/s '
+          f'{reviews[0] / seconds:8.0f} reviews/s')
+
+
+def main(readers=8, seconds=5, data_path=DEFAULT_DATA_PATH):
+    readers = int(readers)
+    seconds = float(seconds)
+    clear_mappers()
+    map_model_to_tables()
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = f'sqlite:///{Path(directory) / "games.db"}'
+        populate(database_uri, data_path)
+        print(f'{readers} readers, 1 writer, {seconds:g} s')
+        for pages in (False, True):
+            print('catalog pages' if pages else 'game lookups')
+            run('NullPool, defaults',
+                create_engine(database_uri,
+                              connect_args={'check_same_thread': False},
+                              poolclass=NullPool),
+                readers, seconds, pages)
+            run(f'{Config.SQLALCHEMY_POOL_CLASS}, pragmas',
+                create_database_engine(
+                    database_uri, pool_class=Config.SQLALCHEMY_POOL_CLASS,
+                    pool_size=max(Config.SQLALCHEMY_POOL_SIZE, readers + 1),
+                    max_overflow=Config.SQLALCHEMY_MAX_OVERFLOW,
+                    pragmas=sqlite_pragmas(vars(Config))),
+                readers, seconds, pages)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,67 @@
+"""
+Measure how fast games are written to a SQLite database, one add_game
+call per game (as populating did before add_games_bulk) and with the
+batched Core inserts of SqlAlchemyRepository.add_games_bulk.
+
+The games of the catalog CSV are repeated under new AppIDs until the
+requested count is reached. The per-game path only writes the first
+per_game_rows of them, as it is orders of magnitude slower; both rates
+are reported in games per second.
+
+Usage:
+    python -m benchmarks.database_populate [games] [per_game_rows] [path/to/games.csv]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import clear_mappers, sessionmaker
+
+from games.adapters.database_repository import SqlAlchemyRepository
+from games.adapters.datareader.ingestion import (game_from_record,
+                                                 game_to_record,
+                                                 read_game_chunks)
+from games.adapters.orm import map_model_to_tables, metadata
+from games.adapters.repository import AbstractRepository
+
+DEFAULT_DATA_PATH = Path('games') / 'adapters' / 'data' / 'games.csv'
+
+
+def synthetic_games(data_path, count: int) -> list:
+    templates = [game_to_record(game) for chunk in read_game_chunks(data_path)
+                 for game in chunk]
+    return [game_from_record((index + 1,) + templates[index % len(templates)][1:])
+            for index in range(count)]
+
+
+def new_repository(directory, name: str) -> SqlAlchemyRepository:
+    engine = create_engine(f'sqlite:///{Path(directory) / name}')
+    metadata.create_all(engine)
+    return SqlAlchemyRepository(sessionmaker(bind=engine))
+
+
+def time_populate(label: str, repo, games, populate) -> None:
+    started = time.perf_counter()
+    populate(repo, games)
+    elapsed = time.perf_counter() - started
+    print(f'{label:<10} {len(games):8d} games {elapsed:8.2f} s '
+          f'{len(games) / elapsed:10.0f} games/s')
+
+
+def main(games=100_000, per_game_rows=2_000, data_path=DEFAULT_DATA_PATH):
+    # Games have to be built after the mapping is set up.
+    clear_mappers()
+    map_model_to_tables()
+    games = synthetic_games(data_path, int(games))
+    with tempfile.TemporaryDirectory() as directory:
+        time_populate('add_game', new_repository(directory, 'per_game.db'),
+                      games[:int(per_game_rows)],
+                      AbstractRepository.add_games_bulk)
+        time_populate('bulk', new_repository(directory, 'bulk.db'), games,
+                      SqlAlchemyRepository.add_games_bulk)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,80 @@
+"""
+Measure how many CSV rows per second ingestion turns into games, with
+the setter-based construction ingestion used before Game.from_record
+and with the current parse_game_row.
+
+The rows of the catalog CSV are read into memory once, repeated to
+the requested count, and then parsed by each builder, so the timings
+only cover building games and not reading the file. A final line
+times read_game_chunks over the file itself.
+
+Usage:
+    python -m benchmarks.ingestion_throughput [rows] [path/to/games.csv]
+"""
+import csv
+import sys
+import time
+from pathlib import Path
+
+from games.adapters.datareader.ingestion import (interning_functions,
+                                                 parse_game_row,
+                                                 read_game_chunks)
+from games.adapters.interning import InternRegistry
+from games.domainmodel.model import Game
+
+DEFAULT_DATA_PATH = Path('games') / 'adapters' / 'data' / 'games.csv'
+
+
+def parse_game_row_with_setters(row: dict, registry=None) -> Game:
+    """parse_game_row as it was before Game.from_record, for reference."""
+    game = Game(int(row["AppID"]), row["Name"])
+    game.release_date = row["Release date"]
+    game.price = float(row["Price"])
+    game.description = row["About the game"]
+    game.image_url = row["Header image"]
+    if len(row["Movies"]) > 0:
+        game.video_url = row["Movies"]
+    publisher, genre, string = interning_functions(registry)
+    game.publisher = publisher(row["Publishers"])
+    for genre_name in row["Genres"].split(","):
+        game.add_genre(genre(genre_name))
+    for language in row["Supported languages"].split(","):
+        game.add_language(string(language.strip().strip("[]'")))
+    for platform, column in (("windows", "Windows"), ("mac", "Mac"),
+                             ("linux", "Linux")):
+        game.set_platform(platform, row[column].lower() == "true")
+    for category in row["Categories"].split(","):
+        game.add_category(string(category.strip()))
+    for tag in row["Tags"].split(","):
+        game.add_tag(string(tag.strip()))
+    return game
+
+
+def time_builder(label: str, rows, build) -> None:
+    registry = InternRegistry()
+    started = time.perf_counter()
+    for row in rows:
+        build(row, registry)
+    elapsed = time.perf_counter() - started
+    print(f'{label:<16} {len(rows) / elapsed:10.0f} rows/s')
+
+
+def main(rows=100_000, data_path=DEFAULT_DATA_PATH):
+    rows = int(rows)
+    with open(data_path, encoding='utf-8-sig') as file:
+        template_rows = list(csv.DictReader(file))
+    sample = [template_rows[index % len(template_rows)]
+              for index in range(rows)]
+    print(f'{rows} rows')
+    time_builder('setters', sample, parse_game_row_with_setters)
+    time_builder('from_record', sample, parse_game_row)
+
+    started = time.perf_counter()
+    games = sum(len(chunk) for chunk
+                in read_game_chunks(data_path, registry=InternRegistry()))
+    elapsed = time.perf_counter() - started
+    print(f'{"read_game_chunks":<16} {games / elapsed:10.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
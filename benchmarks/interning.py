@@ -0,0 +1,71 @@
+"""
+Report the memory saved by interning genres, publishers, tags,
+categories and languages while loading the catalog.
+
+Loads the catalog CSV twice with read_game_chunks, once with fresh
+objects per row and once through an InternRegistry, and reports for
+each load the bytes traced by tracemalloc per game and the number of
+distinct objects held for each kind of value.
+
+Usage:
+    python -m benchmarks.interning [path/to/games.csv]
+"""
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+from games.adapters.datareader.ingestion import read_game_chunks
+from games.adapters.interning import InternRegistry
+
+DEFAULT_DATA_PATH = Path('games') / 'adapters' / 'data' / 'games.csv'
+
+
+def load(data_path, registry):
+    gc.collect()
+    tracemalloc.start()
+    games = [game for chunk in read_game_chunks(data_path, registry=registry)
+             for game in chunk]
+    gc.collect()
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return games, traced_bytes
+
+
+def distinct_objects(games) -> dict:
+    """
+    Count the objects, by identity, the games hold for each kind of
+    value.
+    """
+    values = {
+        'genres': (genre for game in games for genre in game.genres),
+        'publishers': (game.publisher for game in games),
+        'tags': (tag for game in games for tag in game.tags),
+        'categories': (category for game in games
+                       for category in game.categories),
+        'languages': (language for game in games
+                      for language in game.languages),
+    }
+    return {kind: len({id(value) for value in kind_values})
+            for kind, kind_values in values.items()}
+
+
+def main(data_path=DEFAULT_DATA_PATH):
+    plain_games, plain_bytes = load(data_path, None)
+    plain_objects = distinct_objects(plain_games)
+    del plain_games
+    interned_games, interned_bytes = load(data_path, InternRegistry())
+    interned_objects = distinct_objects(interned_games)
+
+    games = len(interned_games)
+    print(f'games loaded: {games}')
+    print(f'{"":<24}{"fresh":>10}{"interned":>10}')
+    print(f'{"traced bytes per game":<24}{plain_bytes / games:>10.0f}'
+          f'{interned_bytes / games:>10.0f}')
+    for kind in plain_objects:
+        print(f'{"distinct " + kind:<24}{plain_objects[kind]:>10}'
+              f'{interned_objects[kind]:>10}')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
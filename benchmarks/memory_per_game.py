@@ -0,0 +1,109 @@
+"""
+Measure the memory held by the domain objects of the game catalog.
+
+Reads the catalog CSV with GameFileCSVReader while tracemalloc is
+tracing and reports the bytes allocated per game, together with the
+size of a single Game instance and its attribute storage.
+
+As a baseline, every game, publisher and genre is then copied into an
+instance of a class without __slots__, holding the same attribute
+values in its instance dictionary and the platforms of a game in a
+dict of booleans, as the domain model stored them before it declared
+__slots__. The baseline bytes per game are the traced bytes with the
+slotted instances replaced by these copies.
+
+Usage:
+    python -m benchmarks.memory_per_game [path/to/games.csv]
+"""
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+from games.adapters.datareader.csvdatareader import GameFileCSVReader
+
+DEFAULT_DATA_PATH = Path('games') / 'adapters' / 'data' / 'games.csv'
+
+
+def instance_size(instance) -> int:
+    """
+    Return the size of an object plus its instance __dict__, if it has
+    a non-empty one, without following references to other objects.
+    """
+    size = sys.getsizeof(instance)
+    instance_dict = getattr(instance, '__dict__', None)
+    if instance_dict:
+        size += sys.getsizeof(instance_dict)
+    return size
+
+
+def unslotted_copy(instance, classes: dict):
+    """
+    Return a copy of a model instance whose class has no __slots__,
+    sharing the attribute values of the instance. The platforms of a
+    game are copied as a dict of booleans instead of a bitfield.
+
+    Args:
+        instance: A Game, Publisher or Genre.
+        classes (dict): The unslotted classes made so far, by model
+        class, so copies of one model class share their class.
+    """
+    model_class = type(instance)
+    if model_class not in classes:
+        classes[model_class] = type(model_class.__name__, (), {})
+    copy = classes[model_class]()
+    for slot in model_class.__slots__:
+        if slot in ('__dict__', '__weakref__'):
+            continue
+        name = f'_{model_class.__name__}{slot}'
+        if slot == '__platforms':
+            setattr(copy, f'_{model_class.__name__}__system_dict',
+                    instance.system_dict)
+        elif hasattr(instance, name):
+            setattr(copy, name, getattr(instance, name))
+    return copy
+
+
+def main(data_path=DEFAULT_DATA_PATH):
+    reader = GameFileCSVReader(data_path)
+    gc.collect()
+    tracemalloc.start()
+    reader.read_csv_file()
+    gc.collect()
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    games = reader.dataset_of_games
+    instances = {id(instance): instance for game in games
+                 for instance in [game, game.publisher, *game.genres]
+                 if instance is not None}
+    slotted_bytes = sum(instance_size(instance)
+                        for instance in instances.values())
+    classes = dict()
+    gc.collect()
+    tracemalloc.start()
+    copies = {key: unslotted_copy(instance, classes)
+              for key, instance in instances.items()}
+    gc.collect()
+    copy_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Leave out the dict holding the copies.
+    copy_bytes -= sys.getsizeof(copies)
+    baseline_bytes = traced_bytes - slotted_bytes + copy_bytes
+
+    game = games[0]
+    print(f'games loaded: {len(games)}')
+    print(f'{"":<26}{"unslotted":>10}{"slotted":>10}')
+    rows = [('traced bytes per game', baseline_bytes / len(games),
+             traced_bytes / len(games))]
+    for name, instance in [('Game', game), ('Publisher', game.publisher),
+                           ('Genre', game.genres[0])]:
+        rows.append((f'{name} instance bytes',
+                     instance_size(copies[id(instance)]),
+                     instance_size(instance)))
+    for label, unslotted, slotted in rows:
+        print(f'{label:<26}{unslotted:>10.0f}{slotted:>10.0f}')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
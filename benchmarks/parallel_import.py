@@ -0,0 +1,70 @@
+"""
+Measure CSV import throughput with one core and with a process pool.
+
+Writes a synthetic catalog by repeating the rows of games.csv with
+fresh AppIDs (every tenth description gets an embedded line break, so
+the record splitter has quoted multi-line fields to step over), then
+times read_game_chunks and parse_csv_parallel with 1, 2, 4, ... worker
+processes, up to the number of CPUs.
+
+Usage:
+    python -m benchmarks.parallel_import [rows] [max_workers]
+
+rows defaults to 1000000 (about 3 GB of CSV).
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from games.adapters.datareader.ingestion import read_game_chunks
+from games.adapters.datareader.parallel import parse_csv_parallel
+
+SOURCE_PATH = Path('games') / 'adapters' / 'data' / 'games.csv'
+
+
+def write_synthetic_catalog(path, rows: int) -> None:
+    with open(SOURCE_PATH, encoding='utf-8-sig', newline='') as source:
+        reader = csv.DictReader(source)
+        template_rows = list(reader)
+        fieldnames = reader.fieldnames
+    with open(path, 'w', encoding='utf-8', newline='') as target:
+        writer = csv.DictWriter(target, fieldnames)
+        writer.writeheader()
+        for index in range(rows):
+            row = dict(template_rows[index % len(template_rows)])
+            row['AppID'] = index + 1
+            if index % 10 == 0:
+                row['About the game'] += '\nA second "quoted" paragraph.'
+            writer.writerow(row)
+
+
+def time_import(label: str, rows: int, parse) -> None:
+    started = time.perf_counter()
+    games = parse()
+    elapsed = time.perf_counter() - started
+    print(f'{label:<12} {games:>9} games {elapsed:8.2f} s '
+          f'{rows / elapsed:10.0f} rows/s')
+
+
+def main(rows=1_000_000, max_workers=None):
+    rows = int(rows)
+    max_workers = int(max_workers or os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'games.csv'
+        write_synthetic_catalog(path, rows)
+        print(f'{rows} rows, {os.path.getsize(path) / 1e6:.0f} MB, '
+              f'{os.cpu_count()} CPUs')
+        time_import('sequential', rows, lambda: sum(
+            len(chunk) for chunk in read_game_chunks(path)))
+        workers = 1
+        while workers <= max_workers:
+            time_import(f'{workers} workers', rows,
+                        lambda: len(parse_csv_parallel(path, workers)))
+            workers *= 2
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -14,9 +14,31 @@ class Config:
         SECRET_KEY (str): The secret key used for encryption and session
         management.
         TESTING (str): The testing mode of the application.
+        THREADED (bool): Whether the development server handles
+        requests on multiple threads.
         REPOSITORY (str): The repository used for database operations.
+        IMPORT_WORKERS (int): The number of processes used to parse the
+        games CSV file.
+        MEMORY_SNAPSHOT_PATH (str): The path of the catalog snapshot
+        used to start the memory repository, or None to always load
+        the CSV file.
+        CATALOG_RELOAD_INTERVAL (float): The minimum number of seconds
+        between two checks of the games CSV file for changes, or 0 to
+        never reload it. Only the MEMORY repository is reloaded.
+        AUTOCOMPLETE_LIMIT (int): The number of search suggestions
+        returned when a request does not ask for a number.
         SQLALCHEMY_DATABASE_URI (str): The URI for connecting to the database.
         SQLALCHEMY_ECHO (bool): Indicates whether SQL queries should be echoed.
+        SQLALCHEMY_POOL_CLASS (str): The name of the SQLAlchemy pool
+        class of the database engine.
+        SQLALCHEMY_POOL_SIZE (int): The number of connections a
+        QueuePool keeps open.
+        SQLALCHEMY_MAX_OVERFLOW (int): The number of connections a
+        QueuePool opens beyond SQLALCHEMY_POOL_SIZE under load.
+        SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_CACHE_SIZE,
+        SQLITE_MMAP_SIZE, SQLITE_TEMP_STORE (str): The values of the
+        SQLite pragmas set on every connection, or empty for the
+        SQLite defaults.
 
     Note:
         This class relies on environment variables being set using the
@@ -32,9 +54,24 @@ class Config:
     FLASK_ENV = environ.get('FLASK_ENV')
     SECRET_KEY = environ.get('SECRET_KEY')
     TESTING = environ.get('TESTING')
+    THREADED = environ.get('THREADED', 'False').lower().strip() == 'true'
     REPOSITORY = environ.get('REPOSITORY')
+    IMPORT_WORKERS = int(environ.get('IMPORT_WORKERS', '1'))
+    MEMORY_SNAPSHOT_PATH = environ.get('MEMORY_SNAPSHOT_PATH')
+    CATALOG_RELOAD_INTERVAL = float(environ.get('CATALOG_RELOAD_INTERVAL',
+                                                '0'))
+    AUTOCOMPLETE_LIMIT = int(environ.get('AUTOCOMPLETE_LIMIT', '10'))
     SQLALCHEMY_DATABASE_URI = environ.get('SQLALCHEMY_DATABASE_URI')
     echo_string = environ.get('SQLALCHEMY_ECHO')
     SQLALCHEMY_ECHO = False
     if echo_string.lower().strip() == 'true':
         SQLALCHEMY_ECHO = True
+    SQLALCHEMY_POOL_CLASS = environ.get('SQLALCHEMY_POOL_CLASS', 'QueuePool')
+    SQLALCHEMY_POOL_SIZE = int(environ.get('SQLALCHEMY_POOL_SIZE', '5'))
+    SQLALCHEMY_MAX_OVERFLOW = int(environ.get('SQLALCHEMY_MAX_OVERFLOW',
+                                              '10'))
+    SQLITE_JOURNAL_MODE = environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE = environ.get('SQLITE_CACHE_SIZE', '-65536')
+    SQLITE_MMAP_SIZE = environ.get('SQLITE_MMAP_SIZE', '268435456')
+    SQLITE_TEMP_STORE = environ.get('SQLITE_TEMP_STORE', 'MEMORY')
@@ -3,16 +3,21 @@
 from flask import Flask, render_template
 from pathlib import Path
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, clear_mappers
-from sqlalchemy.pool import NullPool
 
 import games.adapters.repository as repo
 from games.adapters import database_repository, populate_database, \
     memory_repository
-from games.adapters.orm import metadata, map_model_to_tables
+from games.adapters.database_engine import (create_database_engine,
+                                            sqlite_pragmas)
+from games.adapters.orm import (metadata, map_model_to_tables,
+                                upgrade_schema)
 from games.adapters.populate_database import GameFileCSVReader
 from games.adapters.memory_repository import MemoryRepository
+from games.adapters.snapshot import csv_checksum, load_snapshot
+from games.adapters.catalog_reload import CatalogReloader
+from games.adapters.datareader.ingestion import (ProgressSink,
+                                                 SnapshotSink)
 from games.gameLibrary.gameLibrary import get_genres_and_urls
 from games.gameLibrary.services import get_genres
 from games.domainmodel.model import *
@@ -54,19 +59,35 @@ def create_app(test_config=None):
         repo.repo_instance = MemoryRepository()
 
     if app.config['REPOSITORY'] == 'MEMORY':
-        repo.repo_instance = memory_repository.MemoryRepository()
-        database_mode = False
-        reader = GameFileCSVReader(data_path, repo.repo_instance,
-                                   database_mode)
-        reader.read_csv_file()
+        # Reuse the snapshot of the catalog if it was built from the
+        # same CSV file, otherwise load the CSV file and snapshot it.
+        snapshot_path = app.config.get('MEMORY_SNAPSHOT_PATH')
+        repo.repo_instance = None
+        if snapshot_path:
+            checksum = csv_checksum(data_path)
+            repo.repo_instance = load_snapshot(snapshot_path, checksum)
+
+        if repo.repo_instance is None:
+            repo.repo_instance = memory_repository.MemoryRepository()
+            database_mode = False
+            reader = GameFileCSVReader(data_path, repo.repo_instance,
+                                       database_mode)
+            sinks = []
+            if snapshot_path:
+                sinks.append(SnapshotSink(repo.repo_instance, snapshot_path,
+                                          checksum))
+            reader.read_csv_file(sinks=sinks,
+                                 workers=app.config['IMPORT_WORKERS'])
 
     if app.config['REPOSITORY'] == 'DATABASE':
         database_uri = app.config['SQLALCHEMY_DATABASE_URI']
         database_echo = app.config['SQLALCHEMY_ECHO']
-        database_engine = create_engine(database_uri,
-                                        connect_args={"check_same_thread":
-                                                          False},
-                                        poolclass=NullPool, echo=database_echo)
+        database_engine = create_database_engine(
+            database_uri, database_echo,
+            pool_class=app.config['SQLALCHEMY_POOL_CLASS'],
+            pool_size=app.config['SQLALCHEMY_POOL_SIZE'],
+            max_overflow=app.config['SQLALCHEMY_MAX_OVERFLOW'],
+            pragmas=sqlite_pragmas(app.config))
 
         session_factory = sessionmaker(autocommit=False, autoflush=True,
                                        bind=database_engine)
@@ -87,12 +108,28 @@ def create_app(test_config=None):
             database_mode = True
             reader = GameFileCSVReader(data_path, repo.repo_instance,
                                        database_mode)
-            reader.read_csv_file()
+            reader.read_csv_file(sinks=[ProgressSink(report=print)],
+                                 workers=app.config['IMPORT_WORKERS'])
             print('Repopulating Finished!')
 
         else:
+            # Add the tables, columns and indexes of newer versions to
+            # an existing database.
+            upgrade_schema(database_engine)
             map_model_to_tables()
 
+    # Apply later edits of the CSV file to the live repository. Every
+    # worker process holds its own memory repository, but shares the
+    # database with the others, so a database is only populated at
+    # startup and never reloaded.
+    catalog_reloader = None
+    if app.config['REPOSITORY'] == 'MEMORY' \
+            and app.config['CATALOG_RELOAD_INTERVAL'] > 0:
+        catalog_reloader = CatalogReloader(
+            data_path, repo.repo_instance,
+            app.config['CATALOG_RELOAD_INTERVAL'])
+        catalog_reloader.prime()
+
     with app.app_context():
         from .gameLibrary import gameLibrary
         from .gamesDescription import gamesDescription
@@ -110,6 +147,8 @@ def create_app(test_config=None):
             if isinstance(repo.repo_instance,
                           database_repository.SqlAlchemyRepository):
                 repo.repo_instance.reset_session()
+            if catalog_reloader is not None:
+                catalog_reloader.poll()
 
         @app.teardown_appcontext
         def shutdown_session(exception=None):
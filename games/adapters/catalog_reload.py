@@ -0,0 +1,205 @@
+import csv
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from games.adapters.datareader.ingestion import (RejectedRow,
+                                                 log_rejected_row,
+                                                 parse_game_row)
+from games.adapters.snapshot import csv_checksum
+from games.domainmodel.model import Genre, Game, Publisher
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogDiff(NamedTuple):
+    """The AppIDs of the games a reload inserted, updated and deleted."""
+    inserted: List[int]
+    updated: List[int]
+    deleted: List[int]
+
+
+class CatalogReloader:
+    """
+    Keeps a repository in step with the games CSV file it was loaded
+    from, without restarting the application.
+
+    The file is considered changed when its modification time or size
+    differ from the last check and its checksum differs too. A changed
+    file is diffed against the previous one row by row, keyed by AppID,
+    using a fingerprint of each row, and only the inserted, updated
+    and deleted games are applied to the repository. Users, reviews and
+    wishlists are never touched.
+
+    Methods:
+        prime(): Record the current file as the one the repository
+        holds.
+        reload_if_changed() -> CatalogDiff: Apply the changes made to
+        the file since the last check.
+        poll() -> CatalogDiff: reload_if_changed, at most once per
+        interval.
+    """
+
+    def __init__(self, data_path, repo, interval: float = 0,
+                 rejects: Callable[[RejectedRow], None] = None):
+        """
+        Args:
+            data_path: The path of the games CSV file.
+            repo: The repository loaded from the file.
+            interval (float): The minimum number of seconds between two
+            checks made by poll.
+            rejects: Called with a RejectedRow for every inserted or
+            updated row that cannot be parsed. Defaults to
+            log_rejected_row.
+        """
+        self.__data_path = data_path
+        self.__repo = repo
+        self.__interval = interval
+        self.__rejects = rejects if rejects is not None \
+            else log_rejected_row
+        self.__file_state = None
+        self.__checksum = None
+        self.__fingerprints = dict()
+        self.__next_poll = 0.0
+        self.__lock = threading.Lock()
+
+    def prime(self) -> None:
+        """
+        Record the current file as the one the repository holds, so the
+        next reload only applies later changes.
+        """
+        with self.__lock:
+            self.__file_state = self.__stat()
+            self.__checksum = csv_checksum(self.__data_path)
+            self.__fingerprints, _ = self.__read_rows(dict())
+
+    def poll(self) -> (CatalogDiff, None):
+        """
+        Returns:
+            CatalogDiff: See reload_if_changed.
+
+            None: If the interval has not passed since the last poll.
+        """
+        now = time.monotonic()
+        if now < self.__next_poll:
+            return None
+        self.__next_poll = now + self.__interval
+        return self.reload_if_changed()
+
+    def reload_if_changed(self) -> (CatalogDiff, None):
+        """
+        Apply the changes made to the file since the last check to the
+        repository. When a check is already running on another thread,
+        return at once rather than wait for it.
+
+        Returns:
+            CatalogDiff: The games inserted, updated and deleted.
+
+            None: If the file is unchanged or another check is running.
+        """
+        if not self.__lock.acquire(blocking=False):
+            return None
+        try:
+            file_state = self.__stat()
+            if file_state == self.__file_state:
+                return None
+            checksum = csv_checksum(self.__data_path)
+            if checksum == self.__checksum:
+                self.__file_state = file_state
+                return None
+            diff = self.__apply_changes()
+            self.__file_state = file_state
+            self.__checksum = checksum
+        finally:
+            self.__lock.release()
+        logger.info('Reloaded %s: %d inserted, %d updated, %d deleted',
+                    self.__data_path, len(diff.inserted),
+                    len(diff.updated), len(diff.deleted))
+        return diff
+
+    def __stat(self) -> Tuple[int, int]:
+        stat = os.stat(self.__data_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def __read_rows(self, old_fingerprints: Dict[int, int]) \
+            -> Tuple[Dict[int, int], Dict[int, Tuple[int, dict]]]:
+        """
+        Fingerprint every row of the file.
+
+        Args:
+            old_fingerprints (Dict[int, int]): The fingerprints by AppID
+            of the previous file.
+
+        Returns:
+            Tuple[Dict[int, int], Dict[int, Tuple[int, dict]]]: The
+            fingerprints by AppID of the file, and the line number and
+            row of every AppID whose fingerprint is not among
+            old_fingerprints. Like add_games_bulk, the last row with an
+            AppID wins.
+        """
+        fingerprints = dict()
+        changed_rows = dict()
+        with open(self.__data_path, 'r', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            try:
+                id_column = header.index('AppID')
+            except ValueError:
+                return fingerprints, changed_rows
+            for record in reader:
+                try:
+                    game_id = int(record[id_column])
+                except (IndexError, ValueError):
+                    row = dict(zip(header, record))
+                    self.__rejects(RejectedRow(reader.line_num, row,
+                                               'invalid data: AppID'))
+                    continue
+                fingerprint = hash(tuple(record))
+                fingerprints[game_id] = fingerprint
+                if old_fingerprints.get(game_id) != fingerprint:
+                    changed_rows[game_id] = (reader.line_num,
+                                             dict(zip(header, record)))
+                else:
+                    changed_rows.pop(game_id, None)
+        return fingerprints, changed_rows
+
+    def __apply_changes(self) -> CatalogDiff:
+        old_fingerprints = self.__fingerprints
+        fingerprints, changed_rows = self.__read_rows(old_fingerprints)
+        registry = self.__repo.get_intern_registry()
+        diff = CatalogDiff([], [], [])
+        for game_id, (line_number, row) in sorted(changed_rows.items()):
+            try:
+                game = parse_game_row(row, registry)
+            except (ValueError, KeyError) as e:
+                self.__rejects(RejectedRow(line_number, row,
+                                           f'invalid data: {e}'))
+                # Keep serving the previous version of the game.
+                if game_id in old_fingerprints:
+                    fingerprints[game_id] = old_fingerprints[game_id]
+                else:
+                    del fingerprints[game_id]
+                continue
+            if game_id in old_fingerprints:
+                self.__repo.update_game(game)
+                diff.updated.append(game_id)
+            else:
+                self.__add_game(game)
+                diff.inserted.append(game_id)
+        for game_id in sorted(old_fingerprints.keys() - fingerprints.keys()):
+            self.__repo.remove_game(game_id)
+            diff.deleted.append(game_id)
+        self.__fingerprints = fingerprints
+        return diff
+
+    def __add_game(self, game: Game) -> None:
+        # Register copies, as add_games_bulk does, so the ORM does not
+        # add the game through its publisher or genres.
+        if game.publisher is not None:
+            self.__repo.add_publisher(
+                Publisher(game.publisher.publisher_name))
+        for genre in game.genres:
+            self.__repo.add_genre(Genre(genre.genre_name))
+        self.__repo.add_game(game)
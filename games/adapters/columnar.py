@@ -0,0 +1,273 @@
+from datetime import date
+from typing import List
+
+import numpy as np
+
+from games.adapters.facets import FacetIndex, bitmap_to_mask, mask_to_bitmap
+from games.domainmodel.model import PLATFORM_FLAGS, Game
+
+
+def average_rating(game: Game) -> float:
+    """
+    Args:
+        game (Game): A game.
+
+    Returns:
+        float: The average rating of the reviews of the game, or 0 if
+        the game has no reviews.
+    """
+    if not game.reviews:
+        return 0
+    return sum(review.rating for review in game.reviews) / len(game.reviews)
+
+
+class ColumnarCatalog:
+    """
+    A column-oriented copy of the sortable and filterable data of the
+    catalog: one NumPy array per field, holding a row per game in game
+    ID order, a boolean genre matrix with a column per genre, and a
+    FacetIndex over the same rows.
+
+    Filters, sorts and aggregates run as vectorized operations over the
+    columns instead of Python loops over the games, and filters and
+    sorts return arrays of game IDs.
+
+    The catalog columns are fixed once built; the memory repository
+    builds a new ColumnarCatalog when games are added, updated or
+    removed. Review counts and ratings are updated in place by
+    update_reviews.
+
+    Methods:
+        mask(...) -> np.ndarray: Select the rows matching filters.
+        sorted_ids(sort_criteria, mask, descending) -> np.ndarray: The
+        IDs of the selected games in a sort order.
+        released_between(released_from, released_to, newest_first) ->
+        np.ndarray: The IDs of the games released in a date range.
+        summary(mask) -> dict: Aggregates over the selected games.
+        facet_counts(...) -> dict: Facet counts of the games matching
+        filters.
+        update_reviews(game): Refresh the review columns of a game.
+    """
+
+    def __init__(self, games: List[Game]):
+        """
+        Args:
+            games (List[Game]): The games of the catalog, sorted by ID.
+        """
+        count = len(games)
+        self.game_ids = np.fromiter((game.game_id for game in games),
+                                    np.int64, count)
+        self.prices = np.fromiter((game.price or 0 for game in games),
+                                  np.float64, count)
+        self.release_dates = np.fromiter(
+            (game.release_date_ordinal for game in games), np.int32, count)
+        # The rows in release date order, ties in game ID order, and
+        # their dates, for range lookups by binary search.
+        self.release_order = np.argsort(self.release_dates, kind='stable')
+        self.sorted_release_dates = self.release_dates[self.release_order]
+        self.platforms = np.fromiter((game.platforms for game in games),
+                                     np.uint8, count)
+        self.review_counts = np.fromiter(
+            (len(game.reviews) for game in games), np.int32, count)
+        self.ratings = np.fromiter((average_rating(game) for game in games),
+                                   np.float64, count)
+        title_order = sorted(
+            range(count), key=lambda row: (
+                (games[row].title or '').casefold(), games[row].game_id))
+        self.title_ranks = np.empty(count, np.int32)
+        self.title_ranks[title_order] = np.arange(count, dtype=np.int32)
+
+        self.genre_names = sorted({genre.genre_name for game in games
+                                   for genre in game.genres})
+        genre_columns = {name: column
+                         for column, name in enumerate(self.genre_names)}
+        self.genres = np.zeros((count, len(self.genre_names)), np.bool_)
+        for row, game in enumerate(games):
+            for genre in game.genres:
+                self.genres[row, genre_columns[genre.genre_name]] = True
+        self.__genre_columns = genre_columns
+        self.facets = FacetIndex(games)
+        # The facet counts of a genre (None for all games) without other
+        # filters, by genre.
+        self.__facet_cache = dict()
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def mask(self, genre: str = None, min_price: float = None,
+             max_price: float = None, released_from: date = None,
+             released_to: date = None, facets: dict = None) -> np.ndarray:
+        """
+        Args:
+            genre (str): The name of the genre the games must have.
+            min_price (float): The lowest price, inclusive.
+            max_price (float): The highest price, inclusive.
+            released_from (date): The earliest release date, inclusive.
+            released_to (date): The latest release date, inclusive.
+            facets (dict): The facet filters, see FacetIndex.select.
+            Filters left as None do not restrict the games.
+
+        Returns:
+            np.ndarray: A boolean array, True for the rows of the games
+            matching every filter.
+        """
+        mask = np.ones(len(self), np.bool_)
+        if genre is not None:
+            column = self.__genre_columns.get(genre)
+            if column is None:
+                return np.zeros(len(self), np.bool_)
+            mask &= self.genres[:, column]
+        if min_price is not None:
+            mask &= self.prices >= min_price
+        if max_price is not None:
+            mask &= self.prices <= max_price
+        if released_from is not None:
+            mask &= self.release_dates >= released_from.toordinal()
+        if released_to is not None:
+            # Games without a release date have ordinal 0: exclude them
+            # from date ranges.
+            mask &= (self.release_dates <= released_to.toordinal()) \
+                & (self.release_dates > 0)
+        if facets:
+            mask &= bitmap_to_mask(self.facets.select(facets), len(self))
+        return mask
+
+    def facet_counts(self, genre: str = None, min_price: float = None,
+                     max_price: float = None, released_from: date = None,
+                     released_to: date = None,
+                     facets: dict = None) -> dict:
+        """
+        Args:
+            genre ... released_to: As for mask.
+            facets (dict): The facet filters, see FacetIndex.counts.
+
+        Returns:
+            dict: The facet counts of the games matching the filters,
+            see FacetIndex.counts. The counts of a genre without other
+            filters are cached.
+        """
+        if min_price is None and max_price is None \
+                and released_from is None and released_to is None \
+                and not any((facets or {}).values()):
+            counts = self.__facet_cache.get(genre)
+            if counts is None:
+                counts = self.facets.counts(
+                    None, mask_to_bitmap(self.mask(genre)))
+                self.__facet_cache[genre] = counts
+            return {dimension: dict(values)
+                    for dimension, values in counts.items()}
+        base = mask_to_bitmap(self.mask(genre, min_price, max_price,
+                                        released_from, released_to))
+        return self.facets.counts(facets, base)
+
+    def sorted_ids(self, sort_criteria: str = 'title',
+                   mask: np.ndarray = None,
+                   descending: bool = False) -> np.ndarray:
+        """
+        Args:
+            sort_criteria (str): One of SORT_CRITERIA, with the same
+            orders and tie breaks as the sort orders of the memory
+            repository.
+            mask (np.ndarray): The rows to sort, see mask, or None for
+            every row.
+            descending (bool): Whether to reverse the sort order.
+
+        Returns:
+            np.ndarray: The IDs of the selected games in sort order.
+        """
+        rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if sort_criteria == 'title':
+            keys = (self.title_ranks[rows],)
+        elif sort_criteria == 'game_id':
+            keys = ()
+        elif sort_criteria == 'release_date':
+            keys = (self.release_dates[rows],)
+        elif sort_criteria == 'price':
+            keys = (self.prices[rows],)
+        elif sort_criteria == 'review_count':
+            keys = (-self.review_counts[rows],)
+        elif sort_criteria == 'rating':
+            keys = (-self.review_counts[rows], -self.ratings[rows])
+        else:
+            raise ValueError(f'Unknown sort criteria {sort_criteria}')
+        if keys:
+            # Rows are in game ID order and lexsort is stable, so ties
+            # keep ascending game IDs.
+            rows = rows[np.lexsort(keys)]
+        game_ids = self.game_ids[rows]
+        return game_ids[::-1] if descending else game_ids
+
+    def released_between(self, released_from: date = None,
+                         released_to: date = None,
+                         newest_first: bool = False) -> np.ndarray:
+        """
+        Args:
+            released_from (date): The earliest release date, inclusive,
+            or None.
+            released_to (date): The latest release date, inclusive, or
+            None.
+            newest_first (bool): Whether to put the most recent games
+            first.
+
+        Returns:
+            np.ndarray: The IDs of the games released in the date range
+            in release date order, ties in game ID order, found by
+            binary search over the sorted release dates. Games without
+            a release date are left out.
+        """
+        low = max(released_from.toordinal(), 1) \
+            if released_from is not None else 1
+        start = np.searchsorted(self.sorted_release_dates, low, 'left')
+        if released_to is not None:
+            stop = np.searchsorted(self.sorted_release_dates,
+                                   released_to.toordinal(), 'right')
+        else:
+            stop = len(self)
+        game_ids = self.game_ids[self.release_order[start:max(start, stop)]]
+        return game_ids[::-1] if newest_first else game_ids
+
+    def summary(self, mask: np.ndarray = None) -> dict:
+        """
+        Args:
+            mask (np.ndarray): The rows to aggregate, see mask, or None
+            for every row.
+
+        Returns:
+            dict: The number of games, their lowest, highest and average
+            price, the number of free games, the earliest and latest
+            release date, and the number of games per platform. The
+            prices and dates are None when no game is selected.
+        """
+        if mask is None:
+            mask = np.ones(len(self), np.bool_)
+        prices = self.prices[mask]
+        release_dates = self.release_dates[mask]
+        release_dates = release_dates[release_dates > 0]
+        platforms = self.platforms[mask]
+        count = int(mask.sum())
+        return {
+            'count': count,
+            'min_price': float(prices.min()) if count else None,
+            'max_price': float(prices.max()) if count else None,
+            'average_price': float(prices.mean()) if count else None,
+            'free_games': int((prices == 0).sum()),
+            'earliest_release': (date.fromordinal(int(release_dates.min()))
+                                 if len(release_dates) else None),
+            'latest_release': (date.fromordinal(int(release_dates.max()))
+                               if len(release_dates) else None),
+            'platforms': {platform: int(((platforms & flag) != 0).sum())
+                          for platform, flag in PLATFORM_FLAGS.items()},
+        }
+
+    def update_reviews(self, game: Game) -> None:
+        """
+        Refresh the review count and average rating of a game after a
+        review was added.
+
+        Args:
+            game (Game): A game of the catalog.
+        """
+        row = np.searchsorted(self.game_ids, game.game_id)
+        if row < len(self) and self.game_ids[row] == game.game_id:
+            self.review_counts[row] = len(game.reviews)
+            self.ratings[row] = average_rating(game)
@@ -0,0 +1,123 @@
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import (NullPool, QueuePool, SingletonThreadPool,
+                             StaticPool)
+
+# The pool classes the SQLALCHEMY_POOL_CLASS setting can name.
+POOL_CLASSES = {pool_class.__name__: pool_class
+                for pool_class in (QueuePool, NullPool, StaticPool,
+                                   SingletonThreadPool)}
+
+# The values accepted by the SQLite pragmas that take a keyword, see
+# https://www.sqlite.org/pragma.html.
+PRAGMA_KEYWORDS = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL',
+                     'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+
+# The SQLite pragmas that take an integer.
+PRAGMA_INTEGERS = ('cache_size', 'mmap_size')
+
+
+def sqlite_pragmas(config) -> Dict[str, str]:
+    """
+    Args:
+        config: The application configuration. The SQLITE_<PRAGMA>
+        setting of each of the pragmas journal_mode, synchronous,
+        cache_size, mmap_size and temp_store gives its value; settings
+        that are missing or empty leave the SQLite default.
+
+    Returns:
+        Dict[str, str]: The pragmas to set on every connection, by name.
+
+    Raises:
+        ValueError: If a setting is not a value its pragma accepts.
+    """
+    pragmas = dict()
+    for name in (*PRAGMA_KEYWORDS, *PRAGMA_INTEGERS):
+        value = config.get(f'SQLITE_{name.upper()}')
+        if value is None or str(value).strip() == '':
+            continue
+        value = str(value).strip().upper()
+        if name in PRAGMA_INTEGERS:
+            try:
+                value = str(int(value))
+            except ValueError:
+                raise ValueError(f'Invalid value {value} for pragma {name}')
+        elif value not in PRAGMA_KEYWORDS[name]:
+            raise ValueError(f'Invalid value {value} for pragma {name}')
+        pragmas[name] = value
+    return pragmas
+
+
+def is_memory_database(database_uri: str) -> bool:
+    """
+    Returns:
+        bool: Whether the URI names an in-memory SQLite database, whose
+        connections each see a database of their own.
+    """
+    url = make_url(database_uri)
+    return url.get_backend_name() == 'sqlite' \
+        and url.database in (None, '', ':memory:')
+
+
+def create_database_engine(database_uri: str, echo: bool = False,
+                           pool_class: str = 'QueuePool',
+                           pool_size: int = 5, max_overflow: int = 10,
+                           pragmas: Dict[str, str] = None) -> Engine:
+    """
+    Create the engine of the database repository.
+
+    Connections are pooled, so a request reuses an open connection
+    instead of opening the database file again, and the pragmas are
+    set once on every new SQLite connection by a connect event hook.
+    In-memory SQLite databases always use a StaticPool, as every
+    connection to them would otherwise get an empty database.
+
+    Args:
+        database_uri (str): The URI of the database.
+        echo (bool): Whether SQLAlchemy prints the SQL statements.
+        pool_class (str): The name of one of POOL_CLASSES.
+        pool_size (int): The number of connections a QueuePool keeps.
+        max_overflow (int): The number of connections a QueuePool opens
+        beyond pool_size under load.
+        pragmas (Dict[str, str]): The SQLite pragmas to set, see
+        sqlite_pragmas.
+
+    Returns:
+        Engine: The engine.
+
+    Raises:
+        ValueError: If pool_class is not one of POOL_CLASSES.
+    """
+    if pool_class not in POOL_CLASSES:
+        raise ValueError(f'Unknown pool class {pool_class}')
+    options = {'echo': echo}
+    sqlite = make_url(database_uri).get_backend_name() == 'sqlite'
+    if sqlite:
+        options['connect_args'] = {'check_same_thread': False}
+    if sqlite and is_memory_database(database_uri):
+        options['poolclass'] = StaticPool
+    else:
+        options['poolclass'] = POOL_CLASSES[pool_class]
+        if pool_class == 'QueuePool':
+            options['pool_size'] = pool_size
+            options['max_overflow'] = max_overflow
+    engine = create_engine(database_uri, **options)
+
+    if sqlite and pragmas:
+        statements = [f'PRAGMA {name}={value}'
+                      for name, value in pragmas.items()]
+
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.close()
+
+    return engine
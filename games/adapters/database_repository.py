@@ -1,12 +1,41 @@
+import math
+from datetime import date
 from typing import List, Any
 
-from sqlalchemy import func, orm
+from sqlalchemy import case, func, orm, select, text
 from sqlalchemy.orm import scoped_session, contains_eager
 from sqlalchemy.orm.exc import NoResultFound
 
-from games.adapters.repository import AbstractRepository
+from games.adapters.facets import FACET_DIMENSIONS
+from games.adapters.indexes import (FULL_TEXT_FIELDS, FULL_TEXT_WEIGHTS,
+                                    FUZZY_CANDIDATES, FUZZY_THRESHOLD,
+                                    SUGGESTION_KINDS, Suggestion,
+                                    fold_text, full_text_terms,
+                                    fuzzy_score, trigrams)
+from games.adapters.orm import (FULL_TEXT_TABLE, games_table,
+                                category_key, game_categories_table,
+                                game_genres_table, game_tags_table,
+                                genres_table, normalize_username,
+                                publishers_table, reviews_table,
+                                search_keys, search_trigram_rows,
+                                search_trigrams_table, tag_key, tags_table,
+                                users_table)
+from games.adapters.repository import AbstractRepository, SORT_CRITERIA
+from games.adapters.tag_query import evaluate_tag_query
 from games.domainmodel.model import *
 
+# The facet dimensions stored in the database.
+DATABASE_FACET_DIMENSIONS = ('genres', 'publishers', 'platforms',
+                             'categories')
+
+# The number of games add_games_bulk writes per transaction.
+BULK_BATCH_SIZE = 1000
+
+# The columns of the full-text index holding each of the
+# FULL_TEXT_FIELDS.
+FULL_TEXT_COLUMNS = dict(zip(FULL_TEXT_FIELDS,
+                             ('game_title', 'publisher', 'description')))
+
 
 class SessionContextManager:
     """
@@ -175,26 +204,54 @@ class SqlAlchemyRepository(AbstractRepository):
         - add_publisher(publisher): Adds a publisher to the repository.
         - get_publishers() -> List[Publisher]: Gets all publishers from
           the repository.
+        - get_tags() -> List[str]: Gets all tags from the repository.
+        - get_tag_counts() -> dict: Gets the number of games with each
+          tag from the repository.
         - get_genre_of_games(target_genre: Genre) -> List[Game]: Gets
           all games with a particular genre from the repository.
         - add_game(game: Game): Adds a game to the repository.
+        - add_games_bulk(games, batch_size): Adds many games to the
+          repository in batched transactions.
+        - update_game(game: Game): Replaces the catalog data of a stored
+          game in the repository.
+        - remove_game(game_id: int): Removes a game from the repository.
         - get_games() -> List[Game]: Gets all games from the repository.
         - get_slide_games() -> List[Game]: Gets all slide games from the
           repository.
         - get_number_of_games(): Gets the number of games from the
           repository.
+        - filter_game_ids(...) -> List[int]: Gets the IDs of the games
+          in a genre, price range and release date range, sorted.
+        - get_catalog_summary(...) -> dict: Gets aggregates of the games
+          matching the filters of filter_game_ids.
+        - get_facet_counts(...) -> dict: Gets the number of matching
+          games for every genre, publisher, platform and category.
+        - released_between(...) -> List[Game]: Gets a page of the games
+          released in a date range, in release date order.
+        - count_released_between(...) -> int: Counts the games released
+          in a date range.
         - get_games_by_id(game_id: int): Gets a game from the repository
           by its ID.
+        - get_games_by_ids(game_ids) -> List[Game]: Gets several games
+          from the repository by their IDs.
         - get_similar_games(genres_list: List[Genre]): Gets all games
           with similar genres from the repository.
         - search_games_by_title(game_title: str) -> List[Game]: Searches
           games by their titles in the repository.
         - search_games_by_publisher(query: str) -> List[Game]: Searches
           games by their publishers in the repository.
+        - search_games_fuzzy(query: str, limit: int) -> List[Game]:
+          Searches games by titles and publishers similar to the query.
+        - search_games_full_text(query: str, limit: int) -> List[Game]:
+          Searches the titles, publishers and descriptions of the games
+          in the full-text index, ranked by BM25.
         - search_games_by_category(query: str) -> List[Game]: Searches
           games by their categories in the repository.
         - search_games_by_tags(query: str) -> List[Game]: Searches games
           by their tags in the repository.
+        - suggest(prefix: str, limit: int) -> List[Suggestion]: Gets the
+          most popular titles, publishers and tags starting with a
+          prefix.
         - add_wish_game(user, game): Adds a game to the wishlist of a
           user in the repository.
         - remove_wish_game(user, game): Removes a game from the wishlist
@@ -215,6 +272,9 @@ class SqlAlchemyRepository(AbstractRepository):
 
         """
         self._session_cm = SessionContextManager(session_factory)
+        # The facet counts of the games of a genre (None for all games)
+        # without other filters, by genre, dropped on catalog writes.
+        self.__facet_cache = dict()
 
     def close_session(self):
         """
@@ -269,12 +329,20 @@ class SqlAlchemyRepository(AbstractRepository):
         """
         try:
             user = self._session_cm.session.query(User).filter(
-                func.lower(User._User__username) \
-                == func.lower(username)).one()
+                self.__username_is(username)).one()
             return user
         except NoResultFound:
             return None
 
+    @staticmethod
+    def __username_is(username: str):
+        """
+        Returns:
+            The condition matching the user with a username, ignoring
+            case, on the indexed username_key column.
+        """
+        return users_table.c.username_key == normalize_username(username)
+
     def add_genre(self, genre: Genre) -> None:
         """
         Args:
@@ -287,6 +355,363 @@ class SqlAlchemyRepository(AbstractRepository):
                 scm.session.merge(genre)
                 scm.commit()
 
+    def get_number_of_genre_games(self, target_genre) -> int:
+        """
+        Args:
+            target_genre (str): The name of the genre to count.
+
+        Returns:
+            int: The number of games with the specified genre.
+        """
+        if isinstance(target_genre, Genre):
+            target_genre = target_genre.genre_name
+        return (self._session_cm.session.query(Game)
+                .join(Game._Game__genres)
+                .filter(Genre._Genre__genre_name == target_genre).count())
+
+    def get_sorted_games(self, sort_criteria='title', genre=None, offset=0,
+                         limit=None, descending=False) -> List[Game]:
+        """
+        Retrieves a page of the games, optionally of one genre, sorted
+        in the database with ORDER BY, LIMIT and OFFSET.
+
+        Args:
+            sort_criteria (str): One of SORT_CRITERIA. Games are sorted
+            by title, game ID, release date and price in ascending
+            order, and by review count and average rating in descending
+            order.
+            genre (str): The name of the genre to restrict the games
+            to, or None for all games.
+            offset (int): The number of games to skip.
+            limit (int): The maximum number of games to return, or None
+            for all games after offset.
+            descending (bool): Whether to reverse the sort order.
+
+        Returns:
+            List[Game]: The requested page of games.
+        """
+        if sort_criteria not in SORT_CRITERIA:
+            raise ValueError(f'Unknown sort criteria {sort_criteria}')
+        if isinstance(genre, Genre):
+            genre = genre.genre_name
+        query = self.__filter_query(self._session_cm.session.query(Game),
+                                    genre)
+        query = self.__order_query(query, sort_criteria, descending)
+        return query.offset(offset).limit(limit).all()
+
+    @staticmethod
+    def __filter_query(query, genre, min_price=None, max_price=None,
+                       released_from=None, released_to=None, facets=None):
+        """
+        Returns:
+            Query: query restricted to the games of genre, if not None,
+            to the games in the price and release date ranges and to the
+            games matching the facet filters (see get_facet_counts).
+            Games without a release date are left out of date ranges.
+        """
+        if genre is not None:
+            query = (query.join(Game._Game__genres)
+                     .filter(Genre._Genre__genre_name == genre))
+        if min_price is not None:
+            query = query.filter(Game._Game__price >= min_price)
+        if max_price is not None:
+            query = query.filter(Game._Game__price <= max_price)
+        if released_from is not None:
+            query = query.filter(
+                Game._Game__release_ordinal >= released_from.toordinal())
+        if released_to is not None:
+            query = query.filter(
+                Game._Game__release_ordinal.between(
+                    1, released_to.toordinal()))
+        for dimension, values in (facets or {}).items():
+            if dimension not in FACET_DIMENSIONS:
+                raise ValueError(f'Unknown facet dimension {dimension}')
+            values = list(values)
+            if not values or dimension not in DATABASE_FACET_DIMENSIONS:
+                continue
+            if dimension == 'genres':
+                query = query.filter(Game._Game__game_id.in_(
+                    select(game_genres_table.c.game_id)
+                    .where(game_genres_table.c.genre_name.in_(values))))
+            elif dimension == 'categories':
+                query = query.filter(Game._Game__game_id.in_(
+                    select(game_categories_table.c.game_id)
+                    .where(game_categories_table.c.category_name
+                           .in_(values))))
+            elif dimension == 'publishers':
+                query = query.filter(Game._Game__publisher_id.in_(values))
+            else:
+                flags = 0
+                for platform in values:
+                    flags |= PLATFORM_FLAGS.get(platform, 0)
+                query = query.filter(
+                    Game._Game__platforms.op('&')(flags) != 0)
+        return query
+
+    @staticmethod
+    def __order_query(query, sort_criteria, descending):
+        """
+        Returns:
+            Query: query ordered by sort_criteria, with ties broken by
+            game ID.
+        """
+        review_count = func.count(Review._Review__rating)
+        if sort_criteria in ('review_count', 'rating'):
+            query = (query.outerjoin(Game._Game__reviews)
+                     .group_by(Game._Game__game_id))
+        if sort_criteria == 'title':
+            order = [(func.lower(Game._Game__game_title), True)]
+        elif sort_criteria == 'price':
+            order = [(Game._Game__price, True)]
+        elif sort_criteria == 'release_date':
+            order = [(Game._Game__release_ordinal, True)]
+        elif sort_criteria == 'review_count':
+            order = [(review_count, False)]
+        elif sort_criteria == 'rating':
+            order = [(func.coalesce(func.avg(Review._Review__rating), 0),
+                      False), (review_count, False)]
+        else:
+            order = []
+        order.append((Game._Game__game_id, True))
+        return query.order_by(*[
+            column.asc() if ascending != descending else column.desc()
+            for column, ascending in order])
+
+    def filter_game_ids(self, sort_criteria='title', genre=None,
+                        min_price=None, max_price=None, released_from=None,
+                        released_to=None, descending=False,
+                        facets=None) -> List[int]:
+        """
+        Retrieves the IDs of the games matching the filters, filtered
+        and sorted in the database.
+
+        Args:
+            sort_criteria (str): One of SORT_CRITERIA, with the same
+            orders as get_sorted_games.
+            genre (str): The name of the genre to restrict the games
+            to, or None for all games.
+            min_price (float): The lowest price, inclusive, or None.
+            max_price (float): The highest price, inclusive, or None.
+            released_from (date): The earliest release date, inclusive,
+            or None.
+            released_to (date): The latest release date, inclusive, or
+            None.
+            descending (bool): Whether to reverse the sort order.
+            facets (dict): The values chosen in each facet dimension,
+            see get_facet_counts, or None.
+
+        Returns:
+            List[int]: The IDs of the matching games in sort order.
+        """
+        if sort_criteria not in SORT_CRITERIA:
+            raise ValueError(f'Unknown sort criteria {sort_criteria}')
+        if isinstance(genre, Genre):
+            genre = genre.genre_name
+        query = self.__filter_query(
+            self._session_cm.session.query(Game._Game__game_id),
+            genre, min_price, max_price, released_from, released_to,
+            facets)
+        query = self.__order_query(query, sort_criteria, descending)
+        return [row[0] for row in query]
+
+    def get_catalog_summary(self, genre=None, min_price=None, max_price=None,
+                            released_from=None, released_to=None,
+                            facets=None) -> dict:
+        """
+        Aggregates the games matching the filters of filter_game_ids
+        in one SQL statement, with COUNT, MIN, MAX and AVG of the prices
+        and MIN and MAX of the release date ordinals over the filtered
+        games, and a conditional COUNT for the free games and each
+        platform.
+
+        Returns:
+            dict: The number of games, their lowest, highest and average
+            price, the number of free games, the earliest and latest
+            release date, and the number of games per platform. The
+            prices and dates are None when no game matches.
+        """
+        if isinstance(genre, Genre):
+            genre = genre.genre_name
+        price = func.coalesce(Game._Game__price, 0)
+        # Games without a release date have ordinal 0, which NULLIF
+        # leaves out of the release date aggregates.
+        release_ordinal = func.nullif(Game._Game__release_ordinal, 0)
+        aggregates = [func.count(), func.min(price), func.max(price),
+                      func.avg(price), func.count(case((price == 0, 1))),
+                      func.min(release_ordinal), func.max(release_ordinal)]
+        aggregates += [
+            func.count(case((Game._Game__platforms.op('&')(flag) != 0, 1)))
+            for flag in PLATFORM_FLAGS.values()]
+        (count, lowest_price, highest_price, average_price, free_games,
+         earliest, latest, *platforms) = self.__filter_query(
+            self._session_cm.session.query(*aggregates).select_from(Game),
+            genre, min_price, max_price, released_from, released_to,
+            facets).one()
+        return {
+            'count': count,
+            'min_price': lowest_price,
+            'max_price': highest_price,
+            'average_price': average_price,
+            'free_games': free_games,
+            'earliest_release': (date.fromordinal(earliest)
+                                 if earliest else None),
+            'latest_release': (date.fromordinal(latest)
+                               if latest else None),
+            'platforms': dict(zip(PLATFORM_FLAGS, platforms)),
+        }
+
+    def get_facet_counts(self, genre=None, min_price=None, max_price=None,
+                         released_from=None, released_to=None,
+                         facets=None) -> dict:
+        """
+        Counts the games matching the filters of filter_game_ids for
+        every value of every facet dimension, with a GROUP BY query per
+        dimension. As with the memory repository, the filters of a
+        dimension are left out of its own counts.
+
+        The database stores no languages, so only the genres,
+        publishers, platforms and categories dimensions are counted, and
+        filters on languages are ignored.
+
+        The counts of a genre without price, release date or facet
+        filters, as on an unfiltered library page, are cached until the
+        catalog changes.
+
+        Returns:
+            dict: The counts by value, for each of the
+            DATABASE_FACET_DIMENSIONS. Values with no matching game are
+            left out.
+        """
+        if isinstance(genre, Genre):
+            genre = genre.genre_name
+        if min_price is None and max_price is None \
+                and released_from is None and released_to is None \
+                and not any((facets or {}).values()):
+            # Catalog writes replace the cache, so counts computed
+            # alongside a write go to the dropped cache.
+            cache = self.__facet_cache
+            counts = cache.get(genre)
+            if counts is None:
+                counts = self.__count_facets(genre)
+                cache[genre] = counts
+            return {dimension: dict(values)
+                    for dimension, values in counts.items()}
+        return self.__count_facets(genre, min_price, max_price,
+                                   released_from, released_to, facets)
+
+    def __count_facets(self, genre, min_price=None, max_price=None,
+                       released_from=None, released_to=None,
+                       facets=None) -> dict:
+        """
+        Counts the facet values of the games matching the filters with
+        the GROUP BY queries of get_facet_counts.
+        """
+        session = self._session_cm.session
+        facets = {dimension: list(values)
+                  for dimension, values in (facets or {}).items()}
+        counts = dict()
+        for dimension in DATABASE_FACET_DIMENSIONS:
+            # A game counts towards a dimension when it passes the
+            # filters of every other dimension.
+            others = {other: values for other, values in facets.items()
+                      if other != dimension}
+
+            def filtered(*columns):
+                return self.__filter_query(
+                    session.query(*columns), genre, min_price, max_price,
+                    released_from, released_to, others)
+
+            if dimension == 'genres':
+                genre_name = game_genres_table.c.genre_name
+                rows = (session.query(genre_name, func.count())
+                        .filter(game_genres_table.c.game_id.in_(
+                            filtered(Game._Game__game_id)))
+                        .group_by(genre_name))
+            elif dimension == 'categories':
+                category = game_categories_table.c.category_name
+                rows = (session.query(category, func.count())
+                        .filter(game_categories_table.c.game_id.in_(
+                            filtered(Game._Game__game_id)))
+                        .group_by(category))
+            elif dimension == 'publishers':
+                publisher = Game._Game__publisher_id
+                rows = (filtered(publisher, func.count())
+                        .filter(publisher.isnot(None))
+                        .group_by(publisher))
+            else:
+                flags = filtered(*[
+                    func.count(case(
+                        (Game._Game__platforms.op('&')(flag) != 0, 1)))
+                    for flag in PLATFORM_FLAGS.values()]).one()
+                rows = zip(PLATFORM_FLAGS, flags)
+            counts[dimension] = {value: count for value, count in rows
+                                 if count}
+        return counts
+
+    def released_between(self, released_from=None, released_to=None,
+                         offset=0, limit=None,
+                         newest_first=False) -> List[Game]:
+        """
+        Retrieves a page of the games released in a date range, in
+        release date order, as a range scan of the index on the release
+        date ordinals. Games without a release date are left out.
+
+        Args:
+            released_from (date): The earliest release date, inclusive,
+            or None.
+            released_to (date): The latest release date, inclusive, or
+            None.
+            offset (int): The number of games to skip.
+            limit (int): The maximum number of games to return, or None
+            for all games after offset.
+            newest_first (bool): Whether to return the most recent
+            games first.
+
+        Returns:
+            List[Game]: The requested page of games, with ties broken
+            by game ID.
+        """
+        query = (self._session_cm.session.query(Game)
+                 .filter(self.__released_in(released_from, released_to)))
+        query = self.__order_query(query, 'release_date', newest_first)
+        return query.offset(offset).limit(limit).all()
+
+    def count_released_between(self, released_from=None,
+                               released_to=None) -> int:
+        """
+        Counts the games released in a date range with a COUNT over the
+        range of the index on the release date ordinals that
+        released_between reads.
+
+        Args:
+            released_from (date): The earliest release date, inclusive,
+            or None.
+            released_to (date): The latest release date, inclusive, or
+            None.
+
+        Returns:
+            int: The number of games released in the date range. Games
+            without a release date are left out.
+        """
+        return (self._session_cm.session.query(func.count())
+                .select_from(Game)
+                .filter(self.__released_in(released_from, released_to))
+                .scalar())
+
+    @staticmethod
+    def __released_in(released_from, released_to):
+        """
+        Returns:
+            The condition on the release date ordinal of the games
+            released between released_from and released_to, either of
+            which may be None. Games without a release date have ordinal
+            0 and never match.
+        """
+        low = released_from.toordinal() if released_from is not None else 1
+        high = (released_to.toordinal() if released_to is not None
+                else date.max.toordinal())
+        return Game._Game__release_ordinal.between(max(low, 1), high)
+
     def get_genres(self) -> List[Genre]:
         """
         Returns a list of all genres in the repository.
@@ -332,6 +757,33 @@ class SqlAlchemyRepository(AbstractRepository):
             pass
         return publishers
 
+    def get_tags(self) -> List[str]:
+        """
+        Returns:
+            List[str]: The tags of the games in the repository, once per
+            tag ignoring case, in alphabetical order ignoring case.
+        """
+        return sorted(self.get_tag_counts(), key=tag_key)
+
+    def get_tag_counts(self) -> dict:
+        """
+        Counts the games with each tag, with one query grouping the
+        links of game_tags_table by tag.
+
+        Returns:
+            dict: The number of games by tag, most common first and
+            ties in alphabetical order ignoring case. Tags differing
+            only in case are counted as one.
+        """
+        count = func.count(game_tags_table.c.game_id.distinct())
+        rows = self._session_cm.session.execute(
+            select(func.min(tags_table.c.tag_name), count)
+            .join(game_tags_table,
+                  game_tags_table.c.tag_name == tags_table.c.tag_name)
+            .group_by(tags_table.c.tag_key)
+            .order_by(count.desc(), tags_table.c.tag_key))
+        return dict(rows.all())
+
     def get_genre_of_games(self, target_genre) -> List[Game]:
         """
         Args:
@@ -362,7 +814,284 @@ class SqlAlchemyRepository(AbstractRepository):
         """
         with self._session_cm as scm:
             scm.session.merge(game)
+            scm.session.flush()
+            publisher = game.publisher
+            scm.session.execute(
+                games_table.update()
+                .where(games_table.c.id == game.game_id)
+                .values(**search_keys(game.title,
+                                      publisher.publisher_name
+                                      if publisher is not None else None)))
+            self.__index_tags(scm.session, game)
+            self.__index_categories(scm.session, game)
+            self.__index_trigrams(scm.session, game)
+            scm.commit()
+        self.__facet_cache = dict()
+
+    def add_games_bulk(self, games, batch_size: int = BULK_BATCH_SIZE) \
+            -> None:
+        """
+        Add many games, with their publishers, genres, tags, genre, tag
+        and category links and search trigrams, using Core executemany
+        INSERTs and one transaction per batch instead of a merge and a
+        commit per game.
+
+        As with add_game, a game replaces the stored game with the same
+        ID, and the last game with an ID wins. Publishers, genres and
+        tags that are not stored yet are added.
+
+        Args:
+            games: An iterable of the games to be added.
+            batch_size (int): The number of games per transaction.
+        """
+        batch = dict()
+        for game in games:
+            batch[game.game_id] = game
+            if len(batch) >= batch_size:
+                self.__write_batch(list(batch.values()))
+                batch = dict()
+        if batch:
+            self.__write_batch(list(batch.values()))
+
+    def __write_batch(self, games: List[Game]) -> None:
+        """
+        Write a batch of games with distinct IDs in one transaction.
+        """
+        game_ids = [game.game_id for game in games]
+        publisher_names = {game.publisher.publisher_name for game in games
+                           if game.publisher is not None}
+        genre_names = {genre.genre_name for game in games
+                       for genre in game.genres}
+        with self._session_cm as scm:
+            session = scm.session
+            publisher_names -= set(session.execute(
+                select(publishers_table.c.publisher_name).where(
+                    publishers_table.c.publisher_name.in_(publisher_names))
+            ).scalars())
+            genre_names -= set(session.execute(
+                select(genres_table.c.genre_name).where(
+                    genres_table.c.genre_name.in_(genre_names))).scalars())
+            if publisher_names:
+                session.execute(publishers_table.insert(),
+                                [{'publisher_name': name}
+                                 for name in sorted(publisher_names)])
+            if genre_names:
+                session.execute(genres_table.insert(),
+                                [{'genre_name': name}
+                                 for name in sorted(genre_names)])
+            self.__add_tags(session, {tag for game in games
+                                      for tag in game.tags})
+            for table, column in ((game_genres_table, 'game_id'),
+                                  (game_tags_table, 'game_id'),
+                                  (game_categories_table, 'game_id'),
+                                  (search_trigrams_table, 'game_id'),
+                                  (games_table, 'id')):
+                session.execute(table.delete().where(
+                    table.c[column].in_(game_ids)))
+            session.execute(games_table.insert(),
+                            [self.__game_row(game) for game in games])
+            genre_rows = [{'game_id': game.game_id,
+                           'genre_name': genre.genre_name}
+                          for game in games for genre in game.genres]
+            if genre_rows:
+                session.execute(game_genres_table.insert(), genre_rows)
+            tag_rows = [{'game_id': game.game_id, 'tag_name': tag}
+                        for game in games for tag in game.tags]
+            if tag_rows:
+                session.execute(game_tags_table.insert(), tag_rows)
+            category_rows = [row for game in games
+                             for row in self.__category_rows(game)]
+            if category_rows:
+                session.execute(game_categories_table.insert(),
+                                category_rows)
+            trigram_rows = [row for game in games
+                            for row in self.__trigram_rows(game)]
+            if trigram_rows:
+                session.execute(search_trigrams_table.insert(),
+                                trigram_rows)
+            scm.commit()
+        self.__facet_cache = dict()
+
+    @staticmethod
+    def __game_row(game: Game) -> dict:
+        """
+        Returns:
+            dict: The games_table row of a game, with the values the
+            ORM mapping would write.
+        """
+        publisher = game.publisher
+        return {'id': game.game_id,
+                'game_title': game.title,
+                'price': game.price,
+                'release_date': game.release_date,
+                'release_ordinal': game.release_date_ordinal,
+                'description': game.description,
+                'publisher': (publisher.publisher_name
+                              if publisher is not None else None),
+                'image_url': game.image_url,
+                'website_url': game.website_url,
+                'video_url': game.video_url,
+                'platforms': game.platforms,
+                **search_keys(game.title, publisher.publisher_name
+                              if publisher is not None else None)}
+
+    @staticmethod
+    def __add_tags(session, tags) -> None:
+        """
+        Add the tags that are not stored yet to tags_table.
+
+        Args:
+            session: The session of the current transaction.
+            tags: An iterable of tag names.
+        """
+        tags = set(tags)
+        if not tags:
+            return
+        tags -= set(session.execute(
+            select(tags_table.c.tag_name).where(
+                tags_table.c.tag_name.in_(tags))).scalars())
+        if tags:
+            session.execute(tags_table.insert(),
+                            [{'tag_name': tag, 'tag_key': tag_key(tag)}
+                             for tag in sorted(tags)])
+
+    def __index_tags(self, session, game: Game) -> None:
+        """
+        Replace the rows of game_tags_table of a game by links to its
+        tags, adding the tags that are not stored yet.
+        """
+        session.execute(game_tags_table.delete().where(
+            game_tags_table.c.game_id == game.game_id))
+        self.__add_tags(session, game.tags)
+        if game.tags:
+            session.execute(game_tags_table.insert(),
+                            [{'game_id': game.game_id, 'tag_name': tag}
+                             for tag in game.tags])
+
+    @staticmethod
+    def __category_rows(game: Game) -> List[dict]:
+        """
+        Returns:
+            List[dict]: The game_categories_table rows of a game, one
+            per category.
+        """
+        return [{'game_id': game.game_id, 'category_name': category,
+                 'category_key': category_key(category)}
+                for category in game.categories]
+
+    def __index_categories(self, session, game: Game) -> None:
+        """
+        Replace the rows of game_categories_table of a game by links to
+        its categories.
+        """
+        session.execute(game_categories_table.delete().where(
+            game_categories_table.c.game_id == game.game_id))
+        rows = self.__category_rows(game)
+        if rows:
+            session.execute(game_categories_table.insert(), rows)
+
+    @staticmethod
+    def __trigram_rows(game: Game) -> List[dict]:
+        """
+        Returns:
+            List[dict]: The search_trigrams_table rows of a game, for
+            the trigrams of its folded title and publisher name.
+        """
+        publisher = game.publisher
+        return search_trigram_rows(
+            game.game_id, game.title,
+            publisher.publisher_name if publisher is not None else None)
+
+    def __index_trigrams(self, session, game: Game) -> None:
+        """
+        Replace the rows of search_trigrams_table of a game by the
+        trigrams of its folded title and publisher name.
+        """
+        session.execute(search_trigrams_table.delete().where(
+            search_trigrams_table.c.game_id == game.game_id))
+        rows = self.__trigram_rows(game)
+        if rows:
+            session.execute(search_trigrams_table.insert(), rows)
+
+    def update_game(self, game: Game) -> None:
+        """
+        Replace the catalog data of the stored game with the same ID by
+        that of game. The game row is updated in place and only its
+        genre, tag and category links are rewritten, so reviews and
+        wishlist entries pointing at it are kept. A game with a new ID
+        is added instead.
+
+        Args:
+            game (Game): The game holding the new catalog data.
+        """
+        if self.get_games_by_id(game.game_id) is None:
+            self.add_game(game)
+            return
+        if game.publisher is not None:
+            self.add_publisher(Publisher(game.publisher.publisher_name))
+        for genre in game.genres:
+            self.add_genre(Genre(genre.genre_name))
+        publisher = game.publisher
+        with self._session_cm as scm:
+            scm.session.execute(
+                games_table.update()
+                .where(games_table.c.id == game.game_id)
+                .values(game_title=game.title,
+                        price=game.price,
+                        release_date=game.release_date,
+                        release_ordinal=game.release_date_ordinal,
+                        description=game.description,
+                        publisher=(publisher.publisher_name
+                                   if publisher is not None else None),
+                        image_url=game.image_url,
+                        website_url=game.website_url,
+                        video_url=game.video_url,
+                        platforms=game.platforms,
+                        **search_keys(game.title,
+                                      publisher.publisher_name
+                                      if publisher is not None else None)))
+            scm.session.execute(
+                game_genres_table.delete()
+                .where(game_genres_table.c.game_id == game.game_id))
+            if game.genres:
+                scm.session.execute(
+                    game_genres_table.insert(),
+                    [{'game_id': game.game_id, 'genre_name': genre.genre_name}
+                     for genre in game.genres])
+            self.__index_tags(scm.session, game)
+            self.__index_categories(scm.session, game)
+            self.__index_trigrams(scm.session, game)
+            scm.commit()
+        self.__facet_cache = dict()
+
+    def remove_game(self, game_id: int) -> None:
+        """
+        Remove a game and its genre, tag and category links from the
+        catalog. Reviews and wishlist entries pointing at the game are
+        kept, and show it again if a game with the same ID is added
+        back.
+
+        Args:
+            game_id (int): The ID of the game to remove.
+        """
+        with self._session_cm as scm:
+            scm.session.execute(
+                game_genres_table.delete()
+                .where(game_genres_table.c.game_id == game_id))
+            scm.session.execute(
+                game_tags_table.delete()
+                .where(game_tags_table.c.game_id == game_id))
+            scm.session.execute(
+                game_categories_table.delete()
+                .where(game_categories_table.c.game_id == game_id))
+            scm.session.execute(
+                search_trigrams_table.delete()
+                .where(search_trigrams_table.c.game_id == game_id))
+            scm.session.execute(
+                games_table.delete()
+                .where(games_table.c.id == game_id))
             scm.commit()
+        self.__facet_cache = dict()
 
     def get_games(self) -> List[Game]:
         """
@@ -423,6 +1152,26 @@ class SqlAlchemyRepository(AbstractRepository):
             pass
         return game
 
+    def get_games_by_ids(self, game_ids) -> List[Game]:
+        """
+        Retrieves several games in a single query.
+
+        Args:
+            game_ids: An iterable of IDs of the games to retrieve.
+
+        Returns:
+            List[Game]: The games with the specified IDs, in the order
+            the IDs were given. IDs with no matching game are skipped.
+        """
+        game_ids = list(game_ids)
+        if not game_ids:
+            return []
+        games = (self._session_cm.session.query(Game)
+                 .filter(Game._Game__game_id.in_(game_ids)).all())
+        games_by_id = {game.game_id: game for game in games}
+        return [games_by_id[game_id] for game_id in game_ids
+                if game_id in games_by_id]
+
     def get_similar_games(self, genres_list):
         """
         Retrieves a list of similar games based on the provided genres.
@@ -449,26 +1198,22 @@ class SqlAlchemyRepository(AbstractRepository):
 
     def search_games_by_title(self, game_title: str) -> List[Game]:
         """
-        Searches for games by title.
+        Searches for games by title, matching titles that contain
+        game_title ignoring case, as the memory repository does (see
+        __substring_search).
 
         Args:
             game_title: The title of the game to search for.
 
         Returns:
-            A list of Game objects that match the given title.
+            A list of Game objects that match the given title, in game
+            ID order.
         """
-        game_title = game_title.lower()
-        games = None
-        try:
-            games = (self._session_cm.session.query(Game)
-                     .filter(
-                func.lower(Game._Game__game_title).contains(game_title)).all())
-        except NoResultFound:
-            pass
-        return games
+        return self.__substring_search(game_title, 'title')
 
     def search_games_by_publisher(self, query: str) -> List[Game]:
-        """Searches for games by publisher name.
+        """Searches for games by publisher name, matching the names that
+        contain query ignoring case, as in search_games_by_title.
 
         Args:
             query(str): The query string to search for games by
@@ -478,44 +1223,169 @@ class SqlAlchemyRepository(AbstractRepository):
             List[Game]: A list of Game objects matching the query.
 
         """
+        return self.__substring_search(query, 'publisher')
+
+    def __substring_search(self, query: str, field: str) -> List[Game]:
+        """
+        The search_trigrams_table narrows the games down to those whose
+        field has every trigram of the folded query, and their texts
+        are then checked with the `query.lower() in text.lower()` test
+        of the TrigramIndex of the memory repository. Queries too short
+        to have a trigram check every game.
+
+        Args:
+            query (str): The substring to search for.
+            field (str): 'title' or 'publisher'.
+
+        Returns:
+            List[Game]: The games whose field contains query, ignoring
+            case, in game ID order.
+        """
         query = query.lower()
-        games = None
-        try:
-            games = (self._session_cm.session.query(Game)
-                     .join(Publisher)
-                     .filter(
-                func.lower(Publisher._Publisher__publisher_name).contains(
-                    query)).all())
-        except NoResultFound:
-            pass
-        return games
+        column = (games_table.c.game_title if field == 'title'
+                  else games_table.c.publisher)
+        statement = select(games_table.c.id, column)
+        query_trigrams = trigrams(fold_text(query))
+        if query_trigrams:
+            trigram = search_trigrams_table.c
+            statement = statement.where(games_table.c.id.in_(
+                select(trigram.game_id)
+                .where(trigram.field == field,
+                       trigram.trigram.in_(query_trigrams))
+                .group_by(trigram.game_id)
+                .having(func.count() == len(query_trigrams))))
+        rows = self._session_cm.session.execute(
+            statement.order_by(games_table.c.id))
+        return self.get_games_by_ids([game_id for game_id, text in rows
+                                      if query in (text or '').lower()])
+
+    def search_games_full_text(self, query: str,
+                               limit: int = None) -> List[Game]:
+        """
+        Searches the titles, publisher names and descriptions of the
+        games in the SQLite FTS5 index.
+
+        Args:
+            query (str): The words to search for. Every word must start
+            a word of the game.
+            limit (int): The most games to return, or None for all
+            matches.
+
+        Returns:
+            List[Game]: The matching games, best BM25 score first, with
+            matches weighted by FULL_TEXT_WEIGHTS.
+        """
+        return self.__full_text_search(query, FULL_TEXT_FIELDS, limit)
+
+    def __full_text_search(self, query: str, fields,
+                           limit: int = None) -> List[Game]:
+        """
+        Args:
+            query (str): The words to search for, see full_text_terms.
+            fields: The FULL_TEXT_FIELDS to search.
+            limit (int): The most games to return, or None for all.
+
+        Returns:
+            List[Game]: The games with a word starting with every word
+            of the query in the fields, by BM25 score.
+        """
+        terms = full_text_terms(query)
+        if not terms:
+            return []
+        # The terms are words, so quoting them is enough to keep FTS5
+        # operators out of the query; * makes them prefix queries.
+        columns = ' '.join(FULL_TEXT_COLUMNS[field] for field in fields)
+        match = '{%s} : (%s)' % (
+            columns, ' '.join(f'"{term}"*' for term in terms))
+        weights = ', '.join(str(weight) for weight in FULL_TEXT_WEIGHTS)
+        game_ids = self._session_cm.session.execute(
+            text(f'SELECT rowid FROM {FULL_TEXT_TABLE} '
+                 f'WHERE {FULL_TEXT_TABLE} MATCH :match '
+                 f'ORDER BY bm25({FULL_TEXT_TABLE}, {weights}), rowid '
+                 'LIMIT :limit'),
+            {'match': match, 'limit': -1 if limit is None else limit}
+        ).scalars().all()
+        return self.get_games_by_ids(game_ids)
+
+    def search_games_fuzzy(self, query: str, limit: int = None) -> List[Game]:
+        """
+        Searches for games by title and publisher, tolerating typos and
+        spelling variants.
+
+        The search_trigrams table is grouped by game to find the
+        FUZZY_CANDIDATES titles and publisher names sharing the most
+        trigrams with the query, and at least a FUZZY_THRESHOLD share of
+        them. The candidates are then ranked with fuzzy_score, as in
+        the memory repository.
+
+        Args:
+            query (str): The title or publisher name to search for.
+            limit (int): The most games to return, or None for all
+            matches.
+
+        Returns:
+            List[Game]: The games whose title or publisher is similar
+            to query, most similar first.
+        """
+        query_trigrams = trigrams(fold_text(query))
+        if not query_trigrams:
+            return []
+        needed = math.ceil(FUZZY_THRESHOLD * len(query_trigrams))
+        shared = func.count()
+        candidates = self._session_cm.session.execute(
+            select(search_trigrams_table.c.game_id,
+                   search_trigrams_table.c.field)
+            .where(search_trigrams_table.c.trigram.in_(query_trigrams))
+            .group_by(search_trigrams_table.c.game_id,
+                      search_trigrams_table.c.field)
+            .having(shared >= needed)
+            .order_by(shared.desc(), search_trigrams_table.c.game_id)
+            .limit(FUZZY_CANDIDATES)).all()
+        games = {game.game_id: game for game in self.get_games_by_ids(
+            {game_id for game_id, _ in candidates})}
+        scores = dict()
+        for game_id, field in candidates:
+            game = games.get(game_id)
+            if game is None:
+                continue
+            if field == 'title':
+                text = game.title
+            else:
+                text = (game.publisher.publisher_name
+                        if game.publisher is not None else None)
+            score = fuzzy_score(query_trigrams, text)
+            if score > scores.get(game_id, 0):
+                scores[game_id] = score
+        ranked = sorted(scores, key=lambda game_id: (-scores[game_id],
+                                                     game_id))
+        return [games[game_id] for game_id in ranked[:limit]]
 
     def search_games_by_category(self, query: str) -> List[Game]:
         """
         Searches for games by category in the SqlAlchemy database.
+        Categories are matched case insensitively, as by the memory
+        repository, and may be combined with AND, OR and NOT.
 
         Args:
-            query (str): The category to search for.
+            query (str): The category query to search for.
 
         Returns:
             List[Game]: A list of games that match the specified
-            category.
+            category query.
+
+        Raises:
+            TagQueryException: If the category query is malformed.
         """
-        query = query.lower()
-        games = None
-        try:
-            games = (self._session_cm.session.query(Game)
-                     .join(Game._Game__genres)
-                     .join(Genre)
-                     .filter(
-                func.lower(Genre._Genre__genre_name).contains(query)).all())
-        except NoResultFound:
-            pass
-        return games
+        game_ids = evaluate_tag_query(query, self.__category_postings,
+                                      self.__all_game_ids)
+        return self.get_games_by_ids(game_ids)
 
     def search_games_by_tags(self, query: str) -> List[Game]:
         """
-        Searches for games in the repository based on tags.
+        Searches for games in the repository based on tags. Tags may be
+        combined with AND, OR and NOT, e.g. "Roguelike AND Co-op NOT
+        Early Access". A tag matches the tags equal to it ignoring case,
+        so "Action" does not match "Action RPG".
 
         Args:
             query (str): The query string for searching games by tags.
@@ -523,16 +1393,132 @@ class SqlAlchemyRepository(AbstractRepository):
         Returns:
             List[Game]: A list of Game objects matching the given query.
             If no games are found, an empty list is returned.
+
+        Raises:
+            TagQueryException: If the tag query is malformed.
         """
-        query = query.lower()
-        games = None
-        try:
-            games = (self._session_cm.session.query(Game)
-                     .filter(
-                func.lower(Game._Game__tags_string).contains(query)).all())
-        except NoResultFound:
-            pass
-        return games
+        game_ids = evaluate_tag_query(query, self.__tag_postings,
+                                      self.__all_game_ids)
+        return self.get_games_by_ids(game_ids)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """
+        Autocomplete a search with the titles, publishers and tags that
+        start with a prefix, ignoring case.
+
+        Args:
+            prefix (str): The text typed so far.
+            limit (int): The most suggestions to return.
+
+        Returns:
+            List[Suggestion]: The matching suggestions, most popular
+            first: titles by their number of reviews, publishers and
+            tags by their number of games.
+        """
+        prefix = fold_text(prefix).lstrip()
+        if not prefix or limit <= 0:
+            return []
+        session = self._session_cm.session
+        # A correlated count rather than a grouped join, so the titles
+        # are found through their index.
+        review_count = (select(func.count())
+                        .where(reviews_table.c.game == games_table.c.id)
+                        .scalar_subquery())
+        titles = (session.query(Game._Game__game_id, Game._Game__game_title,
+                                review_count)
+                  .filter(*self.__starts_with(games_table.c.title_key,
+                                              prefix))
+                  .order_by(review_count.desc(), games_table.c.title_key,
+                            Game._Game__game_id)
+                  .limit(limit))
+        game_count = func.count(Game._Game__game_id)
+        publishers = (session.query(Game._Game__publisher_id, game_count)
+                      .filter(*self.__starts_with(
+                          games_table.c.publisher_key, prefix))
+                      .group_by(Game._Game__publisher_id)
+                      .order_by(game_count.desc(),
+                                func.min(games_table.c.publisher_key))
+                      .limit(limit))
+        tag_count = func.count(game_tags_table.c.game_id.distinct())
+        tags = session.execute(
+            select(func.min(tags_table.c.tag_name), tag_count)
+            .join(game_tags_table,
+                  game_tags_table.c.tag_name == tags_table.c.tag_name)
+            .where(*self.__starts_with(tags_table.c.tag_key, prefix))
+            .group_by(tags_table.c.tag_key)
+            .order_by(tag_count.desc(), tags_table.c.tag_key)
+            .limit(limit))
+        suggestions = [Suggestion(title, 'title', game_id, count)
+                       for game_id, title, count in titles]
+        suggestions += [Suggestion(name, 'publisher', None, count)
+                        for name, count in publishers]
+        suggestions += [Suggestion(name, 'tag', None, count)
+                        for name, count in tags]
+        suggestions.sort(key=lambda suggestion: (
+            -suggestion.popularity, fold_text(suggestion.text),
+            SUGGESTION_KINDS.index(suggestion.kind)))
+        return suggestions[:limit]
+
+    @staticmethod
+    def __starts_with(key, prefix: str) -> tuple:
+        """
+        Args:
+            key: An indexed column of folded text, such as title_key.
+            prefix (str): A folded prefix.
+
+        Returns:
+            tuple: The conditions matching the values of key that start
+            with prefix, as a range of the index rather than a LIKE
+            pattern, which the index cannot serve.
+        """
+        last = ord(prefix[-1])
+        if last == 0x10FFFF:
+            return key >= prefix,
+        return key >= prefix, key < prefix[:-1] + chr(last + 1)
+
+    def __category_postings(self, category: str) -> List[int]:
+        """
+        Args:
+            category (str): A single category of a category query.
+
+        Returns:
+            List[int]: The sorted IDs of the games in the category,
+            matched exactly but ignoring case, through the index of
+            game_categories_table on the category_key.
+        """
+        rows = self._session_cm.session.execute(
+            select(game_categories_table.c.game_id).distinct()
+            .where(game_categories_table.c.category_key
+                   == category_key(category))
+            .order_by(game_categories_table.c.game_id))
+        return list(rows.scalars())
+
+    def __tag_postings(self, tag: str) -> List[int]:
+        """
+        Args:
+            tag (str): A single tag of a tag query.
+
+        Returns:
+            List[int]: The sorted IDs of the games with the tag, matched
+            exactly but ignoring case, through the indexes of tags_table
+            and game_tags_table.
+        """
+        rows = self._session_cm.session.execute(
+            select(game_tags_table.c.game_id).distinct()
+            .join(tags_table,
+                  tags_table.c.tag_name == game_tags_table.c.tag_name)
+            .where(tags_table.c.tag_key == tag_key(tag))
+            .order_by(game_tags_table.c.game_id))
+        return list(rows.scalars())
+
+    def __all_game_ids(self) -> List[int]:
+        """
+        Returns:
+            List[int]: The sorted IDs of every game in the repository.
+        """
+        rows = (self._session_cm.session.query(Game._Game__game_id)
+                .order_by(Game._Game__game_id).all())
+        return [row[0] for row in rows]
 
     def add_wish_game(self, user, game):
         """
@@ -546,8 +1532,7 @@ class SqlAlchemyRepository(AbstractRepository):
         with self._session_cm as scm:
             try:
                 user_ = scm.session.query(User).filter(
-                    func.lower(User._User__username) == func.lower(
-                        user.username)).first()
+                    self.__username_is(user.username)).first()
                 game_ = scm.session.query(Game).filter(
                     Game._Game__game_id == game.game_id).first()
                 if user_ and game_:
@@ -576,8 +1561,7 @@ class SqlAlchemyRepository(AbstractRepository):
         with self._session_cm as scm:
             try:
                 user_ = scm.session.query(User).filter(
-                    func.lower(User._User__username) == func.lower(
-                        user.username)).first()
+                    self.__username_is(user.username)).first()
                 game_ = scm.session.query(Game).filter(
                     Game._Game__game_id == game.game_id).first()
                 if user_ and game_:
@@ -609,8 +1593,7 @@ class SqlAlchemyRepository(AbstractRepository):
         with self._session_cm as scm:
             try:
                 user_ = scm.session.query(User).filter(
-                    func.lower(User._User__username) == func.lower(
-                        user.username)).first()
+                    self.__username_is(user.username)).first()
 
                 if user_:
                     wishlist_games = user_._User__wishlist._Wishlist__games
@@ -640,8 +1623,7 @@ class SqlAlchemyRepository(AbstractRepository):
         with self._session_cm as scm:
             try:
                 user_ = scm.session.query(User).filter(
-                    func.lower(User._User__username) == func.lower(
-                        user.username)).first()
+                    self.__username_is(user.username)).first()
                 game_ = scm.session.query(Game).filter(
                     Game._Game__game_id == game.game_id).first()
 
@@ -688,8 +1670,7 @@ class SqlAlchemyRepository(AbstractRepository):
         with self._session_cm as scm:
 
             user = scm.session.query(User).filter(
-                func.lower(User._User__username) == func.lower(
-                    user.username)).first()
+                self.__username_is(user.username)).first()
 
             if user:
                 user_with_reviews = scm.session.query(User).options(
@@ -1,7 +1,10 @@
-import csv
+import logging
 import os
 
-from games.domainmodel.model import Genre, Game, Publisher
+from games.adapters.datareader.ingestion import read_game_chunks
+from games.adapters.interning import InternRegistry
+
+logger = logging.getLogger(__name__)
 
 
 class GameFileCSVReader:
@@ -15,72 +18,27 @@ class GameFileCSVReader:
         self.__dataset_of_languages = set()
         self.__dataset_of_categories = set()
 
-    def read_csv_file(self):
+    def read_csv_file(self, rejects=None):
+        """
+        Read the games of the CSV file into the datasets of the reader.
+
+        Args:
+            rejects: Called with a RejectedRow for every row that cannot
+            be parsed. Defaults to logging the row.
+        """
         if not os.path.exists(self.__filename):
-            print(f"path {self.__filename} does not exist!")
+            logger.warning("path %s does not exist!", self.__filename)
             return
-        with open(self.__filename, 'r', encoding='utf-8-sig') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                try:
-                    game_id = int(row["AppID"])
-                    title = row["Name"]
-                    game = Game(game_id, title)
-                    game.release_date = row["Release date"]
-                    game.price = float(row["Price"])
-                    game.description = row["About the game"]
-                    game.image_url = row["Header image"]
-                    if len(row["Movies"]) > 0:
-                        game.video_url = row["Movies"]
-
-                    publisher = Publisher(row["Publishers"])
-                    self.__dataset_of_publishers.add(publisher)
-                    game.publisher = publisher
-
-                    genre_names = row["Genres"].split(",")
-                    for genre_name in genre_names:
-                        genre = Genre(genre_name.strip())
-                        self.__dataset_of_genres.add(genre)
-                        game.add_genre(genre)
-
-                    languages = row["Supported languages"].split(",")
-                    for language in languages:
-                        new_language = language.strip().strip("[]'")
-                        self.__dataset_of_languages.add(new_language)
-                        game.add_language(new_language)
-
-                    if row["Windows"].lower() == "true":
-                        game.system_dict["windows"] = True
-                    else:
-                        game.system_dict["windows"] = False
-
-                    if row["Mac"].lower() == "true":
-                        game.system_dict["mac"] = True
-                    else:
-                        game.system_dict["mac"] = False
-
-                    if row["Linux"].lower() == "true":
-                        game.system_dict["linux"] = True
-                    else:
-                        game.system_dict["linux"] = False
-
-                    categories = row["Categories"].split(",")
-                    for category in categories:
-                        game.add_category(category.strip())
-                        self.__dataset_of_categories.add(category.strip())
-
-                    tags = row["Tags"].split(",")
-                    for tag in tags:
-                        game.add_tag(tag.strip())
-                        self.__dataset_of_tags.add(tag.strip())
-
-                    self.__dataset_of_games.append(game)
-
-
-                except ValueError as e:
-                    print(f"Skipping row due to invalid data: {e}")
-                except KeyError as e:
-                    print(f"Skipping row due to missing key: {e}")
+        registry = InternRegistry()
+        for games in read_game_chunks(self.__filename, rejects=rejects,
+                                      registry=registry):
+            for game in games:
+                self.__dataset_of_publishers.add(game.publisher)
+                self.__dataset_of_genres.update(game.genres)
+                self.__dataset_of_languages.update(game.languages)
+                self.__dataset_of_categories.update(game.categories)
+                self.__dataset_of_tags.update(game.tags)
+            self.__dataset_of_games.extend(games)
 
     def get_unique_games_count(self):
         return len(self.__dataset_of_games)
@@ -0,0 +1,374 @@
+import csv
+import logging
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, NamedTuple
+
+from games.adapters.interning import InternRegistry
+from games.adapters.snapshot import save_snapshot
+from games.domainmodel.model import (PLATFORM_FLAGS, RELEASE_DATE_FORMAT,
+                                     Genre, Game, Publisher)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# The columns of the games CSV file read by parse_game_row.
+GAME_COLUMNS = ("AppID", "Name", "Release date", "Price", "About the game",
+                "Supported languages", "Header image", "Movies",
+                "Publishers", "Genres", "Windows", "Mac", "Linux",
+                "Categories", "Tags")
+
+
+class RejectedRow(NamedTuple):
+    """
+    A CSV row that could not be turned into a game.
+
+    Attributes:
+        line_number (int): The line of the CSV file the row ends on.
+        row (dict): The row as read by csv.DictReader.
+        reason (str): Why the row was rejected.
+    """
+    line_number: int
+    row: dict
+    reason: str
+
+
+def log_rejected_row(rejected: RejectedRow) -> None:
+    """
+    The default reject stream: log the rejected row as a warning.
+
+    Args:
+        rejected (RejectedRow): The rejected row.
+    """
+    logger.warning('Skipping row on line %d: %s', rejected.line_number,
+                   rejected.reason)
+
+
+def interning_functions(registry: InternRegistry = None) -> tuple:
+    """
+    Args:
+        registry (InternRegistry): A registry, or None.
+
+    Returns:
+        tuple: The functions that make a publisher, a genre and a
+        string from a name: those of the registry, or functions that
+        make new objects if registry is None.
+    """
+    if registry is None:
+        return Publisher, Genre, str
+    return registry.publisher, registry.genre, registry.string
+
+
+@lru_cache(maxsize=4096)
+def check_release_date(release_date: str) -> int:
+    """
+    Validate a release date like the Game.release_date setter does.
+    Release dates repeat a lot across a catalog, so each distinct date
+    is only parsed once.
+
+    Args:
+        release_date (str): A release date read from the file.
+
+    Returns:
+        int: The ordinal of release_date, see Game.release_date_ordinal.
+
+    Raises:
+        ValueError: If release_date is not in RELEASE_DATE_FORMAT.
+    """
+    if not release_date.strip():
+        raise ValueError("Date must be in format: %b %d, %Y")
+    try:
+        return datetime.strptime(release_date,
+                                 RELEASE_DATE_FORMAT).toordinal()
+    except ValueError:
+        raise ValueError("Invalid release date format. Use '%b %d, %Y'")
+
+
+def missing_columns(fieldnames) -> List[str]:
+    """
+    The schema check of the games CSV file, run once per file before
+    its rows are parsed.
+
+    Args:
+        fieldnames: The column names of the file.
+
+    Returns:
+        List[str]: The columns parse_game_row needs that the file lacks.
+    """
+    fieldnames = set(fieldnames or ())
+    return [column for column in GAME_COLUMNS if column not in fieldnames]
+
+
+def parse_game_row(row: dict, registry: InternRegistry = None) -> Game:
+    """
+    Build a game from a row of the games CSV file.
+
+    Every field is validated here, once, and the game is built with
+    Game.from_record, so the setters do not check the values again.
+
+    Args:
+        row (dict): A row as read by csv.DictReader.
+        registry (InternRegistry): If given, the game gets the shared
+        publisher, genres, languages, categories and tags of the
+        registry instead of new objects of its own.
+
+    Returns:
+        Game: The game described by the row, with its publisher, genres,
+        languages, platforms, categories and tags.
+
+    Raises:
+        ValueError: If a field holds invalid data.
+        KeyError: If a column is missing.
+    """
+    game_id = int(row["AppID"])
+    title = row["Name"].strip() or None
+    release_date = row["Release date"]
+    release_ordinal = check_release_date(release_date)
+    price = float(row["Price"])
+    if not price >= 0:
+        raise ValueError("Price must be a non-negative value.")
+    description = row["About the game"].strip() or None
+    image_url = row["Header image"].strip() or None
+    video_url = row["Movies"].strip() or None
+
+    publisher, genre, string = interning_functions(registry)
+    genres = list(dict.fromkeys(
+        genre(genre_name) for genre_name in row["Genres"].split(",")))
+    languages = [string(language) for language in (
+        language.strip().strip("[]'")
+        for language in row["Supported languages"].split(","))
+        if language.strip()]
+    platforms = 0
+    for flag, column in ((PLATFORM_FLAGS["windows"], "Windows"),
+                         (PLATFORM_FLAGS["mac"], "Mac"),
+                         (PLATFORM_FLAGS["linux"], "Linux")):
+        if row[column].lower() == "true":
+            platforms |= flag
+    categories = {string(category) for category in (
+        category.strip() for category in row["Categories"].split(","))
+        if category}
+    tags = {string(tag) for tag in (
+        tag.strip() for tag in row["Tags"].split(",")) if tag}
+    return Game.from_record(game_id, title, release_date, release_ordinal,
+                            price, description, image_url, video_url,
+                            publisher(row["Publishers"]), genres, languages,
+                            platforms, categories, tags)
+
+
+def game_to_record(game: Game) -> tuple:
+    """
+    Flatten a game into a tuple of plain values, which pickles far
+    faster than the game itself. game_from_record reverses it.
+
+    Args:
+        game (Game): A game built by parse_game_row.
+
+    Returns:
+        tuple: The fields of the game.
+    """
+    return (game.game_id, game.title, game.release_date,
+            game.release_date_ordinal, game.price,
+            game.description, game.image_url, game.video_url,
+            game.publisher.publisher_name,
+            tuple(genre.genre_name for genre in game.genres),
+            tuple(game.languages), game.platforms, tuple(game.categories),
+            tuple(game.tags))
+
+
+def game_from_record(record: tuple, registry: InternRegistry = None) \
+        -> Game:
+    """
+    Args:
+        record (tuple): A record made by game_to_record.
+        registry (InternRegistry): The registry to share values through,
+        as in parse_game_row.
+
+    Returns:
+        Game: A game equal in every field to the one the record was
+        made from.
+    """
+    (game_id, title, release_date, release_ordinal, price, description,
+     image_url, video_url, publisher_name, genre_names, languages,
+     platforms, categories, tags) = record
+    # The record was validated by parse_game_row when it was made.
+    publisher, genre, string = interning_functions(registry)
+    return Game.from_record(
+        game_id, title, release_date, release_ordinal, price, description,
+        image_url, video_url, publisher(publisher_name),
+        [genre(genre_name) for genre_name in genre_names],
+        [string(language) for language in languages], platforms,
+        {string(category) for category in categories},
+        {string(tag) for tag in tags})
+
+
+def read_game_chunks(filename, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     rejects: Callable[[RejectedRow], None] = None,
+                     registry: InternRegistry = None) \
+        -> Iterator[List[Game]]:
+    """
+    Stream the games of a CSV file in chunks.
+
+    The file is read row by row, so at most one chunk of games is held
+    by the reader at any time, whatever the size of the file.
+
+    Args:
+        filename: The path of the games CSV file.
+        chunk_size (int): The maximum number of games per chunk.
+        rejects: Called with a RejectedRow for every row that cannot
+        be parsed. Defaults to log_rejected_row.
+        registry (InternRegistry): The registry to share values through,
+        see parse_game_row. It keeps every distinct value alive, so
+        leave it out when the games are not kept in memory.
+
+    Yields:
+        List[Game]: The next chunk of games, in file order.
+    """
+    if rejects is None:
+        rejects = log_rejected_row
+    chunk = []
+    with open(filename, 'r', encoding='utf-8-sig') as file:
+        reader = csv.DictReader(file)
+        missing = missing_columns(reader.fieldnames)
+        for row in reader:
+            if missing:
+                rejects(RejectedRow(reader.line_num, row,
+                                    f'missing key: {missing[0]!r}'))
+                continue
+            try:
+                chunk.append(parse_game_row(row, registry))
+            except ValueError as e:
+                rejects(RejectedRow(reader.line_num, row,
+                                    f'invalid data: {e}'))
+                continue
+            except KeyError as e:
+                rejects(RejectedRow(reader.line_num, row,
+                                    f'missing key: {e}'))
+                continue
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+class RepositorySink:
+    """
+    A sink that writes every chunk to a repository as it arrives, so
+    games do not pile up in memory. Suited to the SQL repository, whose
+    add_games_bulk also adds the publishers and genres of the games.
+    """
+
+    def __init__(self, repo):
+        self._repo = repo
+
+    def write(self, games: List[Game]) -> None:
+        """
+        Args:
+            games (List[Game]): The chunk of games to write.
+        """
+        self._repo.add_games_bulk(games)
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryRepositorySink(RepositorySink):
+    """
+    A sink that collects the games and adds them to a memory repository
+    in a single add_games_bulk call once the stream ends, so the
+    repository indexes are built once rather than once per chunk.
+    """
+
+    def __init__(self, repo):
+        super().__init__(repo)
+        self.__games = []
+
+    def write(self, games: List[Game]) -> None:
+        for game in games:
+            self._repo.add_publisher(game.publisher)
+            for genre in game.genres:
+                self._repo.add_genre(genre)
+        self.__games.extend(games)
+
+    def close(self) -> None:
+        self._repo.add_games_bulk(self.__games)
+        self.__games = []
+
+
+class SnapshotSink:
+    """
+    A sink that saves a binary snapshot of a memory repository once the
+    stream ends. Place it after the sink that loads the repository.
+    """
+
+    def __init__(self, repo, snapshot_path, checksum: str):
+        self.__repo = repo
+        self.__snapshot_path = snapshot_path
+        self.__checksum = checksum
+
+    def write(self, games: List[Game]) -> None:
+        pass
+
+    def close(self) -> None:
+        save_snapshot(self.__repo, self.__snapshot_path, self.__checksum)
+
+
+class ProgressSink:
+    """
+    A sink that reports how many games have been ingested and at what
+    rate, every interval games and once the stream ends.
+    """
+
+    def __init__(self, report: Callable[[str], None] = None,
+                 interval: int = 10_000):
+        """
+        Args:
+            report: Called with every progress line. Defaults to
+            logging the line.
+            interval (int): The number of games between two reports.
+        """
+        self.__report = report if report is not None else logger.info
+        self.__interval = interval
+        self.__count = 0
+        self.__next_report = interval
+        self.__started = time.perf_counter()
+
+    def __line(self) -> str:
+        elapsed = time.perf_counter() - self.__started
+        rate = self.__count / elapsed if elapsed > 0 else 0
+        return f'{self.__count} games in {elapsed:.1f} s ' \
+               f'({rate:.0f} games/s)'
+
+    def write(self, games: List[Game]) -> None:
+        self.__count += len(games)
+        if self.__count >= self.__next_report:
+            self.__report(self.__line())
+            self.__next_report = \
+                (self.__count // self.__interval + 1) * self.__interval
+
+    def close(self) -> None:
+        self.__report(self.__line())
+
+
+def ingest(chunks: Iterable[List[Game]], sinks) -> int:
+    """
+    Feed a stream of game chunks to every sink, in order, then close
+    the sinks.
+
+    Args:
+        chunks: The chunks of games, e.g. from read_game_chunks.
+        sinks: Objects with write(games) and close() methods.
+
+    Returns:
+        int: The number of games ingested.
+    """
+    count = 0
+    for games in chunks:
+        for sink in sinks:
+            sink.write(games)
+        count += len(games)
+    for sink in sinks:
+        sink.close()
+    return count
@@ -0,0 +1,196 @@
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Tuple
+
+from games.adapters.interning import InternRegistry
+from games.adapters.datareader.ingestion import (DEFAULT_CHUNK_SIZE,
+                                                 RejectedRow,
+                                                 game_from_record,
+                                                 game_to_record,
+                                                 log_rejected_row,
+                                                 missing_columns,
+                                                 parse_game_row)
+from games.domainmodel.model import Game
+
+BLOCK_SIZE = 1 << 20
+
+
+def read_header(filename) -> Tuple[List[str], int]:
+    """
+    Args:
+        filename: The path of the CSV file.
+
+    Returns:
+        Tuple[List[str], int]: The column names of the file and the
+        byte offset of its first record.
+    """
+    with open(filename, 'rb') as file:
+        header_line = file.readline()
+        data_start = file.tell()
+    header = next(csv.reader([header_line.decode('utf-8-sig')]))
+    return header, data_start
+
+
+def split_records(filename, parts: int) -> List[Tuple[int, int, int]]:
+    """
+    Split the records of a CSV file into byte ranges of roughly equal
+    size that start and end on record boundaries.
+
+    A newline only ends a record when it is outside a quoted field,
+    i.e. when an even number of quotes precede it (an escaped quote
+    inside a field is written as two quotes, so it keeps the count
+    even). The file is read once, counting quotes and newlines a block
+    at a time.
+
+    Args:
+        filename: The path of the CSV file.
+        parts (int): The number of ranges to aim for.
+
+    Returns:
+        List[Tuple[int, int, int]]: (start, end, line) for each range,
+        where line is the line number of the first line of the range.
+    """
+    _, data_start = read_header(filename)
+    file_size = os.path.getsize(filename)
+    part_size = max((file_size - data_start) // max(parts, 1), 1)
+    boundaries = [(data_start, 2)]
+    target = data_start + part_size
+    quotes = 0
+    line = 2
+    with open(filename, 'rb') as file:
+        file.seek(data_start)
+        offset = data_start
+        while True:
+            block = file.read(BLOCK_SIZE)
+            if not block:
+                break
+            position = 0
+            while offset + len(block) > target:
+                # Find the first record boundary at or after target.
+                newline = block.find(b'\n', max(target - offset, position))
+                if newline < 0:
+                    break
+                quotes += block.count(b'"', position, newline)
+                line += block.count(b'\n', position, newline) + 1
+                position = newline + 1
+                if quotes % 2 == 0:
+                    boundaries.append((offset + position, line))
+                    target = offset + position + part_size
+                else:
+                    target = offset + position
+            quotes += block.count(b'"', position)
+            line += block.count(b'\n', position)
+            offset += len(block)
+    if boundaries[-1][0] < file_size:
+        boundaries.append((file_size, line))
+    return [(start, end, start_line) for (start, start_line), (end, _)
+            in zip(boundaries, boundaries[1:])]
+
+
+def parse_record_range(filename, start: int, end: int, line: int,
+                       header: List[str]) \
+        -> Tuple[List[tuple], List[RejectedRow]]:
+    """
+    Parse and validate the records in a byte range of a CSV file. Runs
+    in the worker processes of parse_csv_parallel.
+
+    Args:
+        filename: The path of the CSV file.
+        start (int): The offset of the first record of the range.
+        end (int): The offset just past the last record of the range.
+        line (int): The line number of the first line of the range.
+        header (List[str]): The column names of the file.
+
+    Returns:
+        Tuple[List[tuple], List[RejectedRow]]: The games of the range in
+        file order, flattened by game_to_record, and the rows that could
+        not be parsed.
+    """
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    # TextIOWrapper translates newlines like the readers' open() calls.
+    text = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8')
+    reader = csv.DictReader(text, fieldnames=header)
+    missing = missing_columns(header)
+    games = []
+    rejected = []
+    for row in reader:
+        if missing:
+            rejected.append(RejectedRow(line - 1 + reader.line_num, row,
+                                        f'missing key: {missing[0]!r}'))
+            continue
+        try:
+            games.append(game_to_record(parse_game_row(row)))
+        except ValueError as e:
+            rejected.append(RejectedRow(line - 1 + reader.line_num, row,
+                                        f'invalid data: {e}'))
+        except KeyError as e:
+            rejected.append(RejectedRow(line - 1 + reader.line_num, row,
+                                        f'missing key: {e}'))
+    return games, rejected
+
+
+def parse_csv_parallel(filename, workers: int = None,
+                       rejects: Callable[[RejectedRow], None] = None,
+                       registry: InternRegistry = None) -> List[Game]:
+    """
+    Parse a games CSV file on several cores.
+
+    The records are split into one byte range per worker (see
+    split_records) and each range is parsed and validated in a process
+    pool. Workers send back flat records rather than games, as
+    pickling games costs more than parsing them, and the records are
+    merged by AppID. When an AppID occurs more than once the last
+    occurrence in the file wins, as with add_games_bulk, so the result
+    does not depend on how the work was scheduled.
+
+    Args:
+        filename: The path of the games CSV file.
+        workers (int): The number of worker processes. Defaults to the
+        number of CPUs.
+        rejects: Called with a RejectedRow for every row that cannot
+        be parsed, in file order. Defaults to log_rejected_row.
+        registry (InternRegistry): The registry the rebuilt games share
+        values through, see parse_game_row.
+
+    Returns:
+        List[Game]: The games of the file, sorted by AppID.
+    """
+    if rejects is None:
+        rejects = log_rejected_row
+    workers = workers or os.cpu_count() or 1
+    header, _ = read_header(filename)
+    ranges = split_records(filename, workers)
+    records_by_id = dict()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(parse_record_range,
+                               *zip(*[(filename, start, end, line, header)
+                                      for start, end, line in ranges]))
+        for records, rejected in results:
+            for record in records:
+                records_by_id[record[0]] = record
+            for rejected_row in rejected:
+                rejects(rejected_row)
+    return [game_from_record(records_by_id[game_id], registry)
+            for game_id in sorted(records_by_id)]
+
+
+def read_game_chunks_parallel(filename, workers: int = None,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE,
+                              rejects: Callable[[RejectedRow], None] = None,
+                              registry: InternRegistry = None) \
+        -> Iterator[List[Game]]:
+    """
+    A drop-in replacement for read_game_chunks that parses the file
+    with parse_csv_parallel. Unlike read_game_chunks, it holds every
+    game of the file in memory before yielding the first chunk.
+
+    Yields:
+        List[Game]: The next chunk of games, in AppID order.
+    """
+    games = parse_csv_parallel(filename, workers, rejects, registry)
+    for start in range(0, len(games), chunk_size):
+        yield games[start:start + chunk_size]
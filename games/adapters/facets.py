@@ -0,0 +1,247 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from games.domainmodel.model import PLATFORM_FLAGS, Game
+
+# The dimensions games can be browsed by, named after the Game
+# properties they come from.
+FACET_DIMENSIONS = ('genres', 'publishers', 'platforms', 'languages',
+                    'categories')
+
+# Values in less than this fraction of the rows get a posting list
+# rather than a bitmap in the FacetIndex.
+SPARSE_DENSITY = 1 / 64
+
+
+def game_facet_values(game: Game) -> Dict[str, Iterable[str]]:
+    """
+    Args:
+        game (Game): A game.
+
+    Returns:
+        Dict[str, Iterable[str]]: The values of the game in each of the
+        FACET_DIMENSIONS.
+    """
+    return {
+        'genres': [genre.genre_name for genre in game.genres],
+        'publishers': [game.publisher.publisher_name]
+        if game.publisher is not None else [],
+        'platforms': [platform for platform, flag in PLATFORM_FLAGS.items()
+                      if game.platforms & flag],
+        'languages': game.languages,
+        'categories': game.categories,
+    }
+
+
+def mask_to_bitmap(mask: np.ndarray) -> int:
+    """
+    Args:
+        mask (np.ndarray): A boolean array with an element per row.
+
+    Returns:
+        int: A bitmap with bit i set when mask[i] is True.
+    """
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(),
+                          'little')
+
+
+def bitmap_to_mask(bitmap: int, size: int) -> np.ndarray:
+    """
+    Args:
+        bitmap (int): A bitmap made by mask_to_bitmap or FacetIndex.
+        size (int): The number of rows.
+
+    Returns:
+        np.ndarray: A boolean array, True for the rows set in bitmap.
+    """
+    data = bitmap.to_bytes((size + 7) // 8, 'little')
+    return np.unpackbits(np.frombuffer(data, np.uint8), count=size,
+                         bitorder='little').astype(np.bool_)
+
+
+class Postings:
+    """
+    The rows of the sparse values of a facet dimension, stored as one
+    array of rows grouped by value, with the value code of every row.
+    """
+
+    def __init__(self, rows_by_value: Dict[str, List[int]]):
+        """
+        Args:
+            rows_by_value (Dict[str, List[int]]): The rows of each
+            value.
+        """
+        self.__values = list(rows_by_value)
+        lengths = [len(rows) for rows in rows_by_value.values()]
+        self.__starts = dict(zip(self.__values,
+                                 np.cumsum([0] + lengths[:-1]).tolist()))
+        self.__lengths = dict(zip(self.__values, lengths))
+        self.__rows = np.fromiter(
+            (row for rows in rows_by_value.values() for row in rows),
+            np.int64, sum(lengths))
+        self.__codes = np.repeat(np.arange(len(self.__values)), lengths)
+
+    def __len__(self) -> int:
+        return len(self.__values)
+
+    def rows(self, values: Iterable[str]) -> np.ndarray:
+        """
+        Args:
+            values (Iterable[str]): Values of the dimension. Values
+            without a posting list are ignored.
+
+        Returns:
+            np.ndarray: The rows of the values.
+        """
+        slices = [self.__rows[self.__starts[value]:
+                              self.__starts[value] + self.__lengths[value]]
+                  for value in values if value in self.__starts]
+        return np.concatenate(slices) if slices else self.__rows[:0]
+
+    def counts(self, mask: np.ndarray) -> Dict[str, int]:
+        """
+        Args:
+            mask (np.ndarray): A boolean array, True for the selected
+            rows.
+
+        Returns:
+            Dict[str, int]: The number of selected rows of each value,
+            leaving out values with none.
+        """
+        counts = np.bincount(self.__codes[mask[self.__rows]],
+                             minlength=len(self.__values))
+        return {self.__values[code]: int(counts[code])
+                for code in np.flatnonzero(counts)}
+
+
+class FacetIndex:
+    """
+    A bitmap index over the FACET_DIMENSIONS of the catalog.
+
+    Every common value of every dimension maps to a bitmap, an int with
+    bit i set when the game in row i (in game ID order) has the value.
+    Combined filters are bitwise operations on these bitmaps: the
+    values chosen within a dimension are ORed together and the
+    dimensions ANDed. Facet counts are popcounts of the bitmaps ANDed
+    with the selection, so a count costs one AND and one bit_count
+    over N / 8 bytes rather than a scan of the games.
+
+    A bitmap takes N / 8 bytes however few games have the value, so
+    values in less than sparse_density of the rows, like most
+    publishers, keep a posting list of their rows instead. The sparse
+    values of a dimension are counted together, with one bincount over
+    their postings.
+
+    Methods:
+        select(facets, base) -> int: The bitmap of the games matching
+        facet filters.
+        counts(facets, base) -> dict: The facet counts for every value
+        of every dimension.
+    """
+
+    def __init__(self, games: List[Game],
+                 sparse_density: float = SPARSE_DENSITY):
+        """
+        Args:
+            games (List[Game]): The games of the catalog, sorted by ID.
+            sparse_density (float): The fraction of the rows under
+            which a value keeps a posting list rather than a bitmap.
+        """
+        self.__size = len(games)
+        rows_by_value = {dimension: dict() for dimension in FACET_DIMENSIONS}
+        for row, game in enumerate(games):
+            for dimension, values in game_facet_values(game).items():
+                dimension_rows = rows_by_value[dimension]
+                for value in values:
+                    dimension_rows.setdefault(value, []).append(row)
+        self.__bitmaps = dict()
+        self.__postings = dict()
+        for dimension, dimension_rows in rows_by_value.items():
+            bitmaps = dict()
+            sparse = dict()
+            for value, rows in dimension_rows.items():
+                if len(rows) < self.__size * sparse_density:
+                    sparse[value] = rows
+                    continue
+                mask = np.zeros(self.__size, np.bool_)
+                mask[rows] = True
+                bitmaps[value] = mask_to_bitmap(mask)
+            self.__bitmaps[dimension] = bitmaps
+            self.__postings[dimension] = Postings(sparse)
+        self.__all = (1 << self.__size) - 1
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def select(self, facets: Dict[str, Iterable[str]] = None,
+               base: int = None) -> int:
+        """
+        Args:
+            facets (Dict[str, Iterable[str]]): The values chosen in each
+            dimension. Dimensions that are missing or have no values do
+            not restrict the games.
+            base (int): A bitmap the selection is restricted to, or None
+            for every game.
+
+        Returns:
+            int: The bitmap of the games in base that have at least one
+            of the chosen values in every dimension.
+
+        Raises:
+            ValueError: If a dimension is not one of FACET_DIMENSIONS.
+        """
+        selection = self.__all if base is None else base
+        for dimension, values in (facets or {}).items():
+            if dimension not in self.__bitmaps:
+                raise ValueError(f'Unknown facet dimension {dimension}')
+            values = list(values)
+            if not values:
+                continue
+            bitmaps = self.__bitmaps[dimension]
+            chosen = 0
+            for value in values:
+                chosen |= bitmaps.get(value, 0)
+            rows = self.__postings[dimension].rows(values)
+            if len(rows):
+                mask = np.zeros(self.__size, np.bool_)
+                mask[rows] = True
+                chosen |= mask_to_bitmap(mask)
+            selection &= chosen
+        return selection
+
+    def counts(self, facets: Dict[str, Iterable[str]] = None,
+               base: int = None) -> Dict[str, Dict[str, int]]:
+        """
+        Count, for every value of every dimension, the games that would
+        match if the value were chosen in addition to the other
+        dimensions' filters. The filters of a dimension are left out of
+        its own counts, so the other values of a dimension stay
+        selectable.
+
+        Args:
+            facets (Dict[str, Iterable[str]]): As for select.
+            base (int): As for select.
+
+        Returns:
+            Dict[str, Dict[str, int]]: The counts by value, for each
+            dimension. Values with no matching game are left out.
+        """
+        facets = {dimension: list(values)
+                  for dimension, values in (facets or {}).items()}
+        counts = dict()
+        for dimension, bitmaps in self.__bitmaps.items():
+            others = {other: values for other, values in facets.items()
+                      if other != dimension}
+            selection = self.select(others, base)
+            dimension_counts = dict()
+            for value, bitmap in bitmaps.items():
+                count = (bitmap & selection).bit_count()
+                if count:
+                    dimension_counts[value] = count
+            postings = self.__postings[dimension]
+            if len(postings):
+                dimension_counts.update(postings.counts(
+                    bitmap_to_mask(selection, self.__size)))
+            counts[dimension] = dimension_counts
+        return counts
@@ -0,0 +1,563 @@
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort_left
+from collections import Counter
+from heapq import merge, nsmallest
+from typing import Iterable, List, NamedTuple, Tuple
+
+
+# The share of the trigrams of a fuzzy query a string must contain to
+# match it.
+FUZZY_THRESHOLD = 0.5
+
+# The most candidates a fuzzy query scores per index.
+FUZZY_CANDIDATES = 1000
+
+# The kinds of suggestions made by PrefixIndex, in the order they are
+# ranked when equally popular.
+SUGGESTION_KINDS = ('title', 'publisher', 'tag')
+
+# The most suggestions PrefixIndex returns for a prefix.
+MAX_SUGGESTIONS = 20
+
+# The fields of the games searched by full-text queries, and the BM25
+# weight of a match in each.
+FULL_TEXT_FIELDS = ('title', 'publisher', 'description')
+FULL_TEXT_WEIGHTS = (10.0, 5.0, 1.0)
+
+# The BM25 parameters, as used by SQLite FTS5.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# The words of a text, as split by the FTS5 unicode61 tokenizer.
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+
+class Suggestion(NamedTuple):
+    """
+    An autocomplete suggestion.
+
+    Attributes:
+        text (str): The title, publisher name or tag suggested.
+        kind (str): One of SUGGESTION_KINDS.
+        game_id (int): The ID of the game of a title, None otherwise.
+        popularity (int): The rank of the suggestion, higher first: the
+        number of reviews of a title, or the number of games of a
+        publisher or tag.
+    """
+    text: str
+    kind: str
+    game_id: int
+    popularity: int
+
+
+def merge_postings(*postings) -> List[int]:
+    """
+    Merge sorted posting lists into a single sorted list without
+    duplicates.
+
+    Args:
+        *postings: Sorted lists of game IDs.
+
+    Returns:
+        List[int]: The sorted union of the posting lists.
+    """
+    if len(postings) == 1:
+        return list(postings[0])
+    merged = []
+    for game_id in merge(*postings):
+        if not merged or merged[-1] != game_id:
+            merged.append(game_id)
+    return merged
+
+
+def intersect_postings(*postings) -> List[int]:
+    """
+    Intersect sorted posting lists, starting from the shortest.
+
+    Args:
+        *postings: Sorted lists of game IDs.
+
+    Returns:
+        List[int]: The sorted IDs present in every posting list.
+    """
+    postings = sorted(postings, key=len)
+    result = list(postings[0])
+    for other in postings[1:]:
+        if not result:
+            break
+        other_ids = set(other)
+        result = [game_id for game_id in result if game_id in other_ids]
+    return result
+
+
+def subtract_postings(postings, excluded) -> List[int]:
+    """
+    Args:
+        postings: A sorted list of game IDs.
+        excluded: A sorted list of game IDs to remove.
+
+    Returns:
+        List[int]: The sorted IDs of postings that are not in excluded.
+    """
+    excluded_ids = set(excluded)
+    return [game_id for game_id in postings if game_id not in excluded_ids]
+
+
+def add_posting(index: dict, key, game_id: int):
+    """
+    Insert a game ID into the sorted posting list stored under a key.
+
+    A posting list is only ever appended to in place. Inserting before
+    its end stores a new list under the key instead, so a reader that
+    already holds the old list never sees it reordered.
+
+    Args:
+        index (dict): The posting index to update.
+        key: The key of the posting list.
+        game_id (int): The game ID to insert.
+    """
+    postings = index.setdefault(key, [])
+    if not postings or postings[-1] < game_id:
+        postings.append(game_id)
+    else:
+        position = bisect_left(postings, game_id)
+        if position == len(postings) or postings[position] != game_id:
+            index[key] = postings[:position] + [game_id] + postings[position:]
+
+
+def remove_posting(index: dict, key, game_id: int):
+    """
+    Remove a game ID from the sorted posting list stored under a key.
+    The list is copied rather than changed in place, as in add_posting.
+
+    Args:
+        index (dict): The posting index to update.
+        key: The key of the posting list.
+        game_id (int): The game ID to remove.
+    """
+    postings = index.get(key, [])
+    position = bisect_left(postings, game_id)
+    if position < len(postings) and postings[position] == game_id:
+        index[key] = postings[:position] + postings[position + 1:]
+
+
+def fold_text(text: str) -> str:
+    """
+    Case fold a string and strip its accents, e.g. "Pokémon" becomes
+    "pokemon".
+
+    Folding works character by character, so a substring of a string
+    always folds to a substring of the folded string.
+
+    Args:
+        text (str): The string to fold.
+
+    Returns:
+        str: The folded string.
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(character for character in decomposed
+                   if not unicodedata.combining(character))
+
+
+def trigrams(text: str) -> set:
+    """
+    Args:
+        text (str): The string to split.
+
+    Returns:
+        set: The distinct three character substrings of the string.
+    """
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+def full_text_terms(text: str) -> List[str]:
+    """
+    Args:
+        text (str): A full-text query or an indexed text.
+
+    Returns:
+        List[str]: The folded words of the text, in order.
+    """
+    return WORD_PATTERN.findall(fold_text(text or ''))
+
+
+def fuzzy_score(query_trigrams: set, text: str) -> float:
+    """
+    Score how well a string matches a fuzzy query, by the trigrams they
+    share. Typos and spelling variants only change the few trigrams
+    around them, so "stardew vally" still shares most of its trigrams
+    with "Stardew Valley".
+
+    Args:
+        query_trigrams (set): The trigrams of the folded query.
+        text (str): The string to score.
+
+    Returns:
+        float: The mean of the share of the query trigrams found in
+        the string and the Jaccard similarity of their trigrams, from 0
+        to 1: whole matches of short strings score highest. 0 when
+        fewer than FUZZY_THRESHOLD of the query trigrams are found.
+    """
+    if not query_trigrams:
+        return 0.0
+    text_trigrams = trigrams(fold_text(text or ''))
+    shared = len(query_trigrams & text_trigrams)
+    coverage = shared / len(query_trigrams)
+    if coverage < FUZZY_THRESHOLD:
+        return 0.0
+    return (coverage + shared / len(query_trigrams | text_trigrams)) / 2
+
+
+class TrigramIndex:
+    """
+    A trigram index answering case insensitive substring queries over
+    one string per game.
+
+    Trigrams are taken from the folded strings, so the posting lists
+    narrow a query down to a superset of its matches. Candidates are
+    then checked with the same `query.lower() in text.lower()` test
+    as a linear scan, against lower cased strings computed when the
+    game was indexed.
+
+    Updates copy the lists they change (see add_posting), so searches
+    may run without a lock while a single writer updates the index.
+
+    Methods:
+        add(game_id, text): Index the string of a game.
+        remove(game_id): Remove a game from the index.
+        search(query) -> List[int]: Return the sorted IDs of the games
+        whose string contains the query.
+        similar(query) -> List[Tuple[int, float]]: Return the games
+        whose string is similar to the query, best first.
+    """
+
+    def __init__(self):
+        self.__lowered_texts = dict()
+        self.__postings = dict()
+        self.__game_ids = list()
+
+    def add(self, game_id: int, text: str) -> None:
+        """
+        Index the string of a game, replacing any string already
+        indexed for it. A replaced string stays in the posting lists
+        of its trigrams until the new string is in those of its own,
+        so a search running alongside finds the game by one or the
+        other.
+
+        Args:
+            game_id (int): The ID of the game.
+            text (str): The string to index. None is indexed as an
+            empty string.
+        """
+        old_text = self.__lowered_texts.get(game_id)
+        lowered_text = (text or '').lower()
+        new_trigrams = trigrams(fold_text(lowered_text))
+        for trigram in new_trigrams:
+            add_posting(self.__postings, trigram, game_id)
+        self.__lowered_texts[game_id] = lowered_text
+        if old_text is not None:
+            for trigram in set(trigrams(fold_text(old_text))) \
+                    - set(new_trigrams):
+                remove_posting(self.__postings, trigram, game_id)
+                if not self.__postings[trigram]:
+                    del self.__postings[trigram]
+        elif not self.__game_ids or self.__game_ids[-1] < game_id:
+            self.__game_ids.append(game_id)
+        else:
+            game_ids = list(self.__game_ids)
+            insort_left(game_ids, game_id)
+            self.__game_ids = game_ids
+
+    def remove(self, game_id: int) -> None:
+        """
+        Args:
+            game_id (int): The ID of the game to remove from the index.
+        """
+        lowered_text = self.__lowered_texts.get(game_id)
+        if lowered_text is None:
+            return
+        position = bisect_left(self.__game_ids, game_id)
+        self.__game_ids = (self.__game_ids[:position]
+                           + self.__game_ids[position + 1:])
+        for trigram in trigrams(fold_text(lowered_text)):
+            remove_posting(self.__postings, trigram, game_id)
+            if not self.__postings[trigram]:
+                del self.__postings[trigram]
+        del self.__lowered_texts[game_id]
+
+    def search(self, query: str) -> List[int]:
+        """
+        Args:
+            query (str): The substring to search for.
+
+        Returns:
+            List[int]: The sorted IDs of the games whose string contains
+            the query, ignoring case.
+        """
+        query = query.lower()
+        query_trigrams = trigrams(fold_text(query))
+        if query_trigrams:
+            postings = [self.__postings.get(trigram)
+                        for trigram in query_trigrams]
+            if not all(postings):
+                return []
+            candidates = intersect_postings(*postings)
+        else:
+            candidates = self.__game_ids
+        lowered_texts = self.__lowered_texts
+        return [game_id for game_id in candidates
+                if query in lowered_texts.get(game_id, ())]
+
+    def similar(self, query: str) -> List[Tuple[int, float]]:
+        """
+        Find the games whose string is similar to the query, tolerating
+        typos, with fuzzy_score.
+
+        A string sharing a FUZZY_THRESHOLD share of the query trigrams
+        is in at least one of the posting lists of its rarest trigrams,
+        so only those lists are read. The FUZZY_CANDIDATES games found
+        in most of them are scored.
+
+        Args:
+            query (str): The string to search for.
+
+        Returns:
+            List[Tuple[int, float]]: The IDs and scores of the matching
+            games, best first, ties in ID order.
+        """
+        query_trigrams = trigrams(fold_text(query))
+        if not query_trigrams:
+            return []
+        needed = math.ceil(FUZZY_THRESHOLD * len(query_trigrams))
+        postings = sorted((self.__postings.get(trigram, [])
+                           for trigram in query_trigrams), key=len)
+        hits = Counter()
+        for game_ids in postings[:len(postings) - needed + 1]:
+            hits.update(game_ids)
+        lowered_texts = self.__lowered_texts
+        scores = [(game_id, fuzzy_score(query_trigrams,
+                                        lowered_texts.get(game_id)))
+                  for game_id, _ in hits.most_common(FUZZY_CANDIDATES)]
+        scores.sort(key=lambda item: (-item[1], item[0]))
+        return [(game_id, score) for game_id, score in scores if score > 0]
+
+
+class PrefixIndex:
+    """
+    A sorted array of folded suggestion texts answering "the most
+    popular suggestions starting with a prefix" queries.
+
+    The suggestions starting with a prefix are a contiguous range of
+    the array, found with two binary searches. Ranking a large range
+    would cost a scan of every suggestion in it, so the top
+    MAX_SUGGESTIONS of every prefix matched by more than SCAN_LIMIT
+    suggestions are computed when the index is built, bottom up from
+    the ranges of the longer prefixes. A query therefore either reads a
+    precomputed list or ranks at most SCAN_LIMIT suggestions.
+
+    The index is immutable: a catalog change builds a new one.
+
+    Methods:
+        search(prefix, limit) -> List[Suggestion]: The most popular
+        suggestions starting with a prefix.
+    """
+
+    # The largest range of suggestions ranked at query time.
+    SCAN_LIMIT = 256
+
+    def __init__(self, suggestions: Iterable[Suggestion]):
+        """
+        Args:
+            suggestions (Iterable[Suggestion]): The suggestions to
+            index. Suggestions with an empty text are skipped.
+        """
+        rows = sorted(((fold_text(suggestion.text), suggestion)
+                       for suggestion in suggestions if suggestion.text),
+                      key=lambda row: row[0])
+        self.__keys = [key for key, _ in rows]
+        self.__suggestions = [suggestion for _, suggestion in rows]
+        kind_order = {kind: order
+                      for order, kind in enumerate(SUGGESTION_KINDS)}
+        ranked = sorted(range(len(rows)), key=lambda row: (
+            -rows[row][1].popularity, rows[row][0],
+            kind_order.get(rows[row][1].kind, len(kind_order)), row))
+        self.__ranks = [0] * len(rows)
+        for rank, row in enumerate(ranked):
+            self.__ranks[row] = rank
+        self.__top = dict()
+        if rows:
+            self.__build_top(0, len(rows), 0)
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    def __rank(self, rows) -> List[int]:
+        return nsmallest(MAX_SUGGESTIONS, rows, key=self.__ranks.__getitem__)
+
+    def __prefix_end(self, prefix: str, low: int, high: int) -> int:
+        """
+        Returns:
+            int: The end of the range of the keys starting with prefix,
+            searching the keys from low to high.
+        """
+        last = ord(prefix[-1])
+        if last == 0x10FFFF:
+            return high
+        return bisect_left(self.__keys, prefix[:-1] + chr(last + 1),
+                           low, high)
+
+    def __build_top(self, low: int, high: int, depth: int) -> List[int]:
+        """
+        Precompute the top suggestions of the large ranges within the
+        keys from low to high, which share their first depth characters.
+
+        Returns:
+            List[int]: The top rows of the range, best first.
+        """
+        if high - low <= self.SCAN_LIMIT:
+            return self.__rank(range(low, high))
+        keys = self.__keys
+        start = low
+        # Keys of exactly depth characters sort first.
+        while start < high and len(keys[start]) == depth:
+            start += 1
+        candidates = list(range(low, start))
+        while start < high:
+            end = self.__prefix_end(keys[start][:depth + 1], start, high)
+            candidates.extend(self.__build_top(start, end, depth + 1))
+            start = end
+        top = self.__rank(candidates)
+        self.__top[keys[low][:depth]] = top
+        return top
+
+    def search(self, prefix: str,
+               limit: int = MAX_SUGGESTIONS) -> List[Suggestion]:
+        """
+        Args:
+            prefix (str): The start of the suggestions, matched after
+            folding (see fold_text). Leading spaces are ignored.
+            limit (int): The most suggestions to return, at most
+            MAX_SUGGESTIONS.
+
+        Returns:
+            List[Suggestion]: The suggestions starting with prefix, most
+            popular first, ties in alphabetical order.
+        """
+        prefix = fold_text(prefix).lstrip()
+        if not prefix or limit <= 0:
+            return []
+        top = self.__top.get(prefix)
+        if top is None:
+            low = bisect_left(self.__keys, prefix)
+            high = self.__prefix_end(prefix, low, len(self.__keys))
+            top = self.__rank(range(low, high))
+        return [self.__suggestions[row] for row in top[:limit]]
+
+
+class FullTextIndex:
+    """
+    An inverted index of the words of the FULL_TEXT_FIELDS of the
+    games, answering the same queries as the SQLite FTS5 index of the
+    database repository: every word of a query must start a word of
+    one of the searched fields, and the matches are ranked by BM25
+    with the FULL_TEXT_WEIGHTS.
+
+    Each field keeps a sorted vocabulary, so the words a query word is
+    a prefix of are found with two binary searches, and a posting map
+    from every word to the number of times each game contains it.
+
+    The index is immutable: a catalog change builds a new one.
+
+    Methods:
+        search(query, fields, limit) -> List[int]: The IDs of the games
+        matching a query, best first.
+    """
+
+    def __init__(self, games):
+        """
+        Args:
+            games: The games to index.
+        """
+        self.__postings = {field: dict() for field in FULL_TEXT_FIELDS}
+        self.__lengths = dict()
+        for game in games:
+            publisher = game.publisher
+            texts = (game.title,
+                     publisher.publisher_name
+                     if publisher is not None else None,
+                     game.description)
+            length = 0
+            for field, text in zip(FULL_TEXT_FIELDS, texts):
+                words = Counter(full_text_terms(text))
+                postings = self.__postings[field]
+                for word, count in words.items():
+                    postings.setdefault(word, dict())[game.game_id] = count
+                length += sum(words.values())
+            self.__lengths[game.game_id] = length
+        self.__vocabularies = {field: sorted(postings)
+                               for field, postings
+                               in self.__postings.items()}
+        self.__average_length = (sum(self.__lengths.values())
+                                 / len(self.__lengths)
+                                 if self.__lengths else 0)
+
+    def __len__(self) -> int:
+        return len(self.__lengths)
+
+    def __hits(self, term: str, fields) -> Counter:
+        """
+        Returns:
+            Counter: The weighted number of words starting with term in
+            the fields of every game that has one.
+        """
+        hits = Counter()
+        for field, weight in zip(FULL_TEXT_FIELDS, FULL_TEXT_WEIGHTS):
+            if field not in fields:
+                continue
+            vocabulary = self.__vocabularies[field]
+            postings = self.__postings[field]
+            start = bisect_left(vocabulary, term)
+            for word in vocabulary[start:]:
+                if not word.startswith(term):
+                    break
+                for game_id, count in postings[word].items():
+                    hits[game_id] += weight * count
+        return hits
+
+    def search(self, query: str, fields=FULL_TEXT_FIELDS,
+               limit: int = None) -> List[int]:
+        """
+        Args:
+            query (str): The words to search for, see full_text_terms.
+            fields: The FULL_TEXT_FIELDS to search.
+            limit (int): The most game IDs to return, or None for all.
+
+        Returns:
+            List[int]: The IDs of the games with a word starting with
+            every word of the query, by descending BM25 score, ties in
+            game ID order.
+        """
+        terms = full_text_terms(query)
+        if not terms or not self.__lengths:
+            return []
+        term_hits = [self.__hits(term, fields) for term in terms]
+        matches = set.intersection(*(set(hits) for hits in term_hits))
+        count = len(self.__lengths)
+        scores = dict.fromkeys(matches, 0.0)
+        for hits in term_hits:
+            documents = len(hits)
+            idf = max(math.log((count - documents + 0.5)
+                               / (documents + 0.5)), 1e-6)
+            for game_id in matches:
+                frequency = hits[game_id]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B
+                                  * self.__lengths[game_id]
+                                  / self.__average_length)
+                scores[game_id] += idf * frequency * (BM25_K1 + 1) \
+                    / (frequency + norm)
+        ranked = sorted(matches, key=lambda game_id: (-scores[game_id],
+                                                      game_id))
+        return ranked if limit is None else ranked[:limit]
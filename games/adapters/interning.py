@@ -0,0 +1,100 @@
+from games.domainmodel.model import Genre, Publisher
+
+
+class InternRegistry:
+    """
+    A flyweight registry that hands out one shared instance per
+    distinct genre, publisher and string (tag, category or language),
+    so games loaded from the catalog share these values instead of
+    each holding its own copy.
+
+    Genres and publishers are looked up by the raw name read from the
+    file first, so a repeated name costs one dictionary lookup and no
+    new object.
+
+    Methods:
+        genre(name) -> Genre: Return the shared genre with a name.
+        publisher(name) -> Publisher: Return the shared publisher with
+        a name.
+        intern_genre(genre) -> Genre: Return the shared genre equal to
+        a genre, registering it if it is new.
+        intern_publisher(publisher) -> Publisher: Return the shared
+        publisher equal to a publisher, registering it if it is new.
+        string(value) -> str: Return the shared copy of a string.
+    """
+
+    def __init__(self):
+        self.__genres = dict()
+        self.__genres_by_name = dict()
+        self.__publishers = dict()
+        self.__publishers_by_name = dict()
+        self.__strings = dict()
+
+    def genre(self, name: str) -> Genre:
+        """
+        Args:
+            name (str): The genre name, as read from the file.
+
+        Returns:
+            Genre: The shared genre with the (stripped) name.
+        """
+        genre = self.__genres_by_name.get(name)
+        if genre is None:
+            genre = self.intern_genre(Genre(name))
+            self.__genres_by_name[name] = genre
+        return genre
+
+    def publisher(self, name: str) -> Publisher:
+        """
+        Args:
+            name (str): The publisher name, as read from the file.
+
+        Returns:
+            Publisher: The shared publisher with the (stripped) name.
+        """
+        publisher = self.__publishers_by_name.get(name)
+        if publisher is None:
+            publisher = self.intern_publisher(Publisher(name))
+            self.__publishers_by_name[name] = publisher
+        return publisher
+
+    def intern_genre(self, genre: Genre) -> Genre:
+        """
+        Args:
+            genre (Genre): A genre.
+
+        Returns:
+            Genre: The shared genre equal to genre. genre itself becomes
+            the shared genre if no equal genre was registered before.
+        """
+        return self.__genres.setdefault(genre, genre)
+
+    def intern_publisher(self, publisher: Publisher) -> Publisher:
+        """
+        Args:
+            publisher (Publisher): A publisher.
+
+        Returns:
+            Publisher: The shared publisher equal to publisher.
+            publisher itself becomes the shared publisher if no equal
+            publisher was registered before.
+        """
+        return self.__publishers.setdefault(publisher, publisher)
+
+    def string(self, value: str) -> str:
+        """
+        Args:
+            value (str): A string.
+
+        Returns:
+            str: The shared string equal to value.
+        """
+        return self.__strings.setdefault(value, value)
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            int: The number of distinct values in the registry.
+        """
+        return (len(self.__genres) + len(self.__publishers)
+                + len(self.__strings))
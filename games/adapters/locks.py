@@ -0,0 +1,36 @@
+import threading
+from weakref import WeakValueDictionary
+
+
+class KeyedLocks:
+    """
+    A registry of locks, one per key, for fine-grained locking of
+    individual games or users.
+
+    Locks are held weakly, so the lock of a key is dropped once no
+    thread holds or waits on it, and the registry does not grow with
+    every key ever locked.
+
+    Methods:
+        lock_for(key) -> threading.Lock: Return the lock of a key.
+    """
+
+    def __init__(self):
+        self.__locks = WeakValueDictionary()
+        self.__registry_lock = threading.Lock()
+
+    def lock_for(self, key) -> threading.Lock:
+        """
+        Args:
+            key: A hashable key, e.g. a game ID or a username.
+
+        Returns:
+            threading.Lock: The lock of the key. Every thread asking
+            for the same key while the lock is alive gets the same lock.
+        """
+        with self.__registry_lock:
+            lock = self.__locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self.__locks[key] = lock
+            return lock
@@ -1,34 +1,398 @@
+import threading
 from abc import ABC
-from bisect import insort_left
+from bisect import bisect_left, insort_left
 from typing import List
 
-from games.adapters.repository import AbstractRepository
+import numpy as np
+
+from games.adapters.columnar import ColumnarCatalog, average_rating
+from games.adapters.indexes import (FullTextIndex, PrefixIndex, Suggestion,
+                                    TrigramIndex, add_posting,
+                                    merge_postings, remove_posting)
+from games.adapters.interning import InternRegistry
+from games.adapters.locks import KeyedLocks
+from games.adapters.repository import AbstractRepository, RepositoryException
+from games.adapters.tag_query import evaluate_tag_query
 from games.domainmodel.model import *
 
 
+def publisher_name(game: Game) -> str:
+    """
+    Args:
+        game (Game): A game.
+
+    Returns:
+        str: The name of the publisher of the game, or None if the game
+        has no publisher.
+    """
+    return game.publisher.publisher_name if game.publisher else None
+
+
+SORT_KEYS = {
+    'title': lambda game: ((game.title or '').casefold(), game.game_id),
+    'game_id': lambda game: game.game_id,
+    'release_date': lambda game: (game.release_date_ordinal, game.game_id),
+    'price': lambda game: (game.price or 0, game.game_id),
+    'review_count': lambda game: (-len(game.reviews), game.game_id),
+    'rating': lambda game: (-average_rating(game), -len(game.reviews),
+                            game.game_id),
+}
+
+REVIEW_SORT_CRITERIA = ('review_count', 'rating')
+
+
 class MemoryRepository(AbstractRepository, ABC):
     """
     A memory-based repository implementation for games and genres.
+
+    The repository is safe to share between the threads of a threaded
+    server. Reads take no locks: catalog writes are serialised by a
+    catalog lock and replace the lists they change with updated copies
+    instead of changing them in place (lists are only appended to in
+    place), so a reader always works on a consistent snapshot of each
+    list it holds. Reviews are written under a lock per game and
+    wishlists under a lock per user, and usernames are claimed
+    atomically, so concurrent requests cannot add duplicate reviews or
+    users or corrupt a wishlist.
     """
 
     def __init__(self, message=None):
         self.__games = list()
+        self.__games_by_id = dict()
         self.__genres = list()
-        self.__users = list()
+        self.__genre_set = set()
+        self.__users = dict()
         self.comments = list()
         self.__user_wishlist_games = list()
         self.__reviews = list()
         self.__publishers = list()
+        self.__publisher_set = set()
+        self.__registry = InternRegistry()
+        self.__catalog_lock = threading.RLock()
+        self.__game_locks = KeyedLocks()
+        self.__user_locks = KeyedLocks()
+        self.__clear_indexes()
+
+    def __getstate__(self) -> dict:
+        """
+        Return the state to pickle: everything but the locks, which are
+        not picklable and are recreated by __setstate__.
+        """
+        state = self.__dict__.copy()
+        del state['_MemoryRepository__catalog_lock']
+        del state['_MemoryRepository__game_locks']
+        del state['_MemoryRepository__user_locks']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__catalog_lock = threading.RLock()
+        self.__game_locks = KeyedLocks()
+        self.__user_locks = KeyedLocks()
 
     def add_game(self, game: Game):
         """
-        Add a game to the repository.
+        Add a game to the repository. A game whose ID is already in the
+        repository replaces the stored game.
 
         Args:
             game (Game): The game to be added.
         """
-        if isinstance(game, Game):
-            insort_left(self.__games, game)
+        if not isinstance(game, Game):
+            return
+        with self.__catalog_lock:
+            old_game = self.__games_by_id.get(game.game_id)
+            if old_game is not None:
+                self.__unindex_game(old_game)
+            self.__games_by_id[game.game_id] = game
+            if not self.__games or self.__games[-1] < game:
+                self.__games.append(game)
+            else:
+                games = list(self.__games)
+                if old_game is not None:
+                    games[bisect_left(games, game)] = game
+                else:
+                    insort_left(games, game)
+                self.__games = games
+            self.__index_game(game)
+
+    def add_games_bulk(self, games) -> None:
+        """
+        Add many games to the repository at once.
+
+        The games are deduplicated by ID (the last game with an ID wins,
+        as with add_game), sorted once and indexed in a single pass in
+        catalog order, so loading N games costs O(N log N) instead of
+        the O(N^2) element moves of N calls to add_game.
+
+        The indexes are rebuilt from scratch, so searches running
+        alongside a bulk load may miss games until it finishes.
+
+        Args:
+            games: An iterable of the games to be added.
+        """
+        with self.__catalog_lock:
+            games_by_id = dict(self.__games_by_id)
+            for game in games:
+                if isinstance(game, Game):
+                    games_by_id[game.game_id] = game
+            self.__games_by_id = games_by_id
+            self.__games = [games_by_id[game_id]
+                            for game_id in sorted(games_by_id)]
+            self.__clear_indexes()
+            for game in self.__games:
+                self.__index_game(game)
+            self.__columns = ColumnarCatalog(self.__games)
+
+    def update_game(self, game: Game) -> None:
+        """
+        Replace the stored game with the same ID by a new game object
+        holding the catalog data of game (see Game.update_from) and the
+        reviews of the stored game. The stored game is left unchanged,
+        so readers holding it keep a consistent snapshot, and the new
+        game is indexed before it replaces the stored one, so searches
+        running alongside find one or the other. Wishlists show the new
+        game. A game with a new ID is added instead.
+
+        Args:
+            game (Game): The game holding the new catalog data.
+        """
+        if not isinstance(game, Game):
+            return
+        with self.__game_locks.lock_for(game.game_id), self.__catalog_lock:
+            stored_game = self.__games_by_id.get(game.game_id)
+            if stored_game is None:
+                self.add_game(game)
+                return
+            new_game = Game(game.game_id, game.title)
+            new_game.update_from(game)
+            for review in stored_game.reviews:
+                new_game.add_review(review)
+            self.add_publisher(new_game.publisher)
+            for genre in new_game.genres:
+                self.add_genre(genre)
+            self.__reindex_game(stored_game, new_game)
+
+    def remove_game(self, game_id: int) -> None:
+        """
+        Remove a game from the catalog and its indexes. Reviews and
+        wishlists that hold the game keep it.
+
+        Args:
+            game_id (int): The ID of the game to remove.
+        """
+        with self.__catalog_lock:
+            game = self.__games_by_id.get(game_id)
+            if game is None:
+                return
+            self.__unindex_game(game)
+            games = list(self.__games)
+            del games[bisect_left(games, game)]
+            self.__games = games
+            del self.__games_by_id[game_id]
+
+    def get_intern_registry(self) -> InternRegistry:
+        """
+        Returns:
+            InternRegistry: The registry that games loaded into the
+            repository share genres, publishers, tags, categories and
+            languages through. Genres and publishers added to the
+            repository are stored as the shared instances.
+        """
+        return self.__registry
+
+    def __clear_indexes(self):
+        """
+        Reset the secondary indexes of the repository to empty indexes.
+        Genres added with add_genre keep an empty posting list.
+        """
+        self.__genre_postings = {genre.genre_name: []
+                                 for genre in self.__genres}
+        self.__tag_postings = dict()
+        self.__category_postings = dict()
+        self.__title_index = TrigramIndex()
+        self.__publisher_index = TrigramIndex()
+        self.__sort_orders = dict()
+        self.__columns = None
+        self.__prefix_index = None
+        self.__text_index = None
+
+    def __index_game(self, game: Game):
+        """
+        Add a game to the secondary indexes of the repository.
+
+        Args:
+            game (Game): The game to be indexed.
+        """
+        game_id = game.game_id
+        for genre in game.genres:
+            add_posting(self.__genre_postings, genre.genre_name, game_id)
+        for tag in game.tags:
+            add_posting(self.__tag_postings, tag.casefold(), game_id)
+        for category in game.categories:
+            add_posting(self.__category_postings, category.casefold(),
+                        game_id)
+        self.__title_index.add(game_id, game.title)
+        self.__publisher_index.add(game_id, publisher_name(game))
+        self.__sort_game(game)
+        self.__columns = None
+        self.__prefix_index = None
+        self.__text_index = None
+
+    def __unindex_game(self, game: Game):
+        """
+        Remove a game from the secondary indexes of the repository.
+
+        Args:
+            game (Game): The game to be removed from the indexes.
+        """
+        game_id = game.game_id
+        for genre in game.genres:
+            remove_posting(self.__genre_postings, genre.genre_name, game_id)
+        for tag in game.tags:
+            remove_posting(self.__tag_postings, tag.casefold(), game_id)
+        for category in game.categories:
+            remove_posting(self.__category_postings, category.casefold(),
+                           game_id)
+        self.__title_index.remove(game_id)
+        self.__publisher_index.remove(game_id)
+        self.__unsort_game(game)
+        self.__columns = None
+        self.__prefix_index = None
+        self.__text_index = None
+
+    def __posting_keys(self, game: Game) -> set:
+        """
+        Returns:
+            set: The (dimension, key) pairs of the posting lists of the
+            genres, tags and categories of game, see __posting_index.
+        """
+        return ({('genre', genre.genre_name) for genre in game.genres}
+                | {('tag', tag.casefold()) for tag in game.tags}
+                | {('category', category.casefold())
+                   for category in game.categories})
+
+    def __posting_index(self, dimension: str) -> dict:
+        """
+        Returns:
+            dict: The posting index of a dimension of __posting_keys.
+        """
+        return {'genre': self.__genre_postings,
+                'tag': self.__tag_postings,
+                'category': self.__category_postings}[dimension]
+
+    def __reindex_game(self, old_game: Game, new_game: Game):
+        """
+        Replace an indexed game by a new game with the same ID.
+
+        The new game is added to the indexes and sort orders it belongs
+        to before it replaces the old game in the catalog, and the old
+        game leaves the posting lists the new game is not in after, so
+        the game is never missing from an index a reader looks it up in.
+
+        Args:
+            old_game (Game): The game in the catalog.
+            new_game (Game): The game to replace it with.
+        """
+        game_id = new_game.game_id
+        old_keys = self.__posting_keys(old_game)
+        new_keys = self.__posting_keys(new_game)
+        for dimension, key in new_keys - old_keys:
+            add_posting(self.__posting_index(dimension), key, game_id)
+        for key, order in list(self.__sort_orders.items()):
+            criteria, genre_name = key
+            if self.__sort_order_contains(old_game, criteria, genre_name,
+                                          None):
+                position = self.__sort_position(order, criteria, old_game)
+                if position < len(order) and order[position] == game_id:
+                    order = order[:position] + order[position + 1:]
+            if self.__sort_order_contains(new_game, criteria, genre_name,
+                                          None):
+                position = self.__sort_position(order, criteria, new_game)
+                order = order[:position] + [game_id] + order[position:]
+            self.__sort_orders[key] = order
+        self.__title_index.add(game_id, new_game.title)
+        self.__publisher_index.add(game_id, publisher_name(new_game))
+        games = list(self.__games)
+        games[bisect_left(games, new_game)] = new_game
+        self.__games = games
+        self.__games_by_id[game_id] = new_game
+        for dimension, key in old_keys - new_keys:
+            remove_posting(self.__posting_index(dimension), key, game_id)
+        self.__columns = None
+        self.__prefix_index = None
+        self.__text_index = None
+
+    def __sort_game(self, game: Game, sort_criteria=None):
+        """
+        Insert a game into the sort orders built so far that contain it.
+
+        Args:
+            game (Game): The game to insert.
+            sort_criteria: The sort criteria to update, or None to
+            update every sort order.
+        """
+        for key, order in list(self.__sort_orders.items()):
+            criteria, genre_name = key
+            if self.__sort_order_contains(game, criteria, genre_name,
+                                          sort_criteria):
+                position = self.__sort_position(order, criteria, game)
+                self.__sort_orders[key] = (order[:position] + [game.game_id]
+                                           + order[position:])
+
+    def __unsort_game(self, game: Game, sort_criteria=None):
+        """
+        Remove a game from the sort orders built so far that contain it.
+        Must be called before the sort keys of the game change.
+
+        Args:
+            game (Game): The game to remove.
+            sort_criteria: The sort criteria to update, or None to
+            update every sort order.
+        """
+        for key, order in list(self.__sort_orders.items()):
+            criteria, genre_name = key
+            if self.__sort_order_contains(game, criteria, genre_name,
+                                          sort_criteria):
+                position = self.__sort_position(order, criteria, game)
+                if position < len(order) and order[position] == game.game_id:
+                    self.__sort_orders[key] = (order[:position]
+                                               + order[position + 1:])
+
+    @staticmethod
+    def __sort_order_contains(game: Game, criteria, genre_name,
+                              sort_criteria) -> bool:
+        """
+        Returns:
+            bool: True if the sort order for criteria and genre_name
+            holds game and is one of sort_criteria.
+        """
+        if sort_criteria is not None and criteria not in sort_criteria:
+            return False
+        return genre_name is None or Genre(genre_name) in game.genres
+
+    def __sort_position(self, order, criteria, game: Game) -> int:
+        """
+        Returns:
+            int: The position of game in the sort order, found by
+            binary search on the sort key of criteria.
+        """
+        sort_key = SORT_KEYS[criteria]
+        games_by_id = self.__games_by_id
+        return bisect_left(order, sort_key(game),
+                           key=lambda game_id: sort_key(games_by_id[game_id]))
+
+    def __games_for_postings(self, postings) -> List[Game]:
+        """
+        Args:
+            postings: A sorted list of game IDs.
+
+        Returns:
+            List[Game]: The games of the posting list, in catalog order.
+            IDs of games removed since the list was read are skipped.
+        """
+        return [game for game in map(self.__games_by_id.get, postings)
+                if game is not None]
 
     def get_games(self) -> List[Game]:
         """
@@ -66,28 +430,39 @@ class MemoryRepository(AbstractRepository, ABC):
             The game with the specified ID, if found. If no game is
             found with the specified ID, None is returned.
         """
-        for game in self.__games:
-            if game.game_id == game_id:
-                return game
-        return None
+        return self.__games_by_id.get(game_id)
+
+    def get_games_by_ids(self, game_ids) -> List[Game]:
+        """
+        Args:
+            game_ids: An iterable of IDs of the games to retrieve.
+
+        Returns:
+            List[Game]: The games with the specified IDs, in the order
+            the IDs were given. IDs with no matching game are skipped.
+        """
+        games_by_id = self.__games_by_id
+        return [games_by_id[game_id] for game_id in game_ids
+                if game_id in games_by_id]
 
     def get_similar_games(self, genre_list):
         """
         Args:
-            genre_list (List[str]): A list of genres to search for
+            genre_list (List[Genre]): A list of genres to search for
             similar games.
 
         Returns:
             List[Game]: A list of games that have at least one genre
-            in common with the genre_list.
+            in common with the genre_list, in catalog order.
         """
-        similar_game_list = []
-        for game in self.__games:
-            for genre in game.genres:
-                if genre in genre_list:
-                    similar_game_list.append(game)
-                    break
-        return similar_game_list
+        genre_names = {genre.genre_name if isinstance(genre, Genre)
+                       else genre for genre in genre_list}
+        postings = [self.__genre_postings[genre_name]
+                    for genre_name in genre_names
+                    if genre_name in self.__genre_postings]
+        if not postings:
+            return []
+        return self.__games_for_postings(merge_postings(*postings))
 
     def search_games_by_title(self, game_title: str) -> List[Game]:
         """
@@ -96,13 +471,12 @@ class MemoryRepository(AbstractRepository, ABC):
             search for.
 
         Returns:
-            A list of Game objects that match the given game_title.
+            A list of Game objects whose title contains game_title,
+            ignoring case.
 
         """
-        game_title = game_title.lower()
-        game_results = [game for game in self.__games if game_title
-                        in game.title.lower()]
-        return game_results
+        return self.__games_for_postings(
+            self.__title_index.search(game_title))
 
     def search_games_by_publisher(self, publisher: str) -> List[Game]:
         """
@@ -112,44 +486,85 @@ class MemoryRepository(AbstractRepository, ABC):
             publisher (str): The name of the publisher to search for.
 
         Returns:
-            List[Game]: A list of games that match the publisher.
+            List[Game]: A list of games whose publisher name contains
+            publisher, ignoring case.
+
+        """
+        return self.__games_for_postings(
+            self.__publisher_index.search(publisher))
 
+    def search_games_fuzzy(self, query: str, limit: int = None) -> List[Game]:
         """
-        publisher = publisher.lower()
-        game_results = [game for game in self.__games if publisher
-                        in game.publisher.publisher_name.lower()]
-        return game_results
+        Searches the games by title and publisher, tolerating typos and
+        spelling variants, with the trigram indexes (see
+        TrigramIndex.similar).
+
+        Args:
+            query (str): The title or publisher name to search for.
+            limit (int): The most games to return, or None for all
+            matches.
+
+        Returns:
+            List[Game]: The games whose title or publisher is similar
+            to query, most similar first.
+        """
+        scores = dict(self.__publisher_index.similar(query))
+        for game_id, score in self.__title_index.similar(query):
+            scores[game_id] = max(score, scores.get(game_id, 0))
+        ranked = sorted(scores, key=lambda game_id: (-scores[game_id],
+                                                     game_id))
+        return self.get_games_by_ids(ranked[:limit])
 
     def search_games_by_category(self, category: str) -> List[Game]:
         """
-        Searches for games by category.
+        Searches for games by category. Categories are matched case
+        insensitively and may be combined with AND, OR and NOT, e.g.
+        "Single-player AND Steam Cloud NOT VR Support".
 
         Args:
-            category: A string representing the category to search for.
+            category: A string representing the category query.
 
         Returns:
-            A list of Game objects that belong to the specified category.
+            A list of Game objects that match the category query.
 
+        Raises:
+            TagQueryException: If the category query is malformed.
         """
-        category = category.lower()
-        game_results = [game for game in self.__games if category
-                        in [category.lower() for category in game.categories]]
-        return game_results
+        return self.__search_postings(self.__category_postings, category)
 
     def search_games_by_tags(self, tags: str) -> List[Game]:
         """
-        Searches for games based on provided tags.
+        Searches for games based on provided tags. Tags are matched case
+        insensitively and may be combined with AND, OR and NOT, e.g.
+        "Roguelike AND Co-op NOT Early Access".
 
         Args:
-            tags (str): A string representing the tags to search for.
+            tags (str): A string representing the tag query.
 
         Returns:
-            List[Game]: A list of games that match the provided tags.
+            List[Game]: A list of games that match the tag query.
+
+        Raises:
+            TagQueryException: If the tag query is malformed.
         """
-        tags = tags.lower()
-        game_results = [game for game in self.__games if tags
-                        in [tag.lower() for tag in game.tags]]
-        return game_results
+        return self.__search_postings(self.__tag_postings, tags)
+
+    def __search_postings(self, index: dict, query: str) -> List[Game]:
+        """
+        Evaluate a tag query against a case folded posting index.
+
+        Args:
+            index (dict): The posting index to search.
+            query (str): The tag query.
+
+        Returns:
+            List[Game]: The matching games, in catalog order.
+        """
+        postings = evaluate_tag_query(
+            query,
+            lambda term: index.get(term.casefold(), []),
+            lambda: [game.game_id for game in self.__games])
+        return self.__games_for_postings(postings)
 
     def add_genre(self, genre: Genre):
         """
@@ -157,8 +572,346 @@ class MemoryRepository(AbstractRepository, ABC):
             genre: The genre to be added to the repository.
 
         """
-        if isinstance(genre, Genre) and genre not in self.__genres:
-            insort_left(self.__genres, genre)
+        if not isinstance(genre, Genre):
+            return
+        with self.__catalog_lock:
+            genre = self.__registry.intern_genre(genre)
+            if genre not in self.__genre_set:
+                self.__genre_set.add(genre)
+                genres = list(self.__genres)
+                insort_left(genres, genre)
+                self.__genres = genres
+                self.__genre_postings.setdefault(genre.genre_name, [])
+
+    def get_number_of_genre_games(self, target_genre) -> int:
+        """
+        Args:
+            target_genre: The genre, or name of the genre, to count.
+
+        Returns:
+            int: The number of games that have the specified genre.
+        """
+        if isinstance(target_genre, Genre):
+            target_genre = target_genre.genre_name
+        return len(self.__genre_postings.get(target_genre, []))
+
+    def get_sorted_games(self, sort_criteria='title', genre=None, offset=0,
+                         limit=None, descending=False) -> List[Game]:
+        """
+        Get a page of the catalog, or of the games of one genre, in a
+        sort order.
+
+        Sort orders are built once per criteria and genre and then kept
+        up to date as games and reviews are added, so a page costs
+        O(limit) rather than a sort of the whole catalog.
+
+        Args:
+            sort_criteria (str): One of the keys of SORT_KEYS. Games are
+            sorted by title, game ID, release date and price in
+            ascending order, and by review count and average rating in
+            descending order.
+            genre: The genre, or name of the genre, to restrict the
+            games to, or None for the whole catalog.
+            offset (int): The number of games to skip.
+            limit (int): The maximum number of games to return, or None
+            for all games after offset.
+            descending (bool): Whether to reverse the sort order.
+
+        Returns:
+            List[Game]: The requested page of games.
+        """
+        if isinstance(genre, Genre):
+            genre = genre.genre_name
+        order = self.__sort_order(sort_criteria, genre)
+        length = len(order)
+        stop = length if limit is None else min(length, offset + limit)
+        if descending:
+            game_ids = order[max(length - stop, 0):max(length - offset, 0)]
+            game_ids.reverse()
+        else:
+            game_ids = order[offset:stop]
+        return self.__games_for_postings(game_ids)
+
+    def __sort_order(self, sort_criteria, genre_name) -> List[int]:
+        """
+        Args:
+            sort_criteria (str): One of the keys of SORT_KEYS.
+            genre_name (str): The name of a genre, or None for the whole
+            catalog.
+
+        Returns:
+            List[int]: The game IDs of the genre or catalog in sort
+            order, built on first use.
+        """
+        if sort_criteria not in SORT_KEYS:
+            raise ValueError(f'Unknown sort criteria {sort_criteria}')
+        order = self.__sort_orders.get((sort_criteria, genre_name))
+        if order is not None:
+            return order
+        with self.__catalog_lock:
+            order = self.__sort_orders.get((sort_criteria, genre_name))
+            if order is None:
+                if genre_name is None:
+                    games = self.__games
+                else:
+                    games = self.__games_for_postings(
+                        self.__genre_postings.get(genre_name, []))
+                order = [game.game_id for game in
+                         sorted(games, key=SORT_KEYS[sort_criteria])]
+                self.__sort_orders[(sort_criteria, genre_name)] = order
+            return order
+
+    def filter_game_ids(self, sort_criteria='title', genre=None,
+                        min_price=None, max_price=None, released_from=None,
+                        released_to=None, descending=False,
+                        facets=None) -> np.ndarray:
+        """
+        Filter and sort the catalog with vectorized operations on its
+        ColumnarCatalog.
+
+        Args:
+            sort_criteria (str): One of the keys of SORT_KEYS, with the
+            same orders as get_sorted_games.
+            genre: The genre, or name of the genre, to restrict the
+            games to, or None for the whole catalog.
+            min_price (float): The lowest price, inclusive, or None.
+            max_price (float): The highest price, inclusive, or None.
+            released_from (date): The earliest release date, inclusive,
+            or None.
+            released_to (date): The latest release date, inclusive, or
+            None.
+            descending (bool): Whether to reverse the sort order.
+            facets (dict): The values chosen in each of the
+            FACET_DIMENSIONS, see FacetIndex.select, or None.
+
+        Returns:
+            np.ndarray: The IDs of the matching games in sort order.
+        """
+        if sort_criteria not in SORT_KEYS:
+            raise ValueError(f'Unknown sort criteria {sort_criteria}')
+        if isinstance(genre, Genre):
+            genre = genre.genre_name
+        columns = self.__column_store()
+        mask = columns.mask(genre, min_price, max_price, released_from,
+                            released_to, facets)
+        return columns.sorted_ids(sort_criteria, mask, descending)
+
+    def get_catalog_summary(self, genre=None, min_price=None, max_price=None,
+                            released_from=None, released_to=None,
+                            facets=None) -> dict:
+        """
+        Aggregate the games matching the filters of filter_game_ids.
+
+        Returns:
+            dict: See ColumnarCatalog.summary.
+        """
+        if isinstance(genre, Genre):
+            genre = genre.genre_name
+        columns = self.__column_store()
+        return columns.summary(columns.mask(genre, min_price, max_price,
+                                            released_from, released_to,
+                                            facets))
+
+    def get_facet_counts(self, genre=None, min_price=None, max_price=None,
+                         released_from=None, released_to=None,
+                         facets=None) -> dict:
+        """
+        Count the games matching the filters of filter_game_ids for
+        every value of every facet dimension, with popcounts on the
+        bitmaps of the FacetIndex.
+
+        The counts of a genre without other filters are cached by the
+        ColumnarCatalog, which is rebuilt when the catalog changes.
+
+        Returns:
+            dict: See FacetIndex.counts.
+        """
+        if isinstance(genre, Genre):
+            genre = genre.genre_name
+        return self.__column_store().facet_counts(
+            genre, min_price, max_price, released_from, released_to, facets)
+
+    def released_between(self, released_from=None, released_to=None,
+                         offset=0, limit=None,
+                         newest_first=False) -> List[Game]:
+        """
+        Get a page of the games released in a date range, found by
+        binary search over the release dates of the ColumnarCatalog.
+
+        Args:
+            released_from (date): The earliest release date, inclusive,
+            or None.
+            released_to (date): The latest release date, inclusive, or
+            None.
+            offset (int): The number of games to skip.
+            limit (int): The maximum number of games to return, or None
+            for all games after offset.
+            newest_first (bool): Whether to return the most recent
+            games first.
+
+        Returns:
+            List[Game]: The requested page of games in release date
+            order, ties in game ID order. Games without a release date
+            are left out.
+        """
+        game_ids = self.__column_store().released_between(
+            released_from, released_to, newest_first)
+        stop = None if limit is None else offset + limit
+        return self.get_games_by_ids(game_ids[offset:stop].tolist())
+
+    def count_released_between(self, released_from=None,
+                               released_to=None) -> int:
+        """
+        Count the games released in a date range, with the binary search
+        of released_between.
+
+        Args:
+            released_from (date): The earliest release date, inclusive,
+            or None.
+            released_to (date): The latest release date, inclusive, or
+            None.
+
+        Returns:
+            int: The number of games released in the date range. Games
+            without a release date are left out.
+        """
+        return len(self.__column_store().released_between(released_from,
+                                                          released_to))
+
+    def __column_store(self) -> ColumnarCatalog:
+        """
+        Returns:
+            ColumnarCatalog: The columns of the catalog, rebuilt on first
+            use after the catalog changed.
+        """
+        columns = self.__columns
+        if columns is not None:
+            return columns
+        with self.__catalog_lock:
+            if self.__columns is None:
+                self.__columns = ColumnarCatalog(self.__games)
+            return self.__columns
+
+    def search_games_full_text(self, query: str,
+                               limit: int = None) -> List[Game]:
+        """
+        Searches the titles, publisher names and descriptions of the
+        games with a FullTextIndex, ranked like the FTS5 searches of the
+        database repository.
+
+        Args:
+            query (str): The words to search for. Every word must start
+            a word of the game.
+            limit (int): The most games to return, or None for all
+            matches.
+
+        Returns:
+            List[Game]: The matching games, best BM25 score first.
+        """
+        games_by_id = self.__games_by_id
+        game_ids = self.__text_store().search(query, limit=limit)
+        return [games_by_id[game_id] for game_id in game_ids
+                if game_id in games_by_id]
+
+    def __text_store(self) -> FullTextIndex:
+        """
+        Returns:
+            FullTextIndex: The full-text index of the catalog, rebuilt
+            on first use after the catalog changed.
+        """
+        index = self.__text_index
+        if index is not None:
+            return index
+        with self.__catalog_lock:
+            if self.__text_index is None:
+                self.__text_index = FullTextIndex(self.__games)
+            return self.__text_index
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """
+        Autocomplete a search with the titles, publishers and tags that
+        start with a prefix, using a PrefixIndex.
+
+        Args:
+            prefix (str): The text typed so far.
+            limit (int): The most suggestions to return, at most
+            MAX_SUGGESTIONS.
+
+        Returns:
+            List[Suggestion]: The matching suggestions, most popular
+            first. Titles are ranked by their number of reviews when the
+            index was built, publishers and tags by their number of
+            games.
+        """
+        return self.__prefix_store().search(prefix, limit)
+
+    def __prefix_store(self) -> PrefixIndex:
+        """
+        Returns:
+            PrefixIndex: The suggestions of the catalog, rebuilt on
+            first use after the catalog changed.
+        """
+        index = self.__prefix_index
+        if index is not None:
+            return index
+        with self.__catalog_lock:
+            if self.__prefix_index is None:
+                self.__prefix_index = PrefixIndex(self.__suggestions())
+            return self.__prefix_index
+
+    def __suggestions(self) -> List[Suggestion]:
+        """
+        Returns:
+            List[Suggestion]: A suggestion for every game title, and for
+            every publisher and tag (in the case first seen) with the
+            number of games that have it.
+        """
+        suggestions = []
+        publishers = dict()
+        for game in self.__games:
+            suggestions.append(Suggestion(game.title, 'title', game.game_id,
+                                          len(game.reviews)))
+            name = publisher_name(game)
+            if name:
+                publishers[name] = publishers.get(name, 0) + 1
+        suggestions.extend(Suggestion(name, 'publisher', None, count)
+                           for name, count in publishers.items())
+        suggestions.extend(Suggestion(text, 'tag', None, count)
+                           for text, count in self.__tag_counts().values())
+        return suggestions
+
+    def __tag_counts(self) -> dict:
+        """
+        Returns:
+            dict: The tag in the case first seen and the number of games
+            with it, by case folded tag.
+        """
+        tags = dict()
+        for game in self.__games:
+            for tag in game.tags:
+                key = tag.casefold()
+                text, count = tags.get(key, (tag, 0))
+                tags[key] = (text, count + 1)
+        return tags
+
+    def get_tags(self) -> List[str]:
+        """
+        Returns:
+            List[str]: The tags of the games in the repository, once per
+            tag ignoring case, in alphabetical order ignoring case.
+        """
+        return [text for _, (text, _) in sorted(self.__tag_counts().items())]
+
+    def get_tag_counts(self) -> dict:
+        """
+        Returns:
+            dict: The number of games by tag, most common first and
+            ties in alphabetical order ignoring case. Tags differing
+            only in case are counted as one.
+        """
+        ranked = sorted(self.__tag_counts().items(),
+                        key=lambda item: (-item[1][1], item[0]))
+        return {text: count for _, (text, count) in ranked}
 
     def get_genres(self) -> List[Genre]:
         """
@@ -175,27 +928,28 @@ class MemoryRepository(AbstractRepository, ABC):
             target_genre: The genre of games to search for.
 
         Returns:
-            List[Game]: A list of games that have the specified genre.
+            List[Game]: A list of games that have the specified genre,
+            in catalog order.
 
         """
-        matching_game_genre = []
-        for game in self.__games:
-            if Genre(target_genre) in game.genres:
-                matching_game_genre.append(game)
-            else:
-                pass
-
-        return matching_game_genre
+        if isinstance(target_genre, Genre):
+            target_genre = target_genre.genre_name
+        return self.__games_for_postings(
+            self.__genre_postings.get(target_genre, []))
 
     def add_user(self, user: User) -> None:
         """
-        Add a user to the repository.
+        Add a user to the repository. Users are stored by their
+        normalised (lower case, stripped) username.
 
         :param user:     The user object to add to the repository.
         :type user:      User
         :return:         None
+        :raise RepositoryException: If the username is already taken.
         """
-        self.__users.append(user)
+        if self.__users.setdefault(user.username, user) is not user:
+            raise RepositoryException(
+                f'Username {user.username} is already taken.')
 
     def get_user(self, username: str) -> (User, None):
         """
@@ -209,8 +963,7 @@ class MemoryRepository(AbstractRepository, ABC):
 
             None: If no user with the specified username exists.
         """
-        return next((user for user in self.__users if user.username
-                     == username.lower().strip()), None)
+        return self.__users.get(username.lower().strip())
 
     def add_publisher(self, publisher) -> None:
         """
@@ -222,8 +975,11 @@ class MemoryRepository(AbstractRepository, ABC):
         Returns:
             None
         """
-        if publisher not in self.__publishers:
-            self.__publishers.append(publisher)
+        with self.__catalog_lock:
+            publisher = self.__registry.intern_publisher(publisher)
+            if publisher not in self.__publisher_set:
+                self.__publisher_set.add(publisher)
+                self.__publishers.append(publisher)
 
     def get_publishers(self) -> list[Publisher]:
         """
@@ -246,7 +1002,8 @@ class MemoryRepository(AbstractRepository, ABC):
             to add to their wishlist.
 
         """
-        user.get_wishlist().add_wish_game(game)
+        with self.__user_locks.lock_for(user.username):
+            user.get_wishlist().add_wish_game(game)
 
     def remove_wish_game(self, user, game):
         """
@@ -257,7 +1014,8 @@ class MemoryRepository(AbstractRepository, ABC):
             their wishlist.
             game: The game to be removed from the user's wishlist.
         """
-        user.get_wishlist().remove_game(game)
+        with self.__user_locks.lock_for(user.username):
+            user.get_wishlist().remove_game(game)
 
     def get_wishlist(self, user):
         """
@@ -267,9 +1025,12 @@ class MemoryRepository(AbstractRepository, ABC):
 
         Returns:
             List of Game objects representing the games in the user's
-            wishlist.
+            wishlist, as currently stored in the catalog. Games that
+            were removed from the catalog are returned as they were.
         """
-        return user.get_wishlist().list_of_games()
+        games_by_id = self.__games_by_id
+        return [games_by_id.get(game.game_id, game)
+                for game in user.get_wishlist().list_of_games()]
 
     def add_review(self, user, game, rating, review):
         """
@@ -282,16 +1043,20 @@ class MemoryRepository(AbstractRepository, ABC):
 
         """
         new_review = Review(user, game, rating, review)
-        if len(game.reviews) == 0:
-            user.add_review(new_review)
-            game.add_review(new_review)
-            return True
-        else:
+        with self.__game_locks.lock_for(game.game_id):
             for review in game.reviews:
                 if user == review.user:
                     return False
-        user.add_review(new_review)
-        game.add_review(new_review)
+            with self.__catalog_lock:
+                indexed = self.__games_by_id.get(game.game_id) is game
+                if indexed:
+                    self.__unsort_game(game, REVIEW_SORT_CRITERIA)
+                user.add_review(new_review)
+                game.add_review(new_review)
+                if indexed:
+                    self.__sort_game(game, REVIEW_SORT_CRITERIA)
+                    if self.__columns is not None:
+                        self.__columns.update_reviews(game)
         return True
 
     def get_user_review(self, user):
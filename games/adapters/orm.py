@@ -1,31 +1,68 @@
-from sqlalchemy import (Table, MetaData, Column, Integer, String, ForeignKey,
-                        JSON)
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from types import MemberDescriptorType
+
+from sqlalchemy import (Table, MetaData, Column, Computed, Index, Integer,
+                        String, ForeignKey, bindparam, event, func, inspect,
+                        select)
 from sqlalchemy.orm import mapper, relationship
+from sqlalchemy.schema import CreateIndex
 
+from games.adapters.indexes import fold_text, trigrams
 from games.domainmodel.model import *
+from games.domainmodel.model import PLATFORM_FLAGS, RELEASE_DATE_FORMAT
 
 metadata = MetaData()
 
+# The SQL expression of normalize_username, computing username_key.
+USERNAME_KEY_SQL = 'lower(trim(username))'
+
 users_table = Table('user', metadata,
                     Column('id', Integer, primary_key=True,
                            autoincrement=True),
                     Column('username', String(255), unique=True,
                            nullable=False),
-                    Column('password', String(255), nullable=False))
+                    Column('password', String(255), nullable=False),
+                    # The normalized username, so users are looked up
+                    # ignoring case through an index.
+                    Column('username_key', String(255),
+                           Computed(USERNAME_KEY_SQL, persisted=True)),
+                    Index('ix_user_username_key', 'username_key',
+                          unique=True))
 
 games_table = Table('game', metadata,
                     Column('id', Integer, primary_key=True),
                     Column('game_title', String(255), nullable=False),
-                    Column('price', Integer, nullable=False),
+                    # Price sorts and ranges are index lookups.
+                    Column('price', Integer, nullable=False, index=True),
                     Column('release_date', String(15), nullable=False),
+                    # The proleptic Gregorian ordinal of release_date, so
+                    # date sorts and ranges are index lookups.
+                    Column('release_ordinal', Integer, nullable=False,
+                           server_default='0', index=True),
                     Column('description', String(1024)),
                     Column('publisher',
-                           ForeignKey('publisher.publisher_name')),
+                           ForeignKey('publisher.publisher_name'),
+                           index=True),
                     Column('image_url', String(1024), nullable=False),
                     Column('website_url', String(1024)),
                     Column('video_url', String(1024)),
-                    Column('tags', String(1024), nullable=False),
-                    Column('system_dict', JSON), )
+                    # The platform flags, indexed so facet counts read
+                    # them from the index rather than the game rows.
+                    Column('platforms', Integer, nullable=False,
+                           server_default='0', index=True),
+                    # The title and publisher name folded as by
+                    # fold_text (see search_keys), so prefix searches
+                    # ignoring case and accents (see
+                    # SqlAlchemyRepository.suggest) are range lookups.
+                    Column('title_key', String(255), nullable=False,
+                           server_default='', index=True),
+                    Column('publisher_key', String(255), nullable=False,
+                           server_default='', index=True), )
+
+# Titles sorted ignoring case are read in the order of this index.
+Index('ix_game_title_lower', func.lower(games_table.c.game_title))
 
 genres_table = Table('genre', metadata,
                      Column('genre_name', String(255), nullable=False,
@@ -36,7 +73,51 @@ game_genres_table = Table('game_genres', metadata,
                                  autoincrement=True),
                           Column('game_id', ForeignKey('game.id')),
                           Column('genre_name',
-                                 ForeignKey('genre.genre_name')))
+                                 ForeignKey('genre.genre_name')),
+                          # The genres of a game, and the games of a
+                          # genre, are read from the indexes alone.
+                          Index('ix_game_genres_game_id_genre_name',
+                                'game_id', 'genre_name'),
+                          Index('ix_game_genres_genre_name_game_id',
+                                'genre_name', 'game_id'))
+
+# The tags of the games, with the case folded tag_key that tag searches
+# look up.
+tags_table = Table('tag', metadata,
+                   Column('tag_name', String(255), nullable=False,
+                          primary_key=True),
+                   Column('tag_key', String(255), nullable=False,
+                          index=True))
+
+game_tags_table = Table('game_tags', metadata,
+                        Column('id', Integer, primary_key=True,
+                               autoincrement=True),
+                        Column('game_id', ForeignKey('game.id')),
+                        Column('tag_name', ForeignKey('tag.tag_name')),
+                        # The tags of a game, and the games with a
+                        # tag, are read from the indexes alone.
+                        Index('ix_game_tags_game_id_tag_name',
+                              'game_id', 'tag_name'),
+                        Index('ix_game_tags_tag_name_game_id',
+                              'tag_name', 'game_id'))
+
+# The categories of the games, with the case folded category_key that
+# category searches look up.
+game_categories_table = Table('game_categories', metadata,
+                              Column('id', Integer, primary_key=True,
+                                     autoincrement=True),
+                              Column('game_id', ForeignKey('game.id')),
+                              Column('category_name', String(255),
+                                     nullable=False),
+                              Column('category_key', String(255),
+                                     nullable=False),
+                              # The categories of a game, and the games
+                              # in a category, are read from the
+                              # indexes alone.
+                              Index('ix_game_categories_game_id_name',
+                                    'game_id', 'category_name'),
+                              Index('ix_game_categories_key_game_id',
+                                    'category_key', 'game_id'))
 
 publishers_table = Table('publisher', metadata,
                          Column('publisher_name', String(255),
@@ -46,21 +127,434 @@ publishers_table = Table('publisher', metadata,
 reviews_table = Table('review', metadata,
                       Column('id', Integer, primary_key=True),
                       Column('user', ForeignKey('user.id')),
-                      Column('game', ForeignKey('game.id')),
+                      Column('game', ForeignKey('game.id'), index=True),
                       Column('rating', Integer, nullable=False),
                       Column('comment', String(1024), nullable=False),
-                      Column('timestamp', String(30), nullable=False))
+                      Column('timestamp', String(30), nullable=False),
+                      # The reviews of a user, and the review of a game
+                      # by a user.
+                      Index('ix_review_user_game', 'user', 'game'))
+
+# The trigrams of the folded title and publisher name of every game,
+# read by fuzzy searches (see SqlAlchemyRepository.search_games_fuzzy).
+search_trigrams_table = Table('search_trigrams', metadata,
+                              Column('trigram', String(12),
+                                     primary_key=True),
+                              Column('field', String(10), primary_key=True),
+                              Column('game_id', ForeignKey('game.id'),
+                                     primary_key=True, index=True))
 
 wishlists_table = Table('wishlist', metadata,
                         Column('id', Integer, primary_key=True),
-                        Column('user', ForeignKey('user.id')))
+                        Column('user', ForeignKey('user.id'), index=True))
 
 wishlist_games_table = Table('wishlist_games', metadata,
                              Column('id', Integer, primary_key=True,
                                     autoincrement=True),
                              Column('wishlist_id',
                                     ForeignKey('wishlist.id')),
-                             Column('game_id', ForeignKey('game.id')))
+                             Column('game_id', ForeignKey('game.id'),
+                                    index=True),
+                             Index('ix_wishlist_games_wishlist_id_game_id',
+                                   'wishlist_id', 'game_id'))
+
+
+def normalize_username(username: str) -> str:
+    """
+    Args:
+        username (str): A username, as typed.
+
+    Returns:
+        str: The username as stored in username_key: stripped and in
+        lower case, as User stores usernames.
+    """
+    return username.strip().lower() if isinstance(username, str) else ''
+
+
+def tag_key(tag: str) -> str:
+    """
+    Args:
+        tag (str): A tag.
+
+    Returns:
+        str: The tag_key of the tag: case folded, as the memory
+        repository matches tags.
+    """
+    return tag.casefold()
+
+
+def category_key(category: str) -> str:
+    """
+    Args:
+        category (str): A category.
+
+    Returns:
+        str: The category_key of the category: case folded, as the
+        memory repository matches categories.
+    """
+    return category.casefold()
+
+
+class GameTag:
+    """
+    A row of game_tags, linking a game to one of its tags.
+    """
+
+    def __init__(self, tag_name: str) -> None:
+        self.tag_name = tag_name
+
+
+class GameCategory:
+    """
+    A row of game_categories, linking a game to one of its categories.
+    """
+
+    def __init__(self, category_name: str) -> None:
+        self.category_name = category_name
+
+
+class GameLinks:
+    """
+    A set of strings of mapped games stored as link rows, as the tags
+    and categories are. A game built in memory keeps the set in a plain
+    set, as an unmapped game does; a game loaded from the database
+    reads the set from its links on first use. The repository writes
+    the links of new and updated games itself.
+    """
+
+    def __init__(self, links: str, name: str) -> None:
+        """
+        Args:
+            links (str): The relationship of Game to the link rows.
+            name (str): The attribute of the link rows holding the
+            strings.
+        """
+        self.__links = links
+        self.__name = name
+        self.__key = links + '_set'
+
+    def __get__(self, game, owner=None):
+        if game is None:
+            return self
+        values = game.__dict__.get(self.__key)
+        if values is None:
+            values = {getattr(link, self.__name)
+                      for link in getattr(game, self.__links)}
+            game.__dict__[self.__key] = values
+        return values
+
+    def __set__(self, game, values) -> None:
+        game.__dict__[self.__key] = values
+
+
+# The columns later versions added to existing tables, with the SQL
+# that adds each of them. upgrade_schema fills in their values.
+ADDED_COLUMNS = {
+    ('game', 'release_ordinal'): "INTEGER NOT NULL DEFAULT '0'",
+    ('game', 'platforms'): "INTEGER NOT NULL DEFAULT '0'",
+    ('game', 'title_key'): "VARCHAR(255) NOT NULL DEFAULT ''",
+    ('game', 'publisher_key'): "VARCHAR(255) NOT NULL DEFAULT ''",
+    # SQLite cannot add a stored generated column to an existing table,
+    # so username_key is added as a virtual one; it holds the same
+    # values and its index is used the same way.
+    ('user', 'username_key'):
+        f'VARCHAR(255) GENERATED ALWAYS AS ({USERNAME_KEY_SQL}) VIRTUAL',
+}
+
+# The columns of older versions that are no longer stored: the tags,
+# which were never filled in, and the JSON platforms of each game.
+DROPPED_COLUMNS = {('game', 'tags'), ('game', 'system_dict')}
+
+
+class SchemaUpgradeException(Exception):
+    """
+    An exception raised when a database cannot be brought up to the
+    current schema.
+    """
+    pass
+
+
+def release_ordinal(release_date) -> int:
+    """
+    Args:
+        release_date: A release date in RELEASE_DATE_FORMAT.
+
+    Returns:
+        int: The release_ordinal of the date, or 0 if it is not a date.
+    """
+    try:
+        return datetime.strptime(release_date,
+                                 RELEASE_DATE_FORMAT).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+
+def platforms_from_system_dict(system_dict) -> int:
+    """
+    Args:
+        system_dict: The JSON system_dict column of older versions,
+        e.g. '{"windows": true, "mac": false, "linux": false}'.
+
+    Returns:
+        int: The platforms bitfield of the same platforms.
+    """
+    systems = json.loads(system_dict) if system_dict else None
+    if not isinstance(systems, dict):
+        return 0
+    return sum(flag for platform, flag in PLATFORM_FLAGS.items()
+               if systems.get(platform))
+
+
+def search_keys(title, publisher) -> dict:
+    """
+    Returns:
+        dict: The title_key and publisher_key of a game with a title and
+        publisher name.
+    """
+    return {'title_key': fold_text(title or ''),
+            'publisher_key': fold_text(publisher or '')}
+
+
+def search_trigram_rows(game_id: int, title, publisher) -> list:
+    """
+    Returns:
+        list: The search_trigrams_table rows of a game, for the
+        trigrams of its folded title and publisher name.
+    """
+    return [{'trigram': trigram, 'field': field, 'game_id': game_id}
+            for field, text in (('title', title), ('publisher', publisher))
+            for trigram in trigrams(fold_text(text or ''))]
+
+
+def plan_schema_upgrade(engine) -> tuple:
+    """
+    Compare the tables of a database with the current schema.
+
+    Returns:
+        tuple: The (table, column) pairs of ADDED_COLUMNS and of
+        DROPPED_COLUMNS to add and drop, and the names of the tables
+        of the current schema the database does not have.
+
+    Raises:
+        SchemaUpgradeException: If a table is missing or has a column
+        upgrade_schema cannot add or drop, or the columns to drop need
+        a newer SQLite.
+    """
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    added, dropped = [], []
+    for table in metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        columns = {column['name']
+                   for column in inspector.get_columns(table.name)}
+        for name in table.columns.keys():
+            if name in columns:
+                continue
+            if (table.name, name) not in ADDED_COLUMNS:
+                raise SchemaUpgradeException(
+                    f'Cannot add column {name} to table {table.name}')
+            added.append((table.name, name))
+        for name in sorted(columns - set(table.columns.keys())):
+            if (table.name, name) not in DROPPED_COLUMNS:
+                raise SchemaUpgradeException(
+                    f'Unknown column {name} in table {table.name}')
+            dropped.append((table.name, name))
+    if dropped and engine.dialect.name == 'sqlite' \
+            and engine.dialect.dbapi.sqlite_version_info < (3, 35, 0):
+        raise SchemaUpgradeException(
+            'Dropping columns needs SQLite 3.35 or newer')
+    missing = [table.name for table in metadata.sorted_tables
+               if table.name not in existing]
+    return added, dropped, missing
+
+
+def fill_game_columns(connection, rows: list) -> None:
+    """
+    Set columns of stored games.
+
+    Args:
+        connection: The connection of the schema transaction.
+        rows (list): A dict per game, holding its id and the values of
+        the columns to set. Every dict has the same keys.
+    """
+    if not rows:
+        return
+    columns = [name for name in rows[0] if name != 'id']
+    connection.execute(
+        games_table.update()
+        .where(games_table.c.id == bindparam('game_id'))
+        .values({name: bindparam(f'new_{name}') for name in columns}),
+        [{'game_id': row['id'],
+          **{f'new_{name}': row[name] for name in columns}}
+         for row in rows])
+
+
+@contextmanager
+def schema_transaction(engine):
+    """
+    Open a connection that runs DDL in a transaction.
+
+    pysqlite commits before every DDL statement, so on SQLite its
+    implicit transactions are turned off and the transaction is begun
+    explicitly, which makes the schema changes atomic.
+
+    Yields:
+        The connection, committed on success and rolled back if the
+        block raises.
+    """
+    with engine.connect() as connection:
+        if engine.dialect.name != 'sqlite':
+            with connection.begin():
+                yield connection
+            return
+        dbapi_connection = connection.connection.dbapi_connection
+        isolation_level = dbapi_connection.isolation_level
+        dbapi_connection.isolation_level = None
+        try:
+            with connection.begin():
+                connection.exec_driver_sql('BEGIN')
+                yield connection
+        finally:
+            dbapi_connection.isolation_level = isolation_level
+
+
+def upgrade_schema(engine) -> None:
+    """
+    Bring a database created by an older version up to the current
+    schema, in one transaction: add the ADDED_COLUMNS and fill them in
+    (release ordinals from the release dates, platforms from the JSON
+    system_dict column, the folded search keys from the titles and
+    publisher names), drop the DROPPED_COLUMNS, create the missing
+    tables and fill in the search trigrams, and create the missing
+    indexes.
+
+    The whole schema is checked before anything is changed, and a
+    failure leaves the database as it was.
+
+    Args:
+        engine: The engine of the database.
+
+    Raises:
+        SchemaUpgradeException: See plan_schema_upgrade.
+    """
+    added, dropped, missing = plan_schema_upgrade(engine)
+    with schema_transaction(engine) as connection:
+        for table, column in added:
+            connection.exec_driver_sql(
+                f'ALTER TABLE "{table}" ADD COLUMN {column} '
+                f'{ADDED_COLUMNS[(table, column)]}')
+        if ('game', 'release_ordinal') in added:
+            fill_game_columns(connection, [
+                {'id': game_id, 'release_ordinal': release_ordinal(date)}
+                for game_id, date in connection.exec_driver_sql(
+                    'SELECT id, release_date FROM game')])
+        if ('game', 'platforms') in added \
+                and ('game', 'system_dict') in dropped:
+            fill_game_columns(connection, [
+                {'id': game_id,
+                 'platforms': platforms_from_system_dict(system_dict)}
+                for game_id, system_dict in connection.exec_driver_sql(
+                    'SELECT id, system_dict FROM game')])
+        if ('game', 'title_key') in added:
+            fill_game_columns(connection, [
+                {'id': game_id, **search_keys(title, publisher)}
+                for game_id, title, publisher in connection.exec_driver_sql(
+                    'SELECT id, game_title, publisher FROM game')])
+        for table, column in dropped:
+            connection.exec_driver_sql(
+                f'ALTER TABLE "{table}" DROP COLUMN {column}')
+        metadata.create_all(connection)
+        if 'search_trigrams' in missing and 'game' not in missing:
+            rows = [row for game_id, title, publisher in connection.execute(
+                        select(games_table.c.id, games_table.c.game_title,
+                               games_table.c.publisher))
+                    for row in search_trigram_rows(game_id, title,
+                                                   publisher)]
+            if rows:
+                connection.execute(search_trigrams_table.insert(), rows)
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+# The SQLite FTS5 index of the titles, publisher names and descriptions
+# of the games, read by full-text searches. It is an external content
+# table over the game table, kept in step with it by triggers, so the
+# text is not stored twice. The columns are in FULL_TEXT_FIELDS order.
+FULL_TEXT_TABLE = 'search_games'
+
+FULL_TEXT_DDL = (
+    f"CREATE VIRTUAL TABLE {FULL_TEXT_TABLE} USING fts5("
+    "game_title, publisher, description, content='game', "
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER {FULL_TEXT_TABLE}_insert AFTER INSERT ON game BEGIN "
+    f"INSERT INTO {FULL_TEXT_TABLE}(rowid, game_title, publisher, "
+    "description) VALUES (new.id, new.game_title, new.publisher, "
+    "new.description); END",
+    f"CREATE TRIGGER {FULL_TEXT_TABLE}_delete AFTER DELETE ON game BEGIN "
+    f"INSERT INTO {FULL_TEXT_TABLE}({FULL_TEXT_TABLE}, rowid, game_title, "
+    "publisher, description) VALUES ('delete', old.id, old.game_title, "
+    "old.publisher, old.description); END",
+    f"CREATE TRIGGER {FULL_TEXT_TABLE}_update AFTER UPDATE ON game BEGIN "
+    f"INSERT INTO {FULL_TEXT_TABLE}({FULL_TEXT_TABLE}, rowid, game_title, "
+    "publisher, description) VALUES ('delete', old.id, old.game_title, "
+    "old.publisher, old.description); "
+    f"INSERT INTO {FULL_TEXT_TABLE}(rowid, game_title, publisher, "
+    "description) VALUES (new.id, new.game_title, new.publisher, "
+    "new.description); END",
+    # Index the games stored before the table was created.
+    f"INSERT INTO {FULL_TEXT_TABLE}({FULL_TEXT_TABLE}) VALUES ('rebuild')",
+)
+
+
+@event.listens_for(metadata, 'after_create')
+def create_full_text_table(target, connection, **kw):
+    """
+    Create the full-text index and its triggers after the tables, on
+    SQLite databases that do not have them yet.
+    """
+    if connection.dialect.name != 'sqlite':
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = ?",
+        (FULL_TEXT_TABLE,)).first()
+    if exists is None:
+        for statement in FULL_TEXT_DDL:
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(metadata, 'before_drop')
+def drop_full_text_table(target, connection, **kw):
+    """
+    Drop the full-text index before the tables. Its triggers go with
+    the game table.
+    """
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(
+            f'DROP TABLE IF EXISTS {FULL_TEXT_TABLE}')
+
+
+def restore_slots_on_clear(cls) -> None:
+    """
+    Mapping a slotted domain class replaces its slot descriptors with
+    instrumented attributes, and clearing the mappers deletes those, so
+    the instances of the class would keep their attributes in __dict__
+    from then on. Put the descriptors back once the class is
+    uninstrumented.
+
+    Args:
+        cls: A domain class about to be mapped.
+    """
+    slots = {name: value for name, value in vars(cls).items()
+             if isinstance(value, MemberDescriptorType)}
+    if not slots:
+        return
+
+    @event.listens_for(cls, 'class_uninstrument', once=True)
+    def restore_slots(uninstrumented):
+        for name, descriptor in slots.items():
+            setattr(uninstrumented, name, descriptor)
 
 
 def map_model_to_tables():
@@ -81,10 +575,18 @@ def map_model_to_tables():
     `_User__wishlist`.
     - `Game` class is mapped to the `games_table` with properties
     `_Game__game_id`, `_Game__game_title`, `_Game__price`,
-    `_Game__release_date`, `_Game__description`, `_Game__publisher`,
+    `_Game__release_date`, `_Game__release_ordinal`,
+    `_Game__description`, `_Game__publisher`,
     `_Game__image_url`, `_Game__website_url`, `_Game__video_url`,
-    `_Game__tags_string`, `_Game__publisher_id`, `_Game__system_dict`,
-    `_Game__genres`, `_Game__wishlist`, and `_Game__reviews`.
+    `_Game__publisher_id`, `_Game__platforms`, `_Game__genres`,
+    `_Game__tag_links`, `_Game__category_links`, `_Game__wishlist`,
+    and `_Game__reviews`. `_Game__tags` and `_Game__categories` are
+    replaced by GameLinks reading `_Game__tag_links` and
+    `_Game__category_links`.
+    - `GameTag` class is mapped to the `game_tags_table` with property
+    `tag_name`.
+    - `GameCategory` class is mapped to the `game_categories_table` with
+    property `category_name`.
     - `Genre` class is mapped to the `genres_table` with properties
     `_Genre__genre_name` and `_Genre__games`.
     - `Publisher` class is mapped to the `publishers_table` with
@@ -100,6 +602,9 @@ def map_model_to_tables():
     map_model_to_tables()
 
     """
+    for cls in (User, Game, Genre, Publisher, Review, Wishlist):
+        restore_slots_on_clear(cls)
+
     mapper(User, users_table, properties={
         '_User__username': users_table.c.username,
         '_User__password': users_table.c.password,
@@ -116,6 +621,7 @@ def map_model_to_tables():
         '_Game__game_title': games_table.c.game_title,
         '_Game__price': games_table.c.price,
         '_Game__release_date': games_table.c.release_date,
+        '_Game__release_ordinal': games_table.c.release_ordinal,
         '_Game__description': games_table.c.description,
         '_Game__publisher': relationship(Publisher, foreign_keys=[
             games_table.c.publisher],
@@ -123,17 +629,30 @@ def map_model_to_tables():
         '_Game__image_url': games_table.c.image_url,
         '_Game__website_url': games_table.c.website_url,
         '_Game__video_url': games_table.c.video_url,
-        '_Game__tags_string': games_table.c.tags,
         '_Game__publisher_id': games_table.c.publisher,
-        '_Game__system_dict': games_table.c.system_dict,
+        '_Game__platforms': games_table.c.platforms,
         '_Game__genres': relationship(Genre, secondary=game_genres_table,
                                       back_populates='_Genre__games'),
+        '_Game__tag_links': relationship(GameTag, viewonly=True),
+        '_Game__category_links': relationship(GameCategory, viewonly=True),
         '_Game__wishlist': relationship(Wishlist,
                                         secondary=wishlist_games_table,
                                         back_populates='_Wishlist__games'),
         '_Game__reviews': relationship(Review, back_populates='_Review__game')
     })
 
+    mapper(GameTag, game_tags_table, properties={
+        'tag_name': game_tags_table.c.tag_name,
+    })
+    mapper(GameCategory, game_categories_table, properties={
+        'category_name': game_categories_table.c.category_name,
+    })
+    # The tags and categories of a game stay sets of strings, stored as
+    # links.
+    Game._Game__tags = GameLinks('_Game__tag_links', 'tag_name')
+    Game._Game__categories = GameLinks('_Game__category_links',
+                                       'category_name')
+
     mapper(Genre, genres_table, properties={
         '_Genre__genre_name': genres_table.c.genre_name,
         '_Genre__games': relationship(Game, secondary=game_genres_table,
@@ -1,8 +1,18 @@
 # from typing import List
 #
 # from games import Publisher
+import logging
+import os
+
 from games.adapters.datareader.csvdatareader import *
+from games.adapters.datareader.ingestion import (MemoryRepositorySink,
+                                                 RepositorySink, ingest,
+                                                 read_game_chunks)
+from games.adapters.datareader.parallel import read_game_chunks_parallel
 from games.adapters.repository import AbstractRepository
+from games.domainmodel.model import Game, Genre, Publisher
+
+logger = logging.getLogger(__name__)
 
 
 class GameFileCSVReader:
@@ -25,8 +35,8 @@ class GameFileCSVReader:
         __dataset_of_categories (set): A set of category strings.
 
     Methods:
-        read_csv_file(file=None): Read the CSV file and populate the
-        repository with game data.
+        read_csv_file(file=None, sinks=(), rejects=None, workers=1):
+        Stream the CSV file into the repository and any further sinks.
         dataset_of_games: Get the list of game objects.
         dataset_of_publishers: Get the list of unique publisher objects.
         dataset_of_genres: Get the list of unique genre objects.
@@ -43,77 +53,43 @@ class GameFileCSVReader:
         self.__dataset_of_languages = set()
         self.__dataset_of_categories = set()
 
-    def read_csv_file(self, file=None):
+    def read_csv_file(self, file=None, sinks=(), rejects=None, workers=1):
         """
-        Reads a CSV file containing game data and adds the games to the
-        repository.
+        Streams the games of the CSV file into the repository in chunks.
+        In database mode every chunk is written as it is read; in memory
+        mode the games are added in one add_games_bulk call once the
+        whole file has been read.
 
         Args:
             file (str): The path to the CSV file containing the game
             data.
+            sinks: Further sinks to feed the games to after the
+            repository, e.g. a SnapshotSink.
+            rejects: Called with a RejectedRow for every row that cannot
+            be parsed. Defaults to logging the row.
+            workers (int): The number of processes to parse the file
+            with. More than one parses it with parse_csv_parallel,
+            which adds the games in AppID order.
 
+        Returns:
+            int: The number of games read.
         """
         if not os.path.exists(self.__filename):
-            print(f"path {self.__filename} does not exist!")
-            return
-        with open(self.__filename, 'r', encoding='utf-8-sig') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                try:
-                    game_id = int(row["AppID"])
-                    title = row["Name"]
-                    game = Game(game_id, title)
-                    game.release_date = row["Release date"]
-                    game.price = float(row["Price"])
-                    game.description = row["About the game"]
-                    game.image_url = row["Header image"]
-                    if len(row["Movies"]) > 0:
-                        game.video_url = row["Movies"]
-
-                    publisher = Publisher(row["Publishers"])
-                    self.__repo.add_publisher(publisher)
-                    game.publisher = publisher
-
-                    genre_names = row["Genres"].split(",")
-                    for genre_name in genre_names:
-                        genre = Genre(genre_name.strip())
-                        self.__repo.add_genre(genre)
-                        game.add_genre(genre)
-
-                    languages = row["Supported languages"].split(",")
-                    for language in languages:
-                        new_language = language.strip().strip("[]'")
-                        game.add_language(new_language)
-
-                    if row["Windows"].lower() == "true":
-                        game.system_dict["windows"] = True
-                    else:
-                        game.system_dict["windows"] = False
-
-                    if row["Mac"].lower() == "true":
-                        game.system_dict["mac"] = True
-                    else:
-                        game.system_dict["mac"] = False
-
-                    if row["Linux"].lower() == "true":
-                        game.system_dict["linux"] = True
-                    else:
-                        game.system_dict["linux"] = False
-
-                    categories = row["Categories"].split(",")
-                    for category in categories:
-                        game.add_category(category.strip())
-
-                    tags = row["Tags"].split(",")
-                    for tag in tags:
-                        game.add_tag(tag.strip())
-                    self.__repo.add_game(game)
-
-
-                except ValueError as e:
-                    print(f"Skipping row due to invalid data: {e}")
-                except KeyError as e:
-                    print(f"Skipping row due to missing key: {e}")
+            logger.warning("path %s does not exist!", self.__filename)
+            return 0
+        if self.__database_mode:
+            repository_sink = RepositorySink(self.__repo)
+        else:
+            repository_sink = MemoryRepositorySink(self.__repo)
+        registry = self.__repo.get_intern_registry()
+        if workers > 1:
+            chunks = read_game_chunks_parallel(self.__filename, workers,
+                                               rejects=rejects,
+                                               registry=registry)
+        else:
+            chunks = read_game_chunks(self.__filename, rejects=rejects,
+                                      registry=registry)
+        return ingest(chunks, [repository_sink, *sinks])
 
     @property
     def dataset_of_games(self) -> list[Game]:
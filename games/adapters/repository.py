@@ -5,6 +5,9 @@ from games.domainmodel.model import *
 
 repo_instance = None
 
+SORT_CRITERIA = ('title', 'game_id', 'release_date', 'price', 'review_count',
+                 'rating')
+
 
 class RepositoryException(Exception):
     """
@@ -20,6 +23,13 @@ class AbstractRepository(abc.ABC):
 
     Methods:
     - add_game(game: Game): Adds a game to the repository.
+    - add_games_bulk(games): Adds many games to the repository at once.
+    - update_game(game): Replaces the catalog data of the stored game
+      with the same ID, keeping its reviews and wishlist entries.
+    - remove_game(game_id): Removes a game from the catalog.
+    - get_intern_registry(): Returns the InternRegistry that loaded
+      games should share genres, publishers and strings through, or
+      None if the repository does not keep games in memory.
     - get_games() -> List[Game]: Returns a list of all games in the
       repository.
     - get_number_of_games(): Returns the number of games in the
@@ -31,18 +41,50 @@ class AbstractRepository(abc.ABC):
       games in the specified genre.
     - get_genres() -> List[Genre]: Returns a list of all genres in the
       repository.
+    - get_number_of_genre_games(target_genre) -> int: Returns the number
+      of games in the specified genre.
+    - get_sorted_games(sort_criteria, genre, offset, limit, descending)
+      -> List[Game]: Returns a page of the games, optionally of one
+      genre, in one of the SORT_CRITERIA orders.
+    - filter_game_ids(sort_criteria, genre, min_price, max_price,
+      released_from, released_to, descending, facets): Returns the IDs
+      of the games in a genre, price range and release date range and
+      matching facet filters, in one of the SORT_CRITERIA orders.
+    - get_catalog_summary(genre, min_price, max_price, released_from,
+      released_to, facets) -> dict: Returns the number of games
+      matching the filters of filter_game_ids and aggregates of their
+      prices, release dates and platforms.
+    - get_facet_counts(genre, min_price, max_price, released_from,
+      released_to, facets) -> dict: Returns, for every value of every
+      facet dimension, the number of games matching the filters of
+      filter_game_ids with that value.
+    - released_between(released_from, released_to, offset, limit,
+      newest_first) -> List[Game]: Returns a page of the games released
+      in a date range, in release date order.
+    - count_released_between(released_from, released_to) -> int:
+      Returns the number of games released in a date range.
     - get_games_by_id(game_id: int): Returns a game with the specified
       ID.
+    - get_games_by_ids(game_ids) -> List[Game]: Returns the games with
+      the specified IDs, in the order the IDs were given.
     - get_similar_games(genre): Returns a list of games similar to the
       specified genre.
     - search_games_by_title(game_title: str) -> List[Game]: Searches for
       games matching the given title.
     - search_games_by_publisher(query): Searches for games published by
       the specified publisher.
+    - search_games_fuzzy(query, limit) -> List[Game]: Searches for games
+      whose title or publisher is similar to the query, tolerating
+      typos, most similar first.
+    - search_games_full_text(query, limit) -> List[Game]: Searches the
+      titles, publishers and descriptions of the games for words
+      starting with the words of the query, best match first.
     - search_games_by_category(query): Searches for games in the
       specified category.
     - search_games_by_tags(query): Searches for games with the specified
       tags.
+    - suggest(prefix, limit) -> list: Returns the most popular
+      autocomplete suggestions starting with a prefix.
     - get_user(username: str) -> User: Returns a user with the specified
       username.
     - add_user(user: User) -> None: Adds a user to the repository.
@@ -52,6 +94,8 @@ class AbstractRepository(abc.ABC):
     - get_publishers() -> List[Publisher]: Returns a list of all
       publishers.
     - get_tags() -> List[str]: Returns a list of all tags.
+    - get_tag_counts() -> dict: Returns the number of games with each
+      tag, most common first.
     - add_wish_game(user, game): Adds a game to the wishlist of the
       specified user.
     - remove_wish_game(user, game): Removes a game from the wishlist of
@@ -70,6 +114,26 @@ class AbstractRepository(abc.ABC):
     def add_game(self, game: Game):
         raise NotImplementedError
 
+    def add_games_bulk(self, games) -> None:
+        for game in games:
+            # Register copies: with the ORM mapping, the publisher and
+            # genres of a game link back to it, and adding them would
+            # add the game ahead of add_game.
+            if game.publisher is not None:
+                self.add_publisher(Publisher(game.publisher.publisher_name))
+            for genre in game.genres:
+                self.add_genre(Genre(genre.genre_name))
+            self.add_game(game)
+
+    def update_game(self, game: Game) -> None:
+        raise NotImplementedError
+
+    def remove_game(self, game_id: int) -> None:
+        raise NotImplementedError
+
+    def get_intern_registry(self):
+        return None
+
     @abc.abstractmethod
     def get_games(self) -> List[Game]:
         raise NotImplementedError
@@ -94,10 +158,44 @@ class AbstractRepository(abc.ABC):
     def get_genres(self) -> List[Genre]:
         raise NotImplementedError
 
+    def get_number_of_genre_games(self, target_genre) -> int:
+        raise NotImplementedError
+
+    def get_sorted_games(self, sort_criteria='title', genre=None, offset=0,
+                         limit=None, descending=False) -> List[Game]:
+        raise NotImplementedError
+
+    def filter_game_ids(self, sort_criteria='title', genre=None,
+                        min_price=None, max_price=None, released_from=None,
+                        released_to=None, descending=False, facets=None):
+        raise NotImplementedError
+
+    def get_catalog_summary(self, genre=None, min_price=None, max_price=None,
+                            released_from=None, released_to=None,
+                            facets=None) -> dict:
+        raise NotImplementedError
+
+    def get_facet_counts(self, genre=None, min_price=None, max_price=None,
+                         released_from=None, released_to=None,
+                         facets=None) -> dict:
+        raise NotImplementedError
+
+    def released_between(self, released_from=None, released_to=None,
+                         offset=0, limit=None,
+                         newest_first=False) -> List[Game]:
+        raise NotImplementedError
+
+    def count_released_between(self, released_from=None,
+                               released_to=None) -> int:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_games_by_id(self, game_id: int):
         raise NotImplementedError
 
+    def get_games_by_ids(self, game_ids) -> List[Game]:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_similar_games(self, genre):
         raise NotImplementedError
@@ -114,6 +212,16 @@ class AbstractRepository(abc.ABC):
     def search_games_by_tags(self, query):
         raise NotImplementedError
 
+    def search_games_fuzzy(self, query: str, limit: int = None) -> List[Game]:
+        raise NotImplementedError
+
+    def search_games_full_text(self, query: str,
+                               limit: int = None) -> List[Game]:
+        raise NotImplementedError
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        raise NotImplementedError
+
     def get_user(self, username: str) -> User:
         raise NotImplementedError
 
@@ -132,6 +240,9 @@ class AbstractRepository(abc.ABC):
     def get_tags(self) -> list[str]:
         raise NotImplementedError
 
+    def get_tag_counts(self) -> dict:
+        raise NotImplementedError
+
     def add_wish_game(self, user, game):
         raise NotImplementedError
 
@@ -0,0 +1,87 @@
+import hashlib
+import mmap
+import os
+import pickle
+from pathlib import Path
+
+from games.adapters.memory_repository import MemoryRepository
+
+# Bump whenever a change to the domain model or MemoryRepository makes
+# snapshots written by older code unusable.
+SNAPSHOT_VERSION = 7
+
+
+def csv_checksum(data_path) -> str:
+    """
+    Args:
+        data_path: The path of the CSV file.
+
+    Returns:
+        str: The SHA-256 hex digest of the contents of the file.
+    """
+    digest = hashlib.sha256()
+    with open(data_path, 'rb') as data_file:
+        for chunk in iter(lambda: data_file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_snapshot(repository: MemoryRepository, snapshot_path,
+                  checksum: str) -> None:
+    """
+    Write a binary snapshot of a fully loaded repository, including its
+    indexes.
+
+    The snapshot is a pickled header holding the snapshot version and
+    the checksum of the CSV file the repository was loaded from,
+    followed by the pickled repository. It is written to a temporary
+    file first and then moved into place, so a crash never leaves a
+    truncated snapshot behind.
+
+    Args:
+        repository (MemoryRepository): The repository to save.
+        snapshot_path: The path of the snapshot file.
+        checksum (str): The checksum of the CSV file, see csv_checksum.
+    """
+    snapshot_path = Path(snapshot_path)
+    temporary_path = snapshot_path.with_name(snapshot_path.name + '.tmp')
+    with open(temporary_path, 'wb') as snapshot_file:
+        header = {'version': SNAPSHOT_VERSION, 'checksum': checksum}
+        pickle.dump(header, snapshot_file, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(repository, snapshot_file, pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, snapshot_path)
+
+
+def load_snapshot(snapshot_path, checksum: str) -> (MemoryRepository, None):
+    """
+    Load a repository from a snapshot written by save_snapshot.
+
+    The file is memory-mapped and unpickled straight from the mapping,
+    without reading it into a separate buffer first. Snapshots are
+    trusted local files: never point snapshot_path at a file from an
+    untrusted source, as unpickling it can run arbitrary code.
+
+    Args:
+        snapshot_path: The path of the snapshot file.
+        checksum (str): The checksum of the current CSV file.
+
+    Returns:
+        MemoryRepository: The repository saved in the snapshot.
+
+        None: If there is no snapshot, it cannot be read, or it was
+        written by another snapshot version or from another CSV file.
+    """
+    try:
+        with open(snapshot_path, 'rb') as snapshot_file, \
+                mmap.mmap(snapshot_file.fileno(), 0,
+                          access=mmap.ACCESS_READ) as snapshot:
+            header = pickle.load(snapshot)
+            if header != {'version': SNAPSHOT_VERSION, 'checksum': checksum}:
+                return None
+            repository = pickle.load(snapshot)
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError,
+            AttributeError, ImportError):
+        return None
+    if not isinstance(repository, MemoryRepository):
+        return None
+    return repository
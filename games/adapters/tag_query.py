@@ -0,0 +1,146 @@
+from typing import Callable, List
+
+from games.adapters.indexes import (intersect_postings, merge_postings,
+                                    subtract_postings)
+
+OPERATORS = ('AND', 'OR', 'NOT')
+
+
+class TagQueryException(ValueError):
+    """
+    An exception raised when a tag query cannot be parsed.
+    """
+    pass
+
+
+def tokenize_tag_query(query: str) -> list:
+    """
+    Split a tag query into terms and operators.
+
+    Operators are the upper case words AND, OR and NOT. Every run of
+    other words forms a single term, so multi-word tags such as
+    "Early Access" need no quoting.
+
+    Args:
+        query (str): The tag query, e.g. "Roguelike AND Co-op NOT Early
+        Access".
+
+    Returns:
+        list: The tokens of the query. Operators are returned as the
+        operator string, terms as a one element tuple.
+    """
+    tokens = []
+    words = []
+    for word in query.split():
+        if word in OPERATORS:
+            if words:
+                tokens.append((' '.join(words),))
+                words = []
+            tokens.append(word)
+        else:
+            words.append(word)
+    if words:
+        tokens.append((' '.join(words),))
+    return tokens
+
+
+def parse_tag_query(query: str):
+    """
+    Parse a tag query into an expression tree.
+
+    Grammar, from lowest to highest precedence:
+        expression := conjunction ('OR' conjunction)*
+        conjunction := negation (('AND' | 'AND NOT' | 'NOT') negation)*
+        negation := 'NOT' negation | term
+
+    A binary NOT reads as "and not", so "A NOT B" matches games with
+    tag A but without tag B.
+
+    Args:
+        query (str): The tag query to parse.
+
+    Returns:
+        The expression tree. Terms are ('term', name), operators are
+        ('or', left, right), ('and', left, right), ('not', left, right)
+        and ('all but', operand).
+
+    Raises:
+        TagQueryException: If the query is empty or malformed.
+    """
+    tokens = tokenize_tag_query(query)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def advance():
+        nonlocal position
+        token = peek()
+        position += 1
+        return token
+
+    def negation():
+        token = advance()
+        if token == 'NOT':
+            return 'all but', negation()
+        if isinstance(token, tuple):
+            return 'term', token[0]
+        raise TagQueryException(f'Expected a tag in query "{query}"')
+
+    def conjunction():
+        node = negation()
+        while peek() in ('AND', 'NOT'):
+            operator = advance()
+            if operator == 'AND' and peek() == 'NOT':
+                advance()
+                operator = 'NOT'
+            node = ('and' if operator == 'AND' else 'not'), node, negation()
+        return node
+
+    def expression():
+        node = conjunction()
+        while peek() == 'OR':
+            advance()
+            node = 'or', node, conjunction()
+        return node
+
+    if not tokens:
+        raise TagQueryException('Tag query is empty')
+    tree = expression()
+    if position != len(tokens):
+        raise TagQueryException(f'Unexpected "{peek()}" in query "{query}"')
+    return tree
+
+
+def evaluate_tag_query(query: str, postings_for: Callable[[str], List[int]],
+                       all_postings: Callable[[], List[int]]) -> List[int]:
+    """
+    Evaluate a tag query with posting list intersection, union and
+    difference.
+
+    Args:
+        query (str): The tag query to evaluate.
+        postings_for: Returns the sorted game IDs carrying a tag.
+        all_postings: Returns the sorted IDs of every game, used for a
+        leading NOT.
+
+    Returns:
+        List[int]: The sorted IDs of the matching games.
+
+    Raises:
+        TagQueryException: If the query is empty or malformed.
+    """
+    def evaluate(node):
+        operator = node[0]
+        if operator == 'term':
+            return postings_for(node[1])
+        if operator == 'all but':
+            return subtract_postings(all_postings(), evaluate(node[1]))
+        left, right = evaluate(node[1]), evaluate(node[2])
+        if operator == 'and':
+            return intersect_postings(left, right)
+        if operator == 'or':
+            return merge_postings(left, right)
+        return subtract_postings(left, right)
+
+    return evaluate(parse_tag_query(query))
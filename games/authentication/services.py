@@ -1,6 +1,6 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 
-from games.adapters.repository import AbstractRepository
+from games.adapters.repository import AbstractRepository, RepositoryException
 from games.domainmodel.model import User
 
 
@@ -61,7 +61,10 @@ def add_user(username: str, password: str, repo: AbstractRepository):
         raise InvalidPassException
 
     password_hash = generate_password_hash(password)
-    repo.add_user(User(username, password_hash))
+    try:
+        repo.add_user(User(username, password_hash))
+    except RepositoryException:
+        raise NameNotUniqueException
 
 
 def get_user(username: str, repo: AbstractRepository):
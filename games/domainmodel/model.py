@@ -1,7 +1,17 @@
 from datetime import datetime
 
+# Bit flags of the platforms a game runs on, stored together in one int.
+PLATFORM_FLAGS = {'windows': 1, 'mac': 2, 'linux': 4}
+
+# The format of release dates, e.g. 'Nov 12, 2007'.
+RELEASE_DATE_FORMAT = "%b %d, %Y"
+
 
 class Publisher:
+    # '__dict__' and '__weakref__' keep instances usable by the ORM
+    # mapping, which stores its state in the instance dictionary.
+    __slots__ = ('__publisher_name', '__dict__', '__weakref__')
+
     def __init__(self, publisher_name: str) -> None:
         """
         Initialise the Publisher object.
@@ -104,6 +114,8 @@ class Publisher:
 
 
 class Genre:
+    __slots__ = ('__genre_name', '__dict__', '__weakref__')
+
     def __init__(self, genre_name: str) -> None:
         """
         Initialise the Genre object.
@@ -234,6 +246,10 @@ class Game:
     release_date -> datetime:
         Return the release date of the game.
 
+    release_date_ordinal -> int:
+        Return the proleptic Gregorian ordinal of the release date, or
+        0 if the game has no release date.
+
     description -> str:
         Return the description of the game.
 
@@ -272,10 +288,21 @@ class Game:
     remove_tag(tag_to_remove: str) -> None:
         Removes a tag from the game's list of tags.
 
+    update_from(other: Game) -> None:
+        Copies the catalog data of another game with the same ID.
+
+    from_record(...) -> Game:
+        Builds a game from already validated values, skipping the
+        checks of the setters.
+
     Attributes
     ----------
     system_dict -> dict:
-        Return the dictionary of game system information.
+        Return a dictionary mapping each platform name to whether the
+        game supports it.
+
+    platforms -> int:
+        Return the bitfield of supported platforms, see PLATFORM_FLAGS.
 
     languages -> list:
         Return the list of languages the game supports.
@@ -285,6 +312,13 @@ class Game:
 
     """
 
+    __slots__ = ('__game_id', '__game_title', '__genres', '__categories',
+                 '__tags', '__tags_string', '__reviews', '__price',
+                 '__release_date', '__release_ordinal', '__description',
+                 '__publisher',
+                 '__image_url', '__website_url', '__video_url',
+                 '__languages', '__platforms', '__dict__', '__weakref__')
+
     def __init__(self, game_id: int, game_title: str) -> None:
         """
         Initialise a Game object
@@ -320,13 +354,14 @@ class Game:
         self.__reviews = list()
         self.__price = None
         self.__release_date = None
+        self.__release_ordinal = 0
         self.__description = None
         self.__publisher = None
         self.__image_url = None
         self.__website_url = None
         self.__video_url = None
         self.__languages = list()
-        self.__system_dict = dict()
+        self.__platforms = 0
 
     def __repr__(self) -> str:
         """
@@ -475,6 +510,18 @@ class Game:
 
         return self.__release_date
 
+    @property
+    def release_date_ordinal(self) -> int:
+        """
+        Return the proleptic Gregorian ordinal of the release date, which
+        sorts and compares chronologically unlike the formatted date.
+        Games without a release date have ordinal 0.
+
+        :return: int
+        """
+
+        return self.__release_ordinal
+
     @property
     def description(self) -> str:
         """
@@ -571,8 +618,10 @@ class Game:
 
         if isinstance(new_date, str) and new_date.strip():
             try:
-                datetime.strptime(new_date, "%b %d, %Y")
+                ordinal = datetime.strptime(
+                    new_date, RELEASE_DATE_FORMAT).toordinal()
                 self.__release_date = new_date
+                self.__release_ordinal = ordinal
             except ValueError:
                 raise ValueError("Invalid release date format. "
                                  "Use '%b %d, %Y'")
@@ -699,7 +748,27 @@ class Game:
 
     @property
     def system_dict(self):
-        return self.__system_dict
+        return {platform: bool(self.__platforms & flag)
+                for platform, flag in PLATFORM_FLAGS.items()}
+
+    @property
+    def platforms(self) -> int:
+        return self.__platforms
+
+    def set_platform(self, platform: str, supported: bool) -> None:
+        """
+        Set whether the game supports a platform.
+
+        :param platform: str, one of the keys of PLATFORM_FLAGS
+        :param supported: bool
+        :raise ValueError
+        """
+        if platform not in PLATFORM_FLAGS:
+            raise ValueError(f'Unknown platform {platform}.')
+        if supported:
+            self.__platforms |= PLATFORM_FLAGS[platform]
+        else:
+            self.__platforms &= ~PLATFORM_FLAGS[platform]
 
     @property
     def languages(self):
@@ -792,6 +861,88 @@ class Game:
         else:
             print(f'Could not find {tag_to_remove} in list of tags.')
 
+    def update_from(self, other) -> None:
+        """
+        Replace the catalog data of the game (title, release date, price,
+        description, publisher, URLs, genres, categories, tags,
+        languages and platforms) with that of another game with the
+        same ID. Reviews are kept, so a game can be refreshed from a
+        new catalog without losing them.
+
+        Parameters
+        ----------
+        other: Game
+            The game to copy the catalog data of.
+
+        :param other: Game
+        :return: None
+        :raise ValueError
+        """
+
+        if not isinstance(other, Game) or other.game_id != self.__game_id:
+            raise ValueError('Can only update from a game with the same ID.')
+        self.__game_title = other.title
+        self.__release_date = other.release_date
+        self.__release_ordinal = other.release_date_ordinal
+        self.__price = other.price
+        self.__description = other.description
+        self.__publisher = other.publisher
+        self.__image_url = other.image_url
+        self.__website_url = other.website_url
+        self.__video_url = other.video_url
+        self.__genres = list(other.genres)
+        self.__categories = set(other.categories)
+        self.__tags = set(other.tags)
+        self.__languages = list(other.languages)
+        self.__platforms = other.platforms
+
+    @classmethod
+    def from_record(cls, game_id: int, title: str, release_date: str,
+                    release_ordinal: int, price: (int, float),
+                    description: str, image_url: str, video_url: str,
+                    publisher: Publisher, genres: list, languages: list,
+                    platforms: int, categories: set,
+                    tags: set) -> 'Game':
+        """
+        Build a game from values that are already valid, as produced by
+        the CSV ingestion pipeline, without running the checks of the
+        setters, add_genre, add_category and add_tag for every field.
+
+        The values are trusted: strings must already be stripped (or
+        None), release_date must be in RELEASE_DATE_FORMAT with
+        release_ordinal its ordinal (see release_date_ordinal), price
+        must be non-negative, genres must not repeat and categories,
+        tags and languages must not hold empty strings. The containers
+        are used as they are, not copied.
+
+        Parameters
+        ----------
+        game_id: int
+            The unique id of the game, a non-negative integer
+        release_ordinal: int
+            The ordinal of release_date
+        title ... tags:
+            The values of the properties of the same names
+
+        :return: Game
+        :raise ValueError
+        """
+
+        game = cls(game_id, title)
+        game.__release_date = release_date
+        game.__release_ordinal = release_ordinal
+        game.__price = price
+        game.__description = description
+        game.__image_url = image_url
+        game.__video_url = video_url
+        game.__publisher = publisher
+        game.__genres = genres
+        game.__languages = languages
+        game.__platforms = platforms
+        game.__categories = categories
+        game.__tags = tags
+        return game
+
 
 class User:
     def __init__(self, username: str, password: str) -> None:
@@ -993,6 +1144,9 @@ class User:
 
 
 class Review:
+    __slots__ = ('__user', '__game', '__rating', '__comment', '__timestamp',
+                 '__dict__', '__weakref__')
+
     def __init__(self, user: User, game: Game,
                  rating: int, comment: str, timestamp=None) -> None:
         """
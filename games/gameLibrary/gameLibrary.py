@@ -31,21 +31,35 @@ def view_games():
     sort_criteria = request.args.get('sort_criteria',
                                      'title')  # Default sort by title
     game_count = services.get_number_of_games(repo.repo_instance)
-    all_games = services.get_games(repo.repo_instance)
     genres = services.get_genres(repo.repo_instance)
     form = WishlistForm()
 
-    # Pagination setup
+    # Pagination setup, the page is a slice of the catalog in sort order
     page, per_page, offset = get_page_args(per_page_parameter="pp", pp=10)
-    rendered = all_games[offset: offset + per_page]
-    sorted_rendered = sorted(rendered, key=lambda x: x[sort_criteria])
-    random_game_index = random.randrange(0, len(all_games) - 5)
+    filters = services.parse_game_filters(request.args)
+    summary = None
+    total = game_count
+    if filters:
+        sorted_rendered, total = services.get_filtered_games(
+            repo.repo_instance, sort_criteria, filters=filters,
+            offset=offset, limit=per_page)
+        summary = services.get_catalog_summary(repo.repo_instance,
+                                               filters=filters)
+    else:
+        sorted_rendered = services.get_sorted_games(repo.repo_instance,
+                                                    sort_criteria,
+                                                    offset=offset,
+                                                    limit=per_page)
+    random_game_index = random.randrange(0, max(game_count - 5, 1))
+    slide_games = services.get_sorted_games(repo.repo_instance, 'game_id',
+                                            offset=random_game_index, limit=5)
     pagination = Pagination(page=page, per_page=per_page, offset=offset,
-                            total=len(all_games),
+                            total=total,
                             record_name='List')
-    if 'username' in session and authservice.get_user(session['username'],
-                                                      repo.repo_instance) is not None:
+    user = None
+    if 'username' in session:
         user = authservice.get_user(session['username'], repo.repo_instance)
+    if user is not None:
         wishlist = get_user_wishlist(user, repo.repo_instance)
     else:
         wishlist = []
@@ -53,12 +67,51 @@ def view_games():
     # Render the template
     return render_template('gameLibrary.html', heading='All Games',
                            games=sorted_rendered, num_games=game_count,
-                           slide_games=all_games[
-                                       random_game_index:random_game_index + 5],
+                           slide_games=slide_games,
                            all_genres=genres,
                            pagination=pagination,
                            genre_urls=get_genres_and_urls(),
-                           form=form, wishlist=wishlist)
+                           form=form, wishlist=wishlist, summary=summary,
+                           facets=services.get_facets(repo.repo_instance,
+                                                      filters=filters))
+
+
+@gameLibrary_blueprint.route('/new_releases', methods=['GET'])
+def new_releases():
+    """
+    Render the game library page for the most recently released games,
+    newest first, optionally within the released_from and released_to
+    dates of the query string.
+
+    Returns:
+        rendered_template: HTML template for the new releases view.
+    """
+    filters = services.parse_game_filters(request.args)
+    page, per_page, offset = get_page_args(per_page_parameter="pp", pp=10)
+    new_games, total = services.get_new_releases(
+        repo.repo_instance, filters.get('released_from'),
+        filters.get('released_to'), offset=offset, limit=per_page)
+    pagination = Pagination(page=page, per_page=per_page, offset=offset,
+                            total=total,
+                            record_name='List')
+    user = None
+    if 'username' in session:
+        user = authservice.get_user(session['username'], repo.repo_instance)
+    if user is not None:
+        wishlist = get_user_wishlist(user, repo.repo_instance)
+    else:
+        wishlist = []
+
+    return render_template('gameLibrary.html', heading='New Releases',
+                           games=new_games,
+                           num_games=services.get_number_of_games(
+                               repo.repo_instance),
+                           slide_games=new_games[:5],
+                           all_genres=services.get_genres(repo.repo_instance),
+                           pagination=pagination,
+                           genre_urls=get_genres_and_urls(),
+                           form=WishlistForm(), wishlist=wishlist,
+                           summary=None, facets={})
 
 
 def get_genres_and_urls(sort_criteria='title'):
@@ -92,30 +145,48 @@ def games_by_genre():
     """
     target_genre = request.args.get('genre')
     sort_criteria = request.args.get('sort_criteria', 'title')
-    selected_genre_games = services.get_games_by_genre(target_genre,
-                                                       repo.repo_instance)
+    genre_game_count = services.get_number_of_genre_games(
+        target_genre, repo.repo_instance)
 
-    # Pagination setup
+    # Pagination setup, the page is a slice of the genre in sort order
     page, per_page, offset = get_page_args(per_page_parameter="pp", pp=10)
-    rendered = selected_genre_games[offset: offset + per_page]
-    sorted_rendered = sorted(rendered, key=lambda x: x[sort_criteria])
+    filters = services.parse_game_filters(request.args)
+    summary = None
+    total = genre_game_count
+    if filters:
+        sorted_rendered, total = services.get_filtered_games(
+            repo.repo_instance, sort_criteria, genre=target_genre,
+            filters=filters, offset=offset, limit=per_page)
+        summary = services.get_catalog_summary(repo.repo_instance,
+                                               target_genre, filters)
+    else:
+        sorted_rendered = services.get_sorted_games(repo.repo_instance,
+                                                    sort_criteria,
+                                                    genre=target_genre,
+                                                    offset=offset,
+                                                    limit=per_page)
     pagination = Pagination(page=page, per_page=per_page, offset=offset,
-                            total=len(selected_genre_games),
+                            total=total,
                             record_name='List')
 
     # Determine games for the sliding carousel based on the number of games
-    if len(selected_genre_games) < 5:
-        slide_genre_games = selected_genre_games
-    elif len(selected_genre_games) < 10:
-        slide_genre_games = selected_genre_games[2:7]
+    if genre_game_count < 5:
+        slide_offset = 0
+    elif genre_game_count < 10:
+        slide_offset = 2
     else:
-        slide_genre_games = selected_genre_games[10:15]
+        slide_offset = 10
+    slide_genre_games = services.get_sorted_games(repo.repo_instance,
+                                                  'game_id',
+                                                  genre=target_genre,
+                                                  offset=slide_offset,
+                                                  limit=5)
     genres = services.get_genres(repo.repo_instance)
     form = WishlistForm()
-    if ('username' in session and authservice.get_user(session['username'],
-                                                       repo.repo_instance) is
-            not None):
+    user = None
+    if 'username' in session:
         user = authservice.get_user(session['username'], repo.repo_instance)
+    if user is not None:
         wishlist = get_user_wishlist(user, repo.repo_instance)
     else:
         wishlist = []
@@ -126,7 +197,10 @@ def games_by_genre():
                            genre_urls=get_genres_and_urls(sort_criteria),
                            pagination=pagination,
                            slide_genre_games=slide_genre_games,
-                           form=form, wishlist=wishlist)
+                           form=form, wishlist=wishlist, summary=summary,
+                           facets=services.get_facets(repo.repo_instance,
+                                                      target_genre,
+                                                      filters))
 
 
 def side_bar_genres():
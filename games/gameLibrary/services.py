@@ -1,4 +1,11 @@
-from games.adapters.repository import AbstractRepository
+import math
+from datetime import date
+
+from games.adapters.facets import FACET_DIMENSIONS
+from games.adapters.repository import AbstractRepository, SORT_CRITERIA
+
+# The most values of a facet dimension shown on a library page.
+FACET_VALUES_SHOWN = 12
 
 
 def get_number_of_games(repo: AbstractRepository):
@@ -101,6 +108,189 @@ def get_games_by_genre(genre, repo: AbstractRepository):
     return games_dicts
 
 
+def get_number_of_genre_games(genre, repo: AbstractRepository):
+    """
+    Get the number of games in a specific genre.
+
+    Args: genre (str): The target genre. repo (AbstractRepository): The
+    repository instance to retrieve data from.
+
+    Returns:
+        int: The number of games in the genre.
+    """
+    return repo.get_number_of_genre_games(genre)
+
+
+def get_sorted_games(repo: AbstractRepository, sort_criteria='title',
+                     genre=None, offset=0, limit=None):
+    """
+    Get a page of game dictionaries sorted across the whole catalog, or
+    across one genre.
+
+    Args: repo (AbstractRepository): The repository instance to retrieve
+    data from. sort_criteria (str): One of SORT_CRITERIA, unknown
+    criteria sort by title. genre (str): The genre to restrict the games
+    to, or None for all games. offset (int): The number of games to skip.
+    limit (int): The page size, or None for all remaining games.
+
+    Returns: list: A list of dictionaries, each containing game
+    information for one game of the page.
+    """
+    if sort_criteria not in SORT_CRITERIA:
+        sort_criteria = 'title'
+    games = repo.get_sorted_games(sort_criteria, genre, offset, limit)
+    return [game_to_dict(game) for game in games]
+
+
+def parse_game_filters(args) -> dict:
+    """
+    Read the price and release date filters of a library page from its
+    query string. Missing or invalid values leave a filter unset.
+
+    Args: args: The query string arguments of the request, as a
+    MultiDict. min_price and max_price are prices, released_from and
+    released_to are ISO dates (YYYY-MM-DD), and each of the
+    FACET_DIMENSIONS may be given several times, once per chosen value.
+
+    Returns: dict: The filters that are set, as keyword arguments of
+    get_filtered_games: min_price and max_price as floats,
+    released_from and released_to as dates, and facets as a dict of
+    the chosen values by dimension.
+    """
+    filters = dict()
+    for name in ('min_price', 'max_price'):
+        try:
+            price = float(args.get(name, ''))
+        except ValueError:
+            continue
+        if math.isfinite(price) and price >= 0:
+            filters[name] = price
+    for name in ('released_from', 'released_to'):
+        try:
+            filters[name] = date.fromisoformat(args.get(name, ''))
+        except ValueError:
+            continue
+    facets = {dimension: args.getlist(dimension)
+              for dimension in FACET_DIMENSIONS if args.getlist(dimension)}
+    if facets:
+        filters['facets'] = facets
+    return filters
+
+
+def get_filtered_games(repo: AbstractRepository, sort_criteria='title',
+                       genre=None, filters=None, offset=0, limit=None):
+    """
+    Get a page of game dictionaries matching price and release date
+    filters, sorted across the whole catalog or across one genre.
+
+    Args: repo (AbstractRepository): The repository instance to retrieve
+    data from. sort_criteria (str): One of SORT_CRITERIA, unknown
+    criteria sort by title. genre (str): The genre to restrict the games
+    to, or None for all games. filters (dict): The filters, see
+    parse_game_filters. offset (int): The number of games to skip.
+    limit (int): The page size, or None for all remaining games.
+
+    Returns: tuple: The list of dictionaries of the games of the page,
+    and the number of games matching the filters.
+    """
+    if sort_criteria not in SORT_CRITERIA:
+        sort_criteria = 'title'
+    game_ids = repo.filter_game_ids(sort_criteria, genre, **(filters or {}))
+    stop = None if limit is None else offset + limit
+    games = repo.get_games_by_ids(game_ids[offset:stop])
+    return [game_to_dict(game) for game in games], len(game_ids)
+
+
+def get_catalog_summary(repo: AbstractRepository, genre=None, filters=None):
+    """
+    Get the number of games matching price and release date filters,
+    and aggregates of their prices, release dates and platforms.
+
+    Args: repo (AbstractRepository): The repository instance to retrieve
+    data from. genre (str): The genre to restrict the games to, or None
+    for all games. filters (dict): The filters, see parse_game_filters.
+
+    Returns: dict: See AbstractRepository.get_catalog_summary.
+    """
+    return repo.get_catalog_summary(genre, **(filters or {}))
+
+
+def get_facets(repo: AbstractRepository, genre=None, filters=None):
+    """
+    Get the facets of a library page: for each facet dimension, its
+    most common values among the games matching the other filters, with
+    their counts and whether they are chosen.
+
+    Args: repo (AbstractRepository): The repository instance to retrieve
+    data from. genre (str): The genre to restrict the games to, or None
+    for all games. filters (dict): The filters, see parse_game_filters.
+
+    Returns: dict: A list of (value, count, chosen) tuples for each
+    dimension, in descending order of count. Chosen values are always
+    listed, the others up to FACET_VALUES_SHOWN values.
+    """
+    filters = filters or {}
+    chosen = filters.get('facets', {})
+    counts = repo.get_facet_counts(genre, **filters)
+    facets = dict()
+    for dimension, dimension_counts in counts.items():
+        dimension_chosen = set(chosen.get(dimension, []))
+        values = list(dimension_counts.items())
+        values += [(value, 0) for value in dimension_chosen
+                   if value not in dimension_counts]
+        values.sort(key=lambda item: (-item[1], item[0]))
+        shown = [(value, count, value in dimension_chosen)
+                 for index, (value, count) in enumerate(values)
+                 if index < FACET_VALUES_SHOWN or value in dimension_chosen]
+        if shown:
+            facets[dimension] = shown
+    return facets
+
+
+def get_new_releases(repo: AbstractRepository, released_from=None,
+                     released_to=None, offset=0, limit=None):
+    """
+    Get a page of game dictionaries of the games released in a date
+    range, newest first.
+
+    Args: repo (AbstractRepository): The repository instance to retrieve
+    data from. released_from (date): The earliest release date, or None.
+    released_to (date): The latest release date, or None. offset (int):
+    The number of games to skip. limit (int): The page size, or None for
+    all remaining games.
+
+    Returns: tuple: The list of dictionaries of the games of the page,
+    and the number of games released in the date range. Games without a
+    release date are left out.
+    """
+    games = repo.released_between(released_from, released_to, offset,
+                                  limit, newest_first=True)
+    total = repo.count_released_between(released_from, released_to)
+    return [game_to_dict(game) for game in games], total
+
+
+def game_to_dict(game):
+    """
+    Convert a Game object to the dictionary used by the library pages.
+
+    Args:
+        game (Game): The game to convert.
+
+    Returns:
+        dict: The game_id, title, game_url, header_image, price,
+        description and release_date of the game.
+    """
+    return {
+        'game_id': game.game_id,
+        'title': game.title,
+        'game_url': game.website_url,
+        'header_image': game.image_url,
+        'price': game.price,
+        'description': game.description,
+        'release_date': game.release_date
+    }
+
+
 def get_genres(repo: AbstractRepository):
     """
     Get a list of available genres from the repository.
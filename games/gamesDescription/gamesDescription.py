@@ -56,7 +56,7 @@ def games_description(game_id):
 
     """
     get_game = services.get_game(repo.repo_instance, game_id)
-    # get_similar_games = None
+    get_similar_games = []
     if len(get_game.genres) > 0:
         get_similar_games = services.similar_game(repo.repo_instance,
                                                   get_game.genres)
@@ -71,8 +71,10 @@ def games_description(game_id):
     pagination = Pagination(page=page, per_page=per_page, offset=offset,
                             total=len(get_game.reviews),
                             record_name='List')
-    if 'username' in session and authservice.get_user(session['username'], repo.repo_instance) is not None:
+    user = None
+    if 'username' in session:
         user = authservice.get_user(session['username'], repo.repo_instance)
+    if user is not None:
         wishlist = get_user_wishlist_objs(user)
     else:
         wishlist = []
@@ -1,4 +1,5 @@
-from flask import Blueprint, render_template, request, url_for, session
+from flask import (Blueprint, current_app, jsonify, render_template,
+                   request, url_for, session)
 import games.adapters.repository as repo
 from games.gameLibrary.gameLibrary import get_genres_and_urls, WishlistForm
 from games.gameLibrary.services import get_genres
@@ -29,9 +30,11 @@ def search_games():
                                 total=len(search_results),
                                 record_name='List')
         form = WishlistForm()
-        if 'username' in session and authservice.get_user(session['username'],
-                                                          repo.repo_instance) is not None:
-            user = authservice.get_user(session['username'], repo.repo_instance)
+        user = None
+        if 'username' in session:
+            user = authservice.get_user(session['username'],
+                                        repo.repo_instance)
+        if user is not None:
             wishlist = get_user_wishlist(user, repo.repo_instance)
         else:
             wishlist = []
@@ -45,3 +48,30 @@ def search_games():
     else:
         return render_template('index.html', all_genres=genres,
                                genre_urls=get_genres_and_urls())
+
+
+@search_blueprint.route('/search/suggest', methods=['GET'])
+def suggest():
+    """
+    Autocompletes the search box with the most popular titles,
+    publishers and tags starting with the prefix query argument. The
+    limit argument sets the number of suggestions, which defaults to
+    the AUTOCOMPLETE_LIMIT setting.
+
+    :return: JSON object with the list of suggestions, each with the
+    URL it leads to.
+    """
+    prefix = request.args.get('prefix', '')
+    limit = request.args.get('limit', type=int,
+                             default=current_app.config['AUTOCOMPLETE_LIMIT'])
+    suggestions = services.get_suggestions(prefix, limit, repo.repo_instance)
+    for suggestion in suggestions:
+        if suggestion['game_id'] is not None:
+            suggestion['url'] = url_for(
+                'games_description_bp.games_description',
+                game_id=suggestion['game_id'])
+        else:
+            suggestion['url'] = url_for(
+                'search_bp.search_games', query=suggestion['text'],
+                search_criteria=suggestion['search_criteria'])
+    return jsonify(suggestions=suggestions)
@@ -1,4 +1,10 @@
+from games.adapters.indexes import MAX_SUGGESTIONS
 from games.adapters.repository import AbstractRepository
+from games.adapters.tag_query import TagQueryException
+
+# The search criteria to run when a suggestion of each kind is chosen.
+SUGGESTION_CRITERIA = {'title': 'title', 'publisher': 'publisher',
+                       'tag': 'tags'}
 
 
 def search_games_by_criteria(query: str, criteria: str,
@@ -13,7 +19,12 @@ def search_games_by_criteria(query: str, criteria: str,
     Parameters:
     query (str): The query string to search for.
     criteria (str): The criteria to use for the search (title, publisher,
-    category, tags).
+    fuzzy, text, category, tags). Category and tag queries may combine
+    terms with AND, OR and NOT, e.g. "Roguelike AND Co-op NOT Early
+    Access"; a malformed query returns no results. Fuzzy queries match
+    titles and publishers despite typos, most similar first. Text
+    queries match words of titles, publishers and descriptions, best
+    match first.
     repo (AbstractRepository): The repository to search in.
 
     Returns:
@@ -26,10 +37,18 @@ def search_games_by_criteria(query: str, criteria: str,
         search_results = repo.search_games_by_title(query)
     elif criteria == "publisher":
         search_results = repo.search_games_by_publisher(query)
-    elif criteria == "category":
-        search_results = repo.search_games_by_category(query)
-    elif criteria == "tags":
-        search_results = repo.search_games_by_tags(query)
+    elif criteria == "fuzzy":
+        search_results = repo.search_games_fuzzy(query)
+    elif criteria == "text":
+        search_results = repo.search_games_full_text(query)
+    elif criteria in ("category", "tags"):
+        try:
+            if criteria == "category":
+                search_results = repo.search_games_by_category(query)
+            else:
+                search_results = repo.search_games_by_tags(query)
+        except TagQueryException:
+            search_results = []
     games_list = []
     for game in search_results:
         games_dictionary = {
@@ -43,3 +62,30 @@ def search_games_by_criteria(query: str, criteria: str,
                             }
         games_list.append(games_dictionary)
     return games_list
+
+
+def get_suggestions(prefix: str, limit: int,
+                    repo: AbstractRepository) -> list[dict]:
+    """
+
+    Get autocomplete suggestions for a search box.
+
+    Parameters:
+    prefix (str): The text typed so far.
+    limit (int): The most suggestions to return, clamped to between 0
+    and MAX_SUGGESTIONS.
+    repo (AbstractRepository): The repository to search in.
+
+    Returns:
+    list[dict]: The suggestions, most popular first. Each dictionary
+    contains the suggested text, its kind (title, publisher or tag), the
+    search criteria that finds it, and the game id of a title.
+
+    """
+    limit = min(max(limit, 0), MAX_SUGGESTIONS)
+    return [{
+                'text': suggestion.text,
+                'kind': suggestion.kind,
+                'search_criteria': SUGGESTION_CRITERIA[suggestion.kind],
+                'game_id': suggestion.game_id
+            } for suggestion in repo.suggest(prefix, limit)]
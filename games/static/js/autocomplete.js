@@ -0,0 +1,34 @@
+const searchBox = document.querySelector("#searchbar");
+const suggestionList = document.querySelector("#search-suggestions");
+const criteriaDropdown = document.querySelector("#search-criteria");
+let suggestions = [];
+let pending = null;
+
+searchBox.addEventListener('input', () => {
+    const suggestion = suggestions.find(
+        (item) => item.text === searchBox.value);
+    if (suggestion) {
+        criteriaDropdown.value = suggestion.search_criteria;
+        return;
+    }
+    if (pending) {
+        pending.abort();
+    }
+    pending = new AbortController();
+    const url = new URL(searchBox.dataset.suggestUrl, window.location.origin);
+    url.searchParams.set('prefix', searchBox.value);
+    fetch(url, {signal: pending.signal})
+        .then((response) => response.json())
+        .then((data) => showSuggestions(data.suggestions))
+        .catch(() => {});
+});
+
+function showSuggestions(items) {
+    suggestions = items;
+    suggestionList.replaceChildren(...items.map((item) => {
+        const option = document.createElement('option');
+        option.value = item.text;
+        option.label = item.kind;
+        return option;
+    }));
+}
@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy.orm import clear_mappers
 from games import create_app, GameFileCSVReader
 from games.adapters import memory_repository
 from games.adapters.memory_repository import MemoryRepository #, populate
@@ -9,6 +10,13 @@ from games.adapters.repository import AbstractRepository
 TEST_DATA_PATH = Path('tests') / 'test_data' / 'games.csv'
 
 
+@pytest.fixture(autouse=True)
+def unmapped_domain_model():
+    # The domain classes are used unmapped here, even when database
+    # tests run earlier in the same session mapped them.
+    clear_mappers()
+
+
 @pytest.fixture
 def in_memory_repo():
     repo = MemoryRepository()
@@ -31,6 +39,20 @@ def client():
     return my_app.test_client()
 
 
+@pytest.fixture
+def catalog_client():
+    # A client of an app whose memory repository holds the test catalog
+    my_app = create_app({
+        'TESTING': True,
+        'REPOSITORY': 'MEMORY',
+        'TEST_DATA_PATH': TEST_DATA_PATH,
+        'MEMORY_SNAPSHOT_PATH': None,
+        'WTF_CSRF_ENABLED': False
+    })
+
+    return my_app.test_client()
+
+
 class AuthenticationManager:
     def __init__(self, client):
         self.__client = client
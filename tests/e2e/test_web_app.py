@@ -130,3 +130,103 @@ def test_user_can_remove_from_wishlist(client):
     assert response.status_code == 302
     assert response.headers['Location'] == '/userprofile'
 
+
+def test_game_library_sorted_by_price(client):
+    # Check the library and genre pages render for every sort order
+    for sort_criteria in ['title', 'game_id', 'release_date', 'price', 'review_count', 'rating']:
+        response = client.get(f'/gamelibrary?sort_criteria={sort_criteria}')
+        assert response.status_code == 200
+        response = client.get(f'/games_by_genre?genre=Action&sort_criteria={sort_criteria}')
+        assert response.status_code == 200
+
+
+def test_game_library_filtered_by_price_and_release_date(catalog_client):
+    # Check filtered library and genre pages render the matching games
+    client = catalog_client
+    response = client.get('/gamelibrary?sort_criteria=price&min_price=0&max_price=5'
+                          '&released_from=2015-01-01&released_to=2023-12-31')
+    assert response.status_code == 200
+    assert b'games match' in response.data
+    response = client.get('/games_by_genre?genre=Action&sort_criteria=price&max_price=not-a-price')
+    assert response.status_code == 200
+    assert b'games match' not in response.data
+    response = client.get('/games_by_genre?genre=Action&min_price=1000')
+    assert response.status_code == 200
+    assert b'0 games match' in response.data
+
+
+def test_game_library_facets(catalog_client):
+    # Check facet checkboxes are listed with counts and narrow the games
+    client = catalog_client
+    response = client.get('/gamelibrary')
+    assert response.status_code == 200
+    assert b'name="platforms"' in response.data and b'value="windows"' in response.data
+    response = client.get('/gamelibrary?platforms=mac&genres=Action')
+    assert response.status_code == 200
+    assert b'games match' in response.data
+    response = client.get('/games_by_genre?genre=Action&publishers=Nobody')
+    assert response.status_code == 200
+    assert b'0 games match' in response.data
+
+
+def test_new_releases(catalog_client):
+    # Check the new releases page lists the most recent game first
+    from games.adapters import repository
+    newest = max((game for game in repository.repo_instance.get_games()
+                  if game.release_date_ordinal),
+                 key=lambda game: (game.release_date_ordinal, game.game_id))
+    response = catalog_client.get('/new_releases')
+    assert response.status_code == 200
+    assert f'/games-description/{newest.game_id}'.encode() in response.data
+    response = catalog_client.get('/new_releases?released_to=1990-01-01')
+    assert response.status_code == 200
+    assert b'/games-description/' not in response.data
+
+
+def test_fuzzy_search(catalog_client):
+    # Check the fuzzy search criteria tolerates typos
+    response = catalog_client.get('/search?query=max payn&search_criteria=fuzzy')
+    assert response.status_code == 200
+    assert b'Max Payne' in response.data
+
+
+def test_full_text_search(catalog_client):
+    # Check the full text search criteria matches words of descriptions
+    response = catalog_client.get('/search?query=infinity ward&search_criteria=text')
+    assert response.status_code == 200
+    assert 'Call of Duty® 4: Modern Warfare®'.encode() in response.data
+
+
+def test_search_suggestions(catalog_client):
+    # Check the autocomplete endpoint returns JSON suggestions with links
+    response = catalog_client.get('/search/suggest?prefix=act&limit=3')
+    assert response.status_code == 200
+    suggestions = response.get_json()['suggestions']
+    assert 0 < len(suggestions) <= 3
+    assert all(suggestion['text'].lower().startswith('act') for suggestion in suggestions)
+    tag = next(suggestion for suggestion in suggestions if suggestion['kind'] == 'tag')
+    assert tag['url'] == '/search?query=Action&search_criteria=tags'
+    default = catalog_client.get('/search/suggest?prefix=s').get_json()['suggestions']
+    capped = catalog_client.get('/search/suggest?prefix=s&limit=1000').get_json()['suggestions']
+    assert len(default) <= 10 and len(capped) <= 20
+    assert capped[:len(default)] == default
+
+
+def test_memory_app_starts_from_snapshot(tmp_path):
+    # Check the first start writes a snapshot and later starts reuse it
+    from games import create_app
+    from games.adapters import repository
+    from tests.conftest import TEST_DATA_PATH
+    config = {
+        'TESTING': True,
+        'REPOSITORY': 'MEMORY',
+        'TEST_DATA_PATH': TEST_DATA_PATH,
+        'MEMORY_SNAPSHOT_PATH': tmp_path / 'games.snapshot',
+    }
+    create_app(config)
+    first_repo = repository.repo_instance
+    written = (tmp_path / 'games.snapshot').stat().st_mtime_ns
+    create_app(config)
+    assert (tmp_path / 'games.snapshot').stat().st_mtime_ns == written
+    assert repository.repo_instance is not first_repo
+    assert repository.repo_instance.get_games() == first_repo.get_games()
@@ -1,8 +1,12 @@
 import pytest
 import os
+from datetime import date
 from games.domainmodel.model import Publisher, Genre, Game, Review, User, \
     Wishlist
 from games.adapters.datareader.csvdatareader import GameFileCSVReader
+from games.adapters.datareader.ingestion import read_game_chunks, ingest, \
+    game_from_record, game_to_record, ProgressSink
+from games.adapters.datareader.parallel import parse_csv_parallel, split_records
 
 
 def test_publisher_init():
@@ -161,8 +165,11 @@ def test_game_release_date_setter():
     game = Game(1, "Super Soccer Blast")
     game.release_date = "Oct 21, 2008"
     assert game.release_date == "Oct 21, 2008"
+    assert game.release_date_ordinal == date(2008, 10, 21).toordinal()
     with pytest.raises(ValueError):
         game.release_date = "21/08/2008"
+    assert game.release_date_ordinal == date(2008, 10, 21).toordinal()
+    assert Game(2, "Undated").release_date_ordinal == 0
 
 
 def test_game_description_setter():
@@ -242,6 +249,32 @@ def test_game_add_remove_genre():
     assert len(game1.genres) == 0
 
 
+def test_game_platforms():
+    game1 = Game(1, "Super Soccer Blast")
+    assert game1.platforms == 0
+    assert game1.system_dict == {"windows": False, "mac": False,
+                                 "linux": False}
+
+    game1.set_platform("windows", True)
+    game1.set_platform("linux", True)
+    assert game1.system_dict == {"windows": True, "mac": False,
+                                 "linux": True}
+    game1.set_platform("windows", False)
+    assert game1.platforms == 4
+
+    with pytest.raises(ValueError):
+        game1.set_platform("amiga", True)
+
+
+def test_domain_objects_use_slots():
+    game1 = Game(1, "Super Soccer Blast")
+    game1.publisher = Publisher("Publisher A")
+    game1.add_genre(Genre("Adventure"))
+    review = Review(User("Shyamli", "pw12345"), game1, 4, "Great game!")
+    for instance in (game1, game1.publisher, game1.genres[0], review):
+        assert not vars(instance)
+
+
 def test_user_initialization():
     user1 = User("Shyamli", "pw12345")
     user2 = User("asma", "pw67890")
@@ -467,5 +500,163 @@ def test_genres_dataset():
     assert sorted_genre_sample == "[Action, Adventure, Animation & Modeling]"
 
 
+def test_read_game_chunks_streams_bounded_chunks():
+    chunks = list(read_game_chunks("tests/test_data/games.csv", chunk_size=4))
+    assert [len(chunk) for chunk in chunks[:-1]] == [4] * (len(chunks) - 1)
+    streamed = [game for chunk in chunks for game in chunk]
+    unchunked, = read_game_chunks("tests/test_data/games.csv", chunk_size=100)
+    assert streamed == unchunked
+
+
+def test_read_game_chunks_reports_rejected_rows(tmp_path):
+    with open("tests/test_data/games.csv", encoding="utf-8-sig") as file:
+        header = file.readline()
+        first_row = file.readline()
+    csv_path = tmp_path / "games.csv"
+    csv_path.write_text(header + first_row + "not a number,Broken Game\n",
+                        encoding="utf-8")
+    rejected = []
+    games = [game for chunk in read_game_chunks(csv_path, rejects=rejected.append)
+             for game in chunk]
+    assert [game.game_id for game in games] == [7940]
+    assert len(rejected) == 1
+    assert rejected[0].line_number == 3
+    assert rejected[0].row["Name"] == "Broken Game"
+    assert "invalid data" in rejected[0].reason
+
+
+def test_game_from_record_matches_setters():
+    ordinal = date(2007, 11, 12).toordinal()
+    game = Game.from_record(7940, "Call of Duty", "Nov 12, 2007", ordinal,
+                            9.99, "A shooter", "https://example.com/cod.jpg",
+                            None, Publisher("Activision"),
+                            [Genre("Action")], ["English"], 1,
+                            {"Multi-player"}, {"FPS"})
+    expected = Game(7940, "Call of Duty")
+    expected.release_date = "Nov 12, 2007"
+    expected.price = 9.99
+    expected.description = "A shooter"
+    expected.image_url = "https://example.com/cod.jpg"
+    expected.publisher = Publisher("Activision")
+    expected.add_genre(Genre("Action"))
+    expected.add_language("English")
+    expected.set_platform("windows", True)
+    expected.add_category("Multi-player")
+    expected.add_tag("FPS")
+    assert game_to_record(game) == game_to_record(expected)
+    assert game.reviews == [] and game.website_url is None
+    with pytest.raises(ValueError):
+        Game.from_record(-1, "Call of Duty", "Nov 12, 2007", ordinal, 9.99, None,
+                         None, None, None, [], [], 0, set(), set())
+
+
+def test_parsed_games_keep_setter_invariants():
+    games = [game for chunk in read_game_chunks("tests/test_data/games.csv")
+             for game in chunk]
+    for game in games:
+        rebuilt = game_from_record(game_to_record(game))
+        assert game_to_record(rebuilt)[:12] == game_to_record(game)[:12]
+        assert (rebuilt.categories, rebuilt.tags) \
+            == (game.categories, game.tags)
+        assert len(set(game.genres)) == len(game.genres)
+        assert all(tag == tag.strip() and tag for tag in game.tags)
+        assert game.title == game.title.strip()
+        assert game.price >= 0
+
+
+def test_read_game_chunks_checks_columns_once(tmp_path):
+    with open("tests/test_data/games.csv", encoding="utf-8-sig") as file:
+        header = file.readline().replace(",Price,", ",Cost,")
+        rows = file.readline() + file.readline()
+    csv_path = tmp_path / "games.csv"
+    csv_path.write_text(header + rows, encoding="utf-8")
+    rejected = []
+    assert list(read_game_chunks(csv_path, rejects=rejected.append)) == []
+    assert [rejected_row.reason for rejected_row in rejected] \
+        == ["missing key: 'Price'"] * 2
+
+
+def test_ingest_feeds_every_sink_in_order():
+    class ListSink:
+        def __init__(self):
+            self.games = []
+            self.closed = False
+
+        def write(self, games):
+            self.games.extend(games)
+
+        def close(self):
+            self.closed = True
+
+    sinks = [ListSink(), ListSink()]
+    count = ingest(read_game_chunks("tests/test_data/games.csv", chunk_size=3), sinks)
+    assert count == len(sinks[0].games) == len(sinks[1].games)
+    assert sinks[0].games == sinks[1].games
+    assert sinks[0].closed and sinks[1].closed
+
+
+def test_progress_sink_reports_count_and_rate():
+    lines = []
+    sink = ProgressSink(report=lines.append, interval=5)
+    count = ingest(read_game_chunks("tests/test_data/games.csv", chunk_size=3), [sink])
+    assert count == 14
+    assert [line.split(' games')[0] for line in lines] == ['6', '12', '14']
+    assert all(line.endswith(' games/s)') for line in lines)
+
+
+def write_multiline_csv(tmp_path):
+    with open("tests/test_data/games.csv", encoding="utf-8-sig") as file:
+        header = file.readline()
+        rows = file.read()
+    # Put a line break and escaped quotes inside a quoted description,
+    # and repeat every row so the AppIDs have to be merged.
+    rows = rows.replace('"The new action', '"The ""new""\naction')
+    csv_path = tmp_path / "games.csv"
+    csv_path.write_text(header + rows + rows, encoding="utf-8")
+    return csv_path
+
+
+def test_split_records_respects_quoted_line_breaks(tmp_path):
+    csv_path = write_multiline_csv(tmp_path)
+    sequential = [game.game_id for chunk in read_game_chunks(csv_path)
+                  for game in chunk]
+    for parts in (2, 3, 7, 40):
+        ranges = split_records(csv_path, parts)
+        assert ranges[0][0] < ranges[0][1]
+        assert all(end == next_start for (_, end, _), (next_start, _, _)
+                   in zip(ranges, ranges[1:]))
+        assert sorted(game.game_id for game in parse_csv_parallel(csv_path, parts)) \
+            == sorted(set(sequential))
+
+
+def test_parse_csv_parallel_matches_sequential_read(tmp_path):
+    csv_path = write_multiline_csv(tmp_path)
+    games_by_id = {game.game_id: game for chunk in read_game_chunks(csv_path)
+                   for game in chunk}
+    parallel_games = parse_csv_parallel(csv_path, workers=3)
+    assert [game.game_id for game in parallel_games] == sorted(games_by_id)
+    for game in parallel_games:
+        expected = games_by_id[game.game_id]
+        assert game.description == expected.description
+        assert game.genres == expected.genres
+        assert game.tags == expected.tags
+        assert game.languages == expected.languages
+        assert game.system_dict == expected.system_dict
+        assert game.publisher == expected.publisher
+
+
+def test_parse_csv_parallel_reports_rejected_rows(tmp_path):
+    csv_path = write_multiline_csv(tmp_path)
+    with open(csv_path, "a", encoding="utf-8") as file:
+        file.write("not a number,Broken Game\n")
+    sequential_rejects = []
+    list(read_game_chunks(csv_path, rejects=sequential_rejects.append))
+    parallel_rejects = []
+    parse_csv_parallel(csv_path, workers=2, rejects=parallel_rejects.append)
+    assert [rejected.line_number for rejected in parallel_rejects] \
+        == [rejected.line_number for rejected in sequential_rejects]
+    assert parallel_rejects[-1].row["Name"] == "Broken Game"
+
+
 if __name__ == "__main__":
     pytest.main()
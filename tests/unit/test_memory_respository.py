@@ -1,7 +1,16 @@
+import csv
+import os
 import pytest
-from games.domainmodel.model import Game, Genre
+import shutil
+import sys
+import threading
+from games.domainmodel.model import Game, Genre, Publisher, User
 from games.adapters.repository import AbstractRepository
 from games.adapters.repository import RepositoryException
+from games.adapters.catalog_reload import CatalogReloader
+from games.adapters.interning import InternRegistry
+from games.adapters.snapshot import csv_checksum, load_snapshot, save_snapshot
+from games.adapters.tag_query import TagQueryException
 
 def test_repository_can_add_game(in_memory_repo):
     # Test repository can add a game object
@@ -89,4 +98,631 @@ def test_add_dupilicate_genre(in_memory_repo):
 def test_get_games_by_genre(in_memory_repo):
     #Test to get games based on genre
     game_list = in_memory_repo.get_genre_of_games('Action')
-    assert len(game_list) == 14
\ No newline at end of file
+    assert len(game_list) == 14
+
+def test_get_games_by_ids(in_memory_repo):
+    # Test batch lookup keeps the order of the ids and skips unknown ids
+    games = in_memory_repo.get_games_by_ids([1228870, 34242, 7940])
+    assert games == [Game(1228870, "Bartlow's Dread Machine"),
+                     Game(7940, 'Call of Duty® 4: Modern Warfare®')]
+
+
+def test_add_game_with_existing_id_replaces_game(in_memory_repo):
+    # Test the id index stays in sync when a game is added twice
+    game = Game(7940, 'Call of Duty 4')
+    in_memory_repo.add_game(game)
+    assert in_memory_repo.get_number_of_games() == 14
+    assert in_memory_repo.get_games_by_id(7940).title == 'Call of Duty 4'
+
+
+def test_get_games_by_genre_accepts_genre_object(in_memory_repo):
+    # Test genre postings can be queried with a Genre object as well as a name
+    assert in_memory_repo.get_genre_of_games(Genre('Action')) == \
+        in_memory_repo.get_genre_of_games('Action')
+
+
+def test_genre_index_follows_added_games(in_memory_repo):
+    # Test games added after loading show up in genre and similar game lookups
+    game = Game(1, 'Typing Tutor')
+    game.add_genre(Genre('Education'))
+    in_memory_repo.add_genre(Genre('Education'))
+    in_memory_repo.add_game(game)
+    assert in_memory_repo.get_genre_of_games('Education') == [game]
+    similar_games = in_memory_repo.get_similar_games([Genre('Education'),
+                                                      Genre('Action')])
+    assert len(similar_games) == 15
+    assert similar_games[0] == game
+    assert similar_games == sorted(similar_games)
+
+
+def test_search_games_by_tags_is_case_insensitive(in_memory_repo):
+    # Test tag postings are case folded
+    assert in_memory_repo.search_games_by_tags('sTEAMPUNK') == \
+        in_memory_repo.search_games_by_tags('Steampunk')
+
+
+def test_search_games_by_tags_with_operators(in_memory_repo):
+    # Test AND, OR and NOT tag queries are evaluated on the tag postings
+    games = in_memory_repo.search_games_by_tags('Steampunk OR Zombies')
+    assert games == [Game(7940, 'Call of Duty® 4: Modern Warfare®'),
+                     Game(242530, 'The Chaos Engine'),
+                     Game(1228870, "Bartlow's Dread Machine")]
+    games = in_memory_repo.search_games_by_tags('Co-op AND Shooter NOT Zombies')
+    assert [game.game_id for game in games] == [242530, 410320, 1228870]
+    games = in_memory_repo.search_games_by_tags('NOT Action')
+    assert [game.game_id for game in games] == [1621490, 1998840]
+
+
+def test_get_tags_and_tag_counts(in_memory_repo):
+    # Test tags are listed alphabetically and counted most common first
+    counts = in_memory_repo.get_tag_counts()
+    assert list(counts.items())[0] == ('Action', 12)
+    assert counts['Steampunk'] == len(in_memory_repo.search_games_by_tags('Steampunk'))
+    assert in_memory_repo.get_tags() == sorted(counts, key=str.casefold)
+
+
+def test_search_games_by_multi_word_category_with_operators(in_memory_repo):
+    # Test multi-word categories need no quoting in a category query
+    games = in_memory_repo.search_games_by_category('VR Support AND Single-player')
+    assert games == [Game(418650, 'Space Pirate Trainer')]
+
+
+def test_search_games_by_malformed_tag_query(in_memory_repo):
+    # Test a dangling operator is rejected
+    with pytest.raises(TagQueryException):
+        in_memory_repo.search_games_by_tags('Steampunk AND')
+
+
+def test_search_games_by_title_matches_substrings(in_memory_repo):
+    # Test the trigram index returns the same games as a substring scan
+    for query in ['duty® 4', 'TH', 'e', 'engine', 'chaos eng', 'xyz']:
+        expected = [game for game in in_memory_repo.get_games()
+                    if query.lower() in game.title.lower()]
+        assert in_memory_repo.search_games_by_title(query) == expected
+
+
+def test_search_games_by_title_does_not_strip_accents_from_results(in_memory_repo):
+    # Test accent folding only narrows candidates, results keep substring semantics
+    game = Game(2, 'Pokémon Café')
+    in_memory_repo.add_game(game)
+    assert in_memory_repo.search_games_by_title('mon caf') == [game]
+    assert in_memory_repo.search_games_by_title('pokemon') == []
+
+
+
+def test_title_and_publisher_searches_match_mid_word_substrings(in_memory_repo):
+    # Test title and publisher searches keep substring semantics, unlike full-text search
+    games = in_memory_repo.get_games()
+    for query in ['ion', 'Ubi', 'he ', 'soft', 'war', 'call duty', 'xyz']:
+        assert in_memory_repo.search_games_by_title(query) == \
+            [game for game in games if query.lower() in game.title.lower()]
+        assert in_memory_repo.search_games_by_publisher(query) == \
+            [game for game in games
+             if query.lower() in (game.publisher.publisher_name if game.publisher else '').lower()]
+    assert any(in_memory_repo.search_games_by_title(query) for query in ['ion', 'he '])
+
+def test_search_games_by_publisher_follows_replaced_games(in_memory_repo):
+    # Test the publisher index is updated when a game is replaced
+    game = Game(311120, 'Buka Entertainment')
+    game.publisher = Publisher('Kelvin Developers')
+    in_memory_repo.add_game(game)
+    assert in_memory_repo.search_games_by_publisher('Buka Entertainment') == []
+    assert in_memory_repo.search_games_by_publisher('kelvin') == [game]
+
+
+def test_suggest_ranks_titles_publishers_and_tags(in_memory_repo):
+    # Test suggestions match a prefix scan, most popular first
+    from games.adapters.indexes import fold_text
+    suggestions = in_memory_repo.suggest('s', limit=20)
+    assert 0 < len(suggestions) <= 20
+    assert all(fold_text(suggestion.text).startswith('s') for suggestion in suggestions)
+    popularity = [suggestion.popularity for suggestion in suggestions]
+    assert popularity == sorted(popularity, reverse=True)
+    assert {'publisher', 'tag'} <= {suggestion.kind for suggestion in in_memory_repo.suggest('a', 20)}
+    action = [suggestion for suggestion in in_memory_repo.suggest('ACTI') if suggestion.kind == 'tag']
+    assert action[0].text == 'Action'
+    assert action[0].popularity == len(in_memory_repo.search_games_by_tags('Action'))
+    assert in_memory_repo.suggest('') == [] and in_memory_repo.suggest('zzzz') == []
+
+
+def test_suggest_follows_catalog_changes(in_memory_repo):
+    # Test new titles are suggested once added
+    assert in_memory_repo.suggest('pokémon') == []
+    in_memory_repo.add_game(Game(2, 'Pokémon Café'))
+    suggestion = in_memory_repo.suggest('pokemon c')[0]
+    assert (suggestion.text, suggestion.kind, suggestion.game_id) == ('Pokémon Café', 'title', 2)
+
+
+def test_prefix_index_matches_scan_on_large_ranges():
+    # Test precomputed top suggestions of large prefix ranges agree with ranking a scan
+    import random
+    from games.adapters.indexes import PrefixIndex, Suggestion
+    generator = random.Random(235)
+    suggestions = [Suggestion(''.join(generator.choice('ab c') for _ in range(generator.randint(1, 8))),
+                              'title', game_id, generator.randint(0, 30))
+                   for game_id in range(5000)]
+    index = PrefixIndex(suggestions)
+    for prefix in ['a', 'ab', 'Ab C', 'b b', 'cc', ' a', 'd']:
+        folded = prefix.lower().lstrip()
+        expected = sorted((suggestion for suggestion in suggestions if suggestion.text.startswith(folded)),
+                          key=lambda suggestion: (-suggestion.popularity, suggestion.text, suggestion.game_id))
+        assert index.search(prefix, 10) == expected[:10]
+
+
+def test_search_games_full_text_ranks_titles_first(in_memory_repo):
+    # Test full-text search matches word prefixes in titles, publishers and descriptions
+    assert [game.game_id for game in in_memory_repo.search_games_full_text('infinity ward')] == [7940]
+    games = in_memory_repo.search_games_full_text('machine')
+    assert [game.game_id for game in games[:2]] == [1228870, 1875470]
+    assert len(games) == 4
+    assert [game.game_id for game in in_memory_repo.search_games_full_text('shoot em', limit=2)] == [1998840, 944590]
+    assert in_memory_repo.search_games_full_text('') == []
+    in_memory_repo.add_game(Game(2, 'Machine Café'))
+    assert in_memory_repo.search_games_full_text('machine cafe')[0].game_id == 2
+
+
+def test_search_games_fuzzy_ranks_by_similarity(in_memory_repo):
+    # Test typo tolerant search ranks closer titles first and follows changes
+    assert [game.title for game in in_memory_repo.search_games_fuzzy('the chaos engin')][0] == 'The Chaos Engine'
+    in_memory_repo.add_game(Game(2, 'Chaos Engine Reloaded'))
+    in_memory_repo.add_game(Game(3, 'The Chaos Engine'))
+    games = in_memory_repo.search_games_fuzzy('chaos engne')
+    assert [game.title for game in games[:3]] == ['The Chaos Engine', 'The Chaos Engine', 'Chaos Engine Reloaded']
+    assert games[0].game_id < games[1].game_id
+    assert len(in_memory_repo.search_games_fuzzy('chaos engne', limit=1)) == 1
+    assert in_memory_repo.search_games_fuzzy('zq') == []
+    assert in_memory_repo.search_games_fuzzy('qwertyuiop') == []
+
+
+def test_get_user_normalises_username(in_memory_repo):
+    # Test users are found regardless of case and surrounding whitespace
+    user = User('Kelvin', 'ABCDEF1234')
+    in_memory_repo.add_user(user)
+    assert in_memory_repo.get_user(' KELVIN ') is user
+    assert in_memory_repo.get_user('bob') is None
+
+
+def test_add_duplicate_user(in_memory_repo):
+    # Test a second user with the same normalised username is rejected
+    in_memory_repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    with pytest.raises(RepositoryException):
+        in_memory_repo.add_user(User('kelvin ', 'GHIJKL5678'))
+
+
+def test_add_games_bulk(in_memory_repo):
+    # Test bulk loading deduplicates by id, keeps catalog order and indexes the games
+    new_game = Game(5, 'Typing Tutor')
+    new_game.add_genre(Genre('Education'))
+    new_game.add_tag('Typing')
+    replacement = Game(7940, 'Call of Duty 4')
+    in_memory_repo.add_games_bulk([Game(5, 'Old Title'), new_game, replacement])
+    games = in_memory_repo.get_games()
+    assert len(games) == 15
+    assert games == sorted(games)
+    assert games[0] is new_game
+    assert in_memory_repo.get_games_by_id(7940) is replacement
+    assert in_memory_repo.get_genre_of_games('Education') == [new_game]
+    assert in_memory_repo.search_games_by_tags('typing') == [new_game]
+    assert in_memory_repo.search_games_by_title('call of duty') == [replacement]
+    assert len(in_memory_repo.get_genre_of_games('Action')) == 13
+
+
+def test_get_sorted_games_sorts_whole_catalog(in_memory_repo):
+    # Test pages are slices of a global sort order rather than sorted pages
+    all_games = in_memory_repo.get_games()
+    by_price = sorted(all_games, key=lambda game: (game.price, game.game_id))
+    assert in_memory_repo.get_sorted_games('price') == by_price
+    assert in_memory_repo.get_sorted_games('price', offset=10, limit=10) == by_price[10:]
+    assert in_memory_repo.get_sorted_games('price', limit=3, descending=True) == by_price[::-1][:3]
+    titles = [game.title for game in in_memory_repo.get_sorted_games('title', limit=3)]
+    assert titles == ['Arcadia', "Bartlow's Dread Machine", 'Call of Duty® 4: Modern Warfare®']
+
+
+def test_get_sorted_games_by_release_date_is_chronological(in_memory_repo):
+    # Test release dates are sorted as dates rather than as strings
+    games = in_memory_repo.get_sorted_games('release_date', genre='Action')
+    assert [game.game_id for game in games[:3]] == [7940, 12140, 242530]
+    assert len(games) == in_memory_repo.get_number_of_genre_games('Action') == 14
+
+
+def test_sort_orders_follow_added_games_and_reviews(in_memory_repo):
+    # Test sort orders that were already built are updated incrementally
+    in_memory_repo.get_sorted_games('price', genre='Action')
+    in_memory_repo.get_sorted_games('review_count')
+    free_game = Game(3, 'Free Game')
+    free_game.price = 0
+    free_game.add_genre(Genre('Action'))
+    in_memory_repo.add_game(free_game)
+    assert in_memory_repo.get_sorted_games('price', genre='Action', limit=1) == [free_game]
+    game = in_memory_repo.get_games_by_id(7940)
+    in_memory_repo.add_review(User('Kelvin', 'ABCDEF1234'), game, 5, 'Great game')
+    assert in_memory_repo.get_sorted_games('review_count', limit=1) == [game]
+    assert in_memory_repo.get_sorted_games('rating', limit=1) == [game]
+
+
+def run_in_threads(target, thread_count=8):
+    barrier = threading.Barrier(thread_count)
+    results = []
+
+    def run(index):
+        barrier.wait()
+        results.append(target(index))
+
+    threads = [threading.Thread(target=run, args=(index,))
+               for index in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_reviews_by_one_user_add_one_review(in_memory_repo):
+    # Test the duplicate review check holds across threads
+    user = User('Kelvin', 'ABCDEF1234')
+    game = in_memory_repo.get_games_by_id(7940)
+    results = run_in_threads(
+        lambda index: in_memory_repo.add_review(user, game, 4, f'Review {index}'))
+    assert results.count(True) == 1
+    assert len(game.reviews) == 1
+    assert len(user.reviews) == 1
+
+
+def test_concurrent_add_user_claims_username_once(in_memory_repo):
+    # Test only one of several threads registering a username succeeds
+    def add_user(index):
+        try:
+            in_memory_repo.add_user(User('Kelvin', f'Password{index}'))
+            return True
+        except RepositoryException:
+            return False
+
+    assert run_in_threads(add_user).count(True) == 1
+
+
+def test_concurrent_wishlist_updates(in_memory_repo):
+    # Test concurrent wishlist additions neither duplicate nor lose games
+    user = User('Kelvin', 'ABCDEF1234')
+    games = in_memory_repo.get_games()[:8]
+    run_in_threads(lambda index: [in_memory_repo.add_wish_game(user, game)
+                                  for game in games])
+    assert in_memory_repo.get_wishlist(user) == games
+
+
+def test_reads_see_consistent_pages_during_writes(in_memory_repo):
+    # Test readers never see a partially updated sort order
+    in_memory_repo.get_sorted_games('price')
+    number_of_games = in_memory_repo.get_number_of_games()
+    errors = []
+
+    def write(index):
+        for game_id in range(index * 100, index * 100 + 100):
+            game = Game(game_id, f'Game {game_id}')
+            game.price = game_id % 7
+            in_memory_repo.add_game(game)
+
+    def read(index):
+        for _ in range(100):
+            games = in_memory_repo.get_sorted_games('price')
+            prices = [(game.price, game.game_id) for game in games]
+            if prices != sorted(prices):
+                errors.append(prices)
+
+    run_in_threads(lambda index: write(index) if index % 2 else read(index))
+    assert errors == []
+    assert in_memory_repo.get_number_of_games() == number_of_games + 400
+
+
+def test_snapshot_round_trip(in_memory_repo, tmp_path):
+    # Test a snapshot restores the catalog and its indexes
+    from tests.conftest import TEST_DATA_PATH
+    checksum = csv_checksum(TEST_DATA_PATH)
+    snapshot_path = tmp_path / 'games.snapshot'
+    save_snapshot(in_memory_repo, snapshot_path, checksum)
+    repo = load_snapshot(snapshot_path, checksum)
+    assert repo.get_games() == in_memory_repo.get_games()
+    assert repo.get_genres() == in_memory_repo.get_genres()
+    assert repo.search_games_by_title('call') == in_memory_repo.search_games_by_title('call')
+    assert repo.get_sorted_games('price') == in_memory_repo.get_sorted_games('price')
+    repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    assert repo.add_review(repo.get_user('kelvin'), repo.get_games_by_id(7940), 5, 'Great game')
+
+
+def test_snapshot_is_ignored_when_stale_or_missing(in_memory_repo, tmp_path):
+    # Test snapshots of another CSV file or corrupt snapshots are not used
+    snapshot_path = tmp_path / 'games.snapshot'
+    assert load_snapshot(snapshot_path, 'checksum') is None
+    save_snapshot(in_memory_repo, snapshot_path, 'checksum')
+    assert load_snapshot(snapshot_path, 'other checksum') is None
+    snapshot_path.write_bytes(b'not a snapshot')
+    assert load_snapshot(snapshot_path, 'checksum') is None
+
+
+def test_loaded_games_share_interned_values(in_memory_repo):
+    # Test games loaded into the repository share genres, publishers and strings
+    genres = {genre.genre_name: genre for genre in in_memory_repo.get_genres()}
+    tags = {}
+    for game in in_memory_repo.get_games():
+        for genre in game.genres:
+            assert genre is genres[genre.genre_name]
+        for tag in game.tags:
+            assert tags.setdefault(tag, tag) is tag
+    registry = in_memory_repo.get_intern_registry()
+    assert registry.genre('Action') is genres['Action']
+    assert in_memory_repo.get_publishers()[0] is registry.publisher(
+        in_memory_repo.get_publishers()[0].publisher_name)
+
+
+def test_intern_registry_returns_one_instance_per_value():
+    # Test equal names map to one shared object, whatever their whitespace
+    registry = InternRegistry()
+    assert registry.genre('Action') is registry.genre(' Action ')
+    assert registry.publisher('Valve') is registry.intern_publisher(Publisher('Valve'))
+    assert registry.genre('Action') is not registry.genre('Adventure')
+    tag = ''.join(['Rogue', 'like'])
+    assert registry.string(tag) is tag
+    assert registry.string(''.join(['Rogue', 'like'])) is tag
+    assert len(registry) == 4
+
+
+def test_update_game_keeps_reviews_and_reindexes(in_memory_repo):
+    # Test updating a game replaces its catalog data but keeps its reviews
+    in_memory_repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    user = in_memory_repo.get_user('kelvin')
+    stored_game = in_memory_repo.get_games_by_id(7940)
+    in_memory_repo.add_review(user, stored_game, 5, 'Great game')
+    in_memory_repo.add_wish_game(user, stored_game)
+    in_memory_repo.get_sorted_games('price')
+    in_memory_repo.get_sorted_games('title', genre='Action')
+    new_game = Game(7940, 'Zebra Racing')
+    new_game.price = 0.5
+    new_game.publisher = Publisher('Zebra Studios')
+    new_game.add_genre(Genre('Racing'))
+    in_memory_repo.update_game(new_game)
+    game = in_memory_repo.get_games_by_id(7940)
+    # The stored game is replaced, not changed, so readers holding it
+    # keep a consistent snapshot
+    assert game is not stored_game and game is not new_game
+    assert stored_game.title == 'Call of Duty® 4: Modern Warfare®'
+    assert game.title == 'Zebra Racing'
+    assert game.reviews == stored_game.reviews and len(game.reviews) == 1
+    assert game in in_memory_repo.get_games()
+    assert in_memory_repo.get_wishlist(user)[0] is game
+    assert game not in in_memory_repo.get_sorted_games('title', genre='Action')
+    assert in_memory_repo.get_sorted_games('review_count')[0] is game
+    assert in_memory_repo.search_games_by_title('zebra') == [game]
+    assert in_memory_repo.search_games_by_title('call of duty') == []
+    assert in_memory_repo.search_games_by_publisher('zebra') == [game]
+    assert in_memory_repo.get_sorted_games('price')[0] is game
+    assert Genre('Racing') in in_memory_repo.get_genres()
+    assert in_memory_repo.get_genre_of_games('Racing') == [game]
+
+
+
+def test_updates_never_hide_the_game_from_readers(in_memory_repo):
+    # Test readers find a game by its old or new data while it is updated
+    in_memory_repo.get_sorted_games('title', genre='Action')
+    versions = []
+    for title, genre in [('Zebra Racing', 'Racing'), ('Call of Duty', 'Action')]:
+        version = Game(7940, title)
+        version.add_genre(Genre(genre))
+        versions.append(version)
+
+    def run(index):
+        if index == 0:
+            for version in versions * 500:
+                in_memory_repo.update_game(version)
+            return True
+        for _ in range(1000):
+            found = (in_memory_repo.get_genre_of_games('Action')
+                     + in_memory_repo.get_genre_of_games('Racing')
+                     + in_memory_repo.search_games_by_title('zebra')
+                     + in_memory_repo.search_games_by_title('call of duty')
+                     + in_memory_repo.get_sorted_games('title', genre='Action')
+                     + in_memory_repo.get_sorted_games('title', genre='Racing'))
+            if 7940 not in {game.game_id for game in found}:
+                return False
+        return True
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        assert all(run_in_threads(run, thread_count=4))
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def test_remove_game_keeps_reviews_and_wishlists(in_memory_repo):
+    # Test a removed game leaves the catalog but not its reviews or wishlists
+    number_of_games = in_memory_repo.get_number_of_games()
+    in_memory_repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    user = in_memory_repo.get_user('kelvin')
+    game = in_memory_repo.get_games_by_id(7940)
+    in_memory_repo.add_review(user, game, 5, 'Great game')
+    in_memory_repo.add_wish_game(user, game)
+    in_memory_repo.remove_game(7940)
+    assert in_memory_repo.get_games_by_id(7940) is None
+    assert in_memory_repo.get_number_of_games() == number_of_games - 1
+    assert game not in in_memory_repo.get_games()
+    assert in_memory_repo.search_games_by_title('call of duty') == []
+    assert game not in in_memory_repo.get_sorted_games('title')
+    assert in_memory_repo.get_user_review(user)[0].game is game
+    assert game in in_memory_repo.get_wishlist(user)
+
+
+def rewrite_catalog(path, edit_rows):
+    with open(path, encoding='utf-8-sig', newline='') as file:
+        reader = csv.DictReader(file)
+        fieldnames = reader.fieldnames
+        rows = edit_rows(list(reader))
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_catalog_reloader_applies_row_level_diff(in_memory_repo, tmp_path):
+    # Test a reload applies only the changed rows and keeps users and reviews
+    from tests.conftest import TEST_DATA_PATH
+    data_path = tmp_path / 'games.csv'
+    shutil.copy(TEST_DATA_PATH, data_path)
+    in_memory_repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    user = in_memory_repo.get_user('kelvin')
+    game = in_memory_repo.get_games_by_id(7940)
+    in_memory_repo.add_review(user, game, 5, 'Great game')
+    removed_id = in_memory_repo.get_games()[-1].game_id
+    unchanged_game = in_memory_repo.get_games()[1]
+    number_of_games = in_memory_repo.get_number_of_games()
+
+    def edit_rows(rows):
+        new_row = dict(rows[0], AppID='99', Name='Brand New Game')
+        rows[0]['Name'] = 'Call of Duty® 4: Remastered'
+        rows = [row for row in rows if row['AppID'] != str(removed_id)]
+        return rows + [new_row, dict(rows[1], AppID='100', Price='free')]
+
+    rejected = []
+    reloader = CatalogReloader(data_path, in_memory_repo,
+                               rejects=rejected.append)
+    reloader.prime()
+    os.utime(data_path, ns=(0, 0))
+    assert reloader.reload_if_changed() is None
+    rewrite_catalog(data_path, edit_rows)
+    diff = reloader.reload_if_changed()
+    assert diff.inserted == [99]
+    assert diff.updated == [7940]
+    assert diff.deleted == [removed_id]
+    assert [row.row['AppID'] for row in rejected] == ['100']
+    assert in_memory_repo.get_number_of_games() == number_of_games
+    updated_game = in_memory_repo.get_games_by_id(7940)
+    assert updated_game.title == 'Call of Duty® 4: Remastered'
+    assert game.title == 'Call of Duty® 4: Modern Warfare®'
+    assert in_memory_repo.get_user_review(user)[0] in updated_game.reviews
+    assert in_memory_repo.get_games_by_id(100) is None
+    assert in_memory_repo.get_games_by_id(removed_id) is None
+    assert in_memory_repo.get_games_by_id(99).title == 'Brand New Game'
+    assert in_memory_repo.get_games_by_id(unchanged_game.game_id) is unchanged_game
+    assert in_memory_repo.search_games_by_title('remastered') == [updated_game]
+    assert reloader.reload_if_changed() is None
+
+
+def test_filter_game_ids_matches_sort_orders(in_memory_repo):
+    # Test the columnar sorts agree with the maintained sort orders
+    in_memory_repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    user = in_memory_repo.get_user('kelvin')
+    in_memory_repo.add_review(user, in_memory_repo.get_games_by_id(7940), 4, 'Good')
+    for sort_criteria in ['title', 'game_id', 'release_date', 'price', 'review_count', 'rating']:
+        for genre in [None, 'Action']:
+            for descending in [False, True]:
+                game_ids = in_memory_repo.filter_game_ids(sort_criteria, genre, descending=descending)
+                games = in_memory_repo.get_sorted_games(sort_criteria, genre, descending=descending)
+                assert list(game_ids) == [game.game_id for game in games]
+    with pytest.raises(ValueError):
+        in_memory_repo.filter_game_ids('popularity')
+
+
+def test_filter_game_ids_by_price_and_release_date(in_memory_repo):
+    # Test price and date ranges select the same games as a Python loop
+    from datetime import date
+    low, high = date(2015, 1, 1), date(2021, 12, 31)
+    game_ids = in_memory_repo.filter_game_ids('price', min_price=1, max_price=20,
+                                              released_from=low, released_to=high)
+    expected = sorted((game.price, game.game_id) for game in in_memory_repo.get_games()
+                      if 1 <= game.price <= 20
+                      and low.toordinal() <= game.release_date_ordinal <= high.toordinal())
+    assert list(game_ids) == [game_id for _, game_id in expected]
+    assert in_memory_repo.get_games_by_ids(game_ids)[0].game_id == expected[0][1]
+    assert len(in_memory_repo.filter_game_ids(genre='No such genre')) == 0
+
+
+def test_released_between_matches_scan(in_memory_repo):
+    # Test date range lookups return the dated games in release order
+    from datetime import date
+    low, high = date(2010, 1, 1), date(2019, 12, 31)
+    expected = sorted((game.release_date_ordinal, game.game_id)
+                      for game in in_memory_repo.get_games()
+                      if low.toordinal() <= game.release_date_ordinal <= high.toordinal())
+    games = in_memory_repo.released_between(low, high)
+    assert [game.game_id for game in games] == [game_id for _, game_id in expected]
+    newest = in_memory_repo.released_between(low, high, offset=1, limit=3,
+                                             newest_first=True)
+    assert [game.game_id for game in newest] == \
+        [game_id for _, game_id in reversed(expected)][1:4]
+    everything = in_memory_repo.released_between()
+    assert len(everything) == sum(1 for game in in_memory_repo.get_games()
+                                  if game.release_date_ordinal > 0)
+    assert in_memory_repo.released_between(high, low) == []
+    assert in_memory_repo.count_released_between(low, high) == len(expected)
+    assert in_memory_repo.count_released_between() == len(everything)
+    assert in_memory_repo.count_released_between(high, low) == 0
+
+
+def test_catalog_summary_follows_catalog_changes(in_memory_repo):
+    # Test aggregates are rebuilt after games change and reviews are added
+    summary = in_memory_repo.get_catalog_summary()
+    assert summary['count'] == in_memory_repo.get_number_of_games()
+    assert summary['max_price'] == max(game.price for game in in_memory_repo.get_games())
+    assert sum(summary['platforms'].values()) > 0
+    game = Game(1, 'Expensive Game')
+    game.price = 999.0
+    in_memory_repo.add_game(game)
+    assert in_memory_repo.get_catalog_summary()['max_price'] == 999.0
+    assert in_memory_repo.get_catalog_summary(min_price=500)['count'] == 1
+    in_memory_repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    in_memory_repo.add_review(in_memory_repo.get_user('kelvin'), game, 5, 'Great game')
+    assert in_memory_repo.filter_game_ids('review_count')[0] == 1
+    assert in_memory_repo.get_catalog_summary(genre='Action', max_price=0)['min_price'] in (None, 0)
+
+
+def test_facet_filters_and_counts_match_a_scan(in_memory_repo):
+    # Test bitmap facet filters and counts agree with a loop over the games
+    from games.adapters.facets import game_facet_values
+    facets = {'genres': ['Action', 'Indie'], 'platforms': ['mac']}
+
+    def matches(game, chosen):
+        values = game_facet_values(game)
+        return all(set(values[dimension]) & set(chosen_values)
+                   for dimension, chosen_values in chosen.items())
+
+    games = in_memory_repo.get_games()
+    expected = [game.game_id for game in games if matches(game, facets)]
+    assert list(in_memory_repo.filter_game_ids('game_id', facets=facets)) == expected
+    counts = in_memory_repo.get_facet_counts(facets=facets)
+    for dimension in ['genres', 'publishers', 'platforms', 'languages', 'categories']:
+        others = {other: values for other, values in facets.items() if other != dimension}
+        expected_counts = {}
+        for game in games:
+            if matches(game, others):
+                for value in game_facet_values(game)[dimension]:
+                    expected_counts[value] = expected_counts.get(value, 0) + 1
+        assert counts[dimension] == expected_counts
+    assert in_memory_repo.get_catalog_summary(facets=facets)['count'] == len(expected)
+    assert len(in_memory_repo.filter_game_ids(facets={'publishers': ['Nobody']})) == 0
+    with pytest.raises(ValueError):
+        in_memory_repo.filter_game_ids(facets={'colour': ['red']})
+
+
+def test_unfiltered_facet_counts_are_cached_until_the_catalog_changes(in_memory_repo):
+    # Test cached counts match fresh counts and catalog writes drop them
+    counts = in_memory_repo.get_facet_counts('Action')
+    assert counts == in_memory_repo.get_facet_counts('Action', min_price=0)
+    counts['genres'].clear()
+    assert in_memory_repo.get_facet_counts('Action') == in_memory_repo.get_facet_counts('Action', min_price=0)
+    game = in_memory_repo.get_games_by_ids(in_memory_repo.filter_game_ids('game_id', genre='Action'))[0]
+    before = in_memory_repo.get_facet_counts('Action')['genres']['Action']
+    in_memory_repo.remove_game(game.game_id)
+    assert in_memory_repo.get_facet_counts('Action')['genres']['Action'] == before - 1
+
+
+def test_facet_index_posting_lists_match_bitmaps(in_memory_repo):
+    # Test values kept as posting lists filter and count like bitmaps
+    from games.adapters.facets import FacetIndex
+    games = in_memory_repo.get_games()
+    bitmaps = FacetIndex(games, sparse_density=0)
+    postings = FacetIndex(games, sparse_density=1)
+    publisher = games[0].publisher.publisher_name
+    for facets in [None, {'genres': ['Action', 'Indie'], 'platforms': ['mac']},
+                   {'publishers': [publisher, 'Nobody']}]:
+        assert postings.select(facets) == bitmaps.select(facets)
+        assert postings.counts(facets) == bitmaps.counts(facets)
+        base = bitmaps.select({'genres': ['Action']})
+        assert postings.counts(facets, base) == bitmaps.counts(facets, base)
@@ -1,6 +1,8 @@
 import pytest
+from datetime import date, datetime
 from flask import Flask
 from flask.testing import FlaskClient
+from werkzeug.datastructures import MultiDict
 
 from games.authentication.services import NameNotUniqueException, UnknownUserException, AuthenticationException
 from games.domainmodel.model import Game, Genre, User, Review
@@ -45,6 +47,58 @@ def test_get_games_by_genre(in_memory_repo):
     assert type(games[4]) == dict
 
 
+def test_get_sorted_games(in_memory_repo):
+    # Tests library service layer returns a page of the catalog sorted by price as dicts
+    games = library_services.get_sorted_games(in_memory_repo, 'price', offset=0, limit=5)
+    prices = [game['price'] for game in library_services.get_games(in_memory_repo)]
+    assert [game['price'] for game in games] == sorted(prices)[:5]
+    assert type(games[0]) == dict
+
+
+def test_get_sorted_games_with_unknown_criteria(in_memory_repo):
+    # Tests unknown sort criteria fall back to sorting by title
+    games = library_services.get_sorted_games(in_memory_repo, 'no_such_criteria', genre='Action', limit=2)
+    assert [game['title'] for game in games] == ['Arcadia', "Bartlow's Dread Machine"]
+
+
+def test_parse_game_filters_ignores_invalid_values():
+    # Tests filters are read from the query string and invalid values are dropped
+    filters = library_services.parse_game_filters(MultiDict({
+        'min_price': '5', 'max_price': 'cheap', 'released_from': '2010-01-31',
+        'released_to': '31/12/2020'}))
+    assert filters == {'min_price': 5.0, 'released_from': date(2010, 1, 31)}
+    assert library_services.parse_game_filters(MultiDict({'min_price': '-1'})) == {}
+
+
+def test_get_filtered_games(in_memory_repo):
+    # Tests a filtered page holds the matching games and counts all matches
+    filters = {'max_price': 10, 'released_from': date(2010, 1, 1)}
+    games, total = library_services.get_filtered_games(
+        in_memory_repo, 'price', filters=filters, offset=0, limit=2)
+    matching = [game for game in library_services.get_games(in_memory_repo)
+                if game['price'] <= 10 and datetime.strptime(
+                    game['release_date'], '%b %d, %Y').date() >= date(2010, 1, 1)]
+    assert total == len(matching) > 2
+    assert [game['price'] for game in games] == sorted(game['price'] for game in matching)[:2]
+    summary = library_services.get_catalog_summary(in_memory_repo, filters=filters)
+    assert summary['count'] == total
+    assert summary['max_price'] == max(game['price'] for game in matching)
+
+
+def test_get_facets_lists_chosen_values(in_memory_repo):
+    # Tests facets are read from the query string and listed with counts
+    filters = library_services.parse_game_filters(MultiDict(
+        [('platforms', 'mac'), ('genres', 'Action'), ('genres', 'No such genre')]))
+    assert filters == {'facets': {'platforms': ['mac'], 'genres': ['Action', 'No such genre']}}
+    facets = library_services.get_facets(in_memory_repo, filters=filters)
+    assert ('No such genre', 0, True) in facets['genres']
+    assert [chosen for _, _, chosen in facets['platforms']].count(True) == 1
+    counts = [count for _, count, _ in facets['genres']]
+    assert counts == sorted(counts, reverse=True)
+    games, total = library_services.get_filtered_games(in_memory_repo, filters=filters)
+    assert total == len(games) == dict((value, count) for value, count, _ in facets['genres'])['Action']
+
+
 def test_get_genres(in_memory_repo):
     result = library_services.get_genres(in_memory_repo)
     assert len(result) == 1
@@ -117,6 +171,33 @@ def test_search_games_by_tags(in_memory_repo):
     assert any(game['title'] == 'Call of Duty® 4: Modern Warfare®' for game in results)
 
 
+def test_search_games_by_tag_query(in_memory_repo):
+    # Tests tag queries combining tags with AND and NOT.
+    results = home_services.search_games_by_criteria('Multiplayer AND Co-op NOT Zombies', 'tags', in_memory_repo)
+    assert [game['game_id'] for game in results] == [410320, 730310]
+
+
+def test_search_games_by_malformed_tag_query(in_memory_repo):
+    # Tests a malformed tag query returns no results instead of failing.
+    results = home_services.search_games_by_criteria('OR Multiplayer', 'tags', in_memory_repo)
+    assert results == []
+
+
+def test_search_games_fuzzy(in_memory_repo):
+    # Tests fuzzy queries find titles and publishers despite typos.
+    results = home_services.search_games_by_criteria('call of duti', 'fuzzy', in_memory_repo)
+    assert results[0]['title'] == 'Call of Duty® 4: Modern Warfare®'
+    assert home_services.search_games_by_criteria('call of duti', 'title', in_memory_repo) == []
+    results = home_services.search_games_by_criteria('Activsion', 'fuzzy', in_memory_repo)
+    assert [game['game_id'] for game in results] == [7940]
+
+
+def test_search_games_full_text(in_memory_repo):
+    # Tests text queries search descriptions as well as titles.
+    results = home_services.search_games_by_criteria('award winning', 'text', in_memory_repo)
+    assert [game['game_id'] for game in results] == [7940]
+
+
 def test_can_add_reviews(in_memory_repo):
     # Tests to see if Review is added
     get_game = game_services.get_game(in_memory_repo, 7940)
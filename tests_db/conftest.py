@@ -29,6 +29,7 @@ def database_engine():
     reader.read_csv_file()
     yield engine
     metadata.drop_all(engine)
+    clear_mappers()
 
 @pytest.fixture
 def session_factory():
@@ -45,6 +46,7 @@ def session_factory():
     reader.read_csv_file()
     yield session_factory
     metadata.drop_all(engine)
+    clear_mappers()
 
 @pytest.fixture
 def empty_session():
@@ -57,4 +59,5 @@ def empty_session():
     session_factory = sessionmaker(bind=engine)
     yield session_factory()
     metadata.drop_all(engine)
+    clear_mappers()
 
@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from games.adapters.database_engine import (create_database_engine,
+                                            sqlite_pragmas)
+
+
+def test_sqlite_pragmas_are_read_from_config():
+    config = {'SQLITE_JOURNAL_MODE': 'wal', 'SQLITE_SYNCHRONOUS': 'Normal', 'SQLITE_CACHE_SIZE': '-2000',
+              'SQLITE_MMAP_SIZE': '', 'SQLITE_TEMP_STORE': None}
+    assert sqlite_pragmas(config) == {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': '-2000'}
+    with pytest.raises(ValueError):
+        sqlite_pragmas({'SQLITE_SYNCHRONOUS': 'NORMAL; DROP TABLE game'})
+    with pytest.raises(ValueError):
+        sqlite_pragmas({'SQLITE_CACHE_SIZE': 'large'})
+
+
+def test_engine_pools_connections_and_sets_pragmas(tmp_path):
+    # Check a file database gets a QueuePool and every connection gets the pragmas
+    pragmas = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'temp_store': 'MEMORY'}
+    engine = create_database_engine(f'sqlite:///{tmp_path / "games.db"}', pool_size=2, pragmas=pragmas)
+    assert isinstance(engine.pool, QueuePool) and engine.pool.size() == 2
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert connection.exec_driver_sql('PRAGMA synchronous').scalar() == 1
+        assert connection.exec_driver_sql('PRAGMA temp_store').scalar() == 2
+    engine.dispose()
+
+
+def test_memory_engine_shares_one_connection():
+    engine = create_database_engine('sqlite://', pool_class='QueuePool')
+    assert isinstance(engine.pool, StaticPool)
+    with engine.connect() as connection:
+        connection.exec_driver_sql('CREATE TABLE shared (id INTEGER)')
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql('SELECT count(*) FROM shared').scalar() == 0
+    with pytest.raises(ValueError):
+        create_database_engine('sqlite://', pool_class='FastPool')
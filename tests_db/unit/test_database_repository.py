@@ -4,7 +4,7 @@ import pytest
 from games.domainmodel.model import Game, User, Genre, Review, Wishlist, Publisher
 from games.adapters.repository import RepositoryException
 from games.adapters import database_repository
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, clear_mappers
 from sqlalchemy.pool import NullPool
 
@@ -29,6 +29,13 @@ def test_can_retrieve_game_by_id(session_factory):
     game = repo.get_games_by_id(1228870)
     assert game == Game(1228870, "Bartlow's Dread Machine")
 
+def test_can_retrieve_games_by_ids(session_factory):
+    # Check batch lookup keeps the order of the ids and skips unknown ids
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    games = repo.get_games_by_ids([1228870, 34242, 7940])
+    assert games == [Game(1228870, "Bartlow's Dread Machine"),
+                     Game(7940, 'Call of Duty® 4: Modern Warfare®')]
+
 def test_get_genres(session_factory):
     repo = database_repository.SqlAlchemyRepository(session_factory)
     genre = repo.get_genres()
@@ -95,6 +102,25 @@ def test_search_games_by_invalid_tags(session_factory):
     games_by_tag = repo.search_games_by_tags('invalid')
     assert len(games_by_tag) == 0
 
+def test_search_games_by_tags_matches_whole_tags(session_factory):
+    # Check tags are matched exactly ignoring case, so Action does not match Action RPG
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    action_rpg = repo.search_games_by_tags('action rpg')
+    assert action_rpg and all('Action RPG' in game.tags for game in action_rpg)
+    action = repo.search_games_by_tags('Action')
+    assert all('Action' in game.tags for game in action)
+    assert len(action) == repo.get_tag_counts()['Action']
+    assert repo.search_games_by_tags('Action NOT Action RPG') == [game for game in action if game not in action_rpg]
+
+def test_tag_counts_and_suggestions(session_factory):
+    # Check tags are listed, counted and suggested from the tag tables
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    counts = repo.get_tag_counts()
+    assert list(counts.items())[:2] == [('Indie', 601), ('Singleplayer', 416)]
+    assert repo.get_tags() == sorted(counts, key=str.casefold)
+    tag = next(suggestion for suggestion in repo.suggest('indi') if suggestion.kind == 'tag')
+    assert (tag.text, tag.popularity) == ('Indie', 601)
+
 def test_get_game_by_invalid_id(session_factory):
     repo = database_repository.SqlAlchemyRepository(session_factory)
     invalid_game = repo.get_games_by_id(4)
@@ -234,4 +260,329 @@ def test_add_multiple_publisher(session_factory):
     publisher_names = ['Hello', 'codemasters', 'ea sports']
     for name in publisher_names:
         repo.add_publisher(Publisher(name))
-    assert Publisher('codemasters') in repo.get_publishers()
\ No newline at end of file
+    assert Publisher('codemasters') in repo.get_publishers()
+def test_search_games_by_category_query(session_factory):
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    single = repo.search_games_by_category('single-PLAYER')
+    single_or_multi = repo.search_games_by_category('Single-player OR Multi-player')
+    single_not_multi = repo.search_games_by_category('Single-player NOT Multi-player')
+    assert len(single) > 0
+    assert all('Single-player' in game.categories for game in single)
+    assert set(single_not_multi) < set(single) < set(single_or_multi)
+    assert all('Multi-player' not in game.categories for game in single_not_multi)
+    assert repo.search_games_by_category('Action') == []
+    assert repo.search_games_by_category('Single') == []
+
+def test_get_sorted_games(session_factory):
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    by_price = repo.get_sorted_games('price', genre='Action', offset=5, limit=10)
+    assert len(by_price) == 10
+    assert [game.price for game in by_price] == sorted(game.price for game in by_price)
+    newest = repo.get_sorted_games('release_date', limit=3, descending=True)
+    assert len(newest) == 3
+    assert repo.get_number_of_genre_games('Education') == 5
+    for sort_criteria in ['title', 'game_id', 'review_count', 'rating']:
+        assert len(repo.get_sorted_games(sort_criteria, genre='Action', limit=4)) == 4
+
+def test_update_and_remove_game_keep_reviews(session_factory):
+    # Check updating or removing a game keeps the reviews pointing at it
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    user = repo.get_user('kelvin')
+    repo.add_review(user, repo.get_games_by_id(7940), 5, 'Great game')
+    new_game = Game(7940, 'Zebra Racing')
+    new_game.price = 0.5
+    new_game.release_date = 'Jan 1, 2024'
+    new_game.image_url = 'https://example.com/zebra.jpg'
+    new_game.publisher = Publisher('Zebra Studios')
+    new_game.add_genre(Genre('Racing'))
+    new_game.add_tag('Zebras')
+    new_game.add_category('Zebra Mode')
+    repo.update_game(new_game)
+    repo.reset_session()
+    game = repo.get_games_by_id(7940)
+    assert game.title == 'Zebra Racing' and game.price == 0.5
+    assert game.publisher == Publisher('Zebra Studios')
+    assert game.genres == [Genre('Racing')]
+    assert game.tags == {'Zebras'}
+    assert game.categories == {'Zebra Mode'}
+    assert repo.search_games_by_category('zebra mode') == [game]
+    assert [suggestion.text for suggestion in repo.suggest('zebra')] == ['Zebra Racing', 'Zebra Studios', 'Zebras']
+    assert len(game.reviews) == 1
+    repo.remove_game(7940)
+    repo.reset_session()
+    assert repo.get_games_by_id(7940) is None
+    assert repo.search_games_by_tags('Zebras') == []
+    assert repo.search_games_by_category('Zebra Mode') == []
+    assert len(repo.get_games()) == 980
+    assert len(repo.get_user_review(repo.get_user('kelvin'))) == 1
+
+def test_filter_game_ids_and_catalog_summary(session_factory):
+    # Check filtered IDs follow the sort orders and the summary counts them
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    for sort_criteria in ['title', 'release_date', 'price', 'rating']:
+        game_ids = repo.filter_game_ids(sort_criteria, genre='Action')
+        games = repo.get_sorted_games(sort_criteria, genre='Action')
+        assert game_ids == [game.game_id for game in games]
+    low, high = datetime.date(2015, 1, 1), datetime.date(2020, 12, 31)
+    game_ids = repo.filter_game_ids('price', min_price=1, max_price=20,
+                                    released_from=low, released_to=high)
+    games = repo.get_games_by_ids(game_ids)
+    assert len(games) > 0
+    assert all(1 <= game.price <= 20 for game in games)
+    assert all(low <= datetime.datetime.strptime(game.release_date, '%b %d, %Y').date() <= high
+               for game in games)
+    summary = repo.get_catalog_summary(min_price=1, max_price=20,
+                                       released_from=low, released_to=high)
+    assert summary['count'] == len(game_ids)
+    assert low <= summary['earliest_release'] <= summary['latest_release'] <= high
+    # Check the aggregates agree with a loop over the games
+    games = repo.get_games_by_ids(repo.filter_game_ids('game_id', genre='Action', max_price=10))
+    prices = [game.price for game in games]
+    dates = [game.release_date_ordinal for game in games if game.release_date_ordinal > 0]
+    summary = repo.get_catalog_summary(genre='Action', max_price=10)
+    assert summary['count'] == len(games)
+    assert summary['min_price'] == min(prices) and summary['max_price'] == max(prices)
+    assert summary['average_price'] == pytest.approx(sum(prices) / len(prices))
+    assert summary['free_games'] == prices.count(0)
+    assert summary['earliest_release'] == datetime.date.fromordinal(min(dates))
+    assert summary['latest_release'] == datetime.date.fromordinal(max(dates))
+    assert summary['platforms'] == {platform: sum(1 for game in games if game.system_dict[platform])
+                                    for platform in ['windows', 'mac', 'linux']}
+    assert repo.get_catalog_summary(min_price=10 ** 6) == {
+        'count': 0, 'min_price': None, 'max_price': None, 'average_price': None, 'free_games': 0,
+        'earliest_release': None, 'latest_release': None,
+        'platforms': {'windows': 0, 'mac': 0, 'linux': 0}}
+
+def test_facet_filters_and_counts(session_factory):
+    # Check facet filters narrow the games and counts leave out their own dimension
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    facets = {'genres': ['Action', 'Indie'], 'platforms': ['mac']}
+    game_ids = repo.filter_game_ids('game_id', facets=facets)
+    games = repo.get_games_by_ids(game_ids)
+    assert len(games) > 0
+    assert all(game.system_dict['mac'] and {'Action', 'Indie'} & {genre.genre_name for genre in game.genres}
+               for game in games)
+    counts = repo.get_facet_counts(facets=facets)
+    assert set(counts) == {'genres', 'publishers', 'platforms', 'categories'}
+    assert counts['platforms']['mac'] == len(game_ids)
+    assert sum(counts['publishers'].values()) == len(game_ids)
+    mac_games = repo.filter_game_ids(facets={'platforms': ['mac']})
+    assert counts['genres']['Action'] == len(repo.filter_game_ids(genre='Action', facets={'platforms': ['mac']}))
+    assert len(mac_games) >= len(game_ids)
+    assert repo.get_catalog_summary(facets=facets)['count'] == len(game_ids)
+    # Check the counts agree with a loop over the games
+    facets = {'genres': ['Action'], 'publishers': [games[0].publisher.publisher_name, 'Nobody'],
+              'platforms': ['mac', 'linux'], 'categories': ['Single-player', 'Steam Cloud']}
+    values = {game.game_id: {'genres': [genre.genre_name for genre in game.genres],
+                             'publishers': [game.publisher.publisher_name] if game.publisher else [],
+                             'platforms': [platform for platform, supported in game.system_dict.items()
+                                           if supported],
+                             'categories': game.categories}
+              for game in repo.get_games() if game.price <= 10}
+    counts = repo.get_facet_counts(max_price=10, facets=facets)
+    for dimension in counts:
+        expected = {}
+        for game_values in values.values():
+            if all(set(game_values[other]) & set(chosen) for other, chosen in facets.items()
+                   if other != dimension):
+                for value in game_values[dimension]:
+                    expected[value] = expected.get(value, 0) + 1
+        assert counts[dimension] == expected
+
+def test_unfiltered_facet_counts_are_cached_until_the_catalog_changes(session_factory):
+    # Check cached counts match fresh counts and catalog writes drop them
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    counts = repo.get_facet_counts('Action')
+    assert counts == repo.get_facet_counts('Action', min_price=0)
+    counts['genres'].clear()
+    assert repo.get_facet_counts('Action') == repo.get_facet_counts('Action', min_price=0)
+    game = repo.get_games_by_ids(repo.filter_game_ids('game_id', genre='Action'))[0]
+    publisher = game.publisher.publisher_name
+    before = repo.get_facet_counts('Action')['publishers'].get(publisher)
+    repo.remove_game(game.game_id)
+    repo.reset_session()
+    assert repo.get_facet_counts('Action')['publishers'].get(publisher, 0) == before - 1
+    assert repo.get_facet_counts('Action') == repo.get_facet_counts('Action', min_price=0)
+
+def test_released_between_uses_release_ordinals(session_factory):
+    # Check date range lookups are chronological and skip undated games
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    low, high = datetime.date(2010, 1, 1), datetime.date(2019, 12, 31)
+    games = repo.released_between(low, high)
+    ordinals = [game.release_date_ordinal for game in games]
+    assert len(games) > 0 and ordinals == sorted(ordinals)
+    assert all(datetime.datetime.strptime(game.release_date, '%b %d, %Y').date().toordinal() == game.release_date_ordinal
+               for game in games)
+    assert low.toordinal() <= ordinals[0] and ordinals[-1] <= high.toordinal()
+    newest = repo.released_between(low, high, offset=1, limit=3, newest_first=True)
+    assert [game.game_id for game in newest] == [game.game_id for game in reversed(games)][1:4]
+    assert repo.filter_game_ids('release_date', released_from=low, released_to=high) \
+        == [game.game_id for game in games]
+    assert repo.count_released_between(low, high) == len(games)
+    assert repo.count_released_between() == len(repo.released_between())
+    assert repo.count_released_between(high, low) == 0
+
+def test_title_and_publisher_searches_match_mid_word_substrings(session_factory):
+    # Check title and publisher searches are substring matches, as in the memory repository
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    games = repo.get_games()
+    for query in ['ion', 'Ubi', 'he ', 'soft', 'war', 'call duty', 'Pokémon', 'é', '']:
+        assert repo.search_games_by_title(query) == \
+            [game for game in games if query.lower() in game.title.lower()]
+        assert repo.search_games_by_publisher(query) == \
+            [game for game in games
+             if query.lower() in (game.publisher.publisher_name if game.publisher else '').lower()]
+    assert len(repo.search_games_by_title('ion')) == 77
+    assert len(repo.search_games_by_publisher('soft')) == 43
+
+def test_suggest_titles_and_publishers(session_factory):
+    # Check suggestions start with the prefix and rank publishers by game count
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    suggestions = repo.suggest('Ca', limit=5)
+    assert 0 < len(suggestions) <= 5
+    assert all(suggestion.text.lower().startswith('ca') for suggestion in suggestions)
+    popularity = [suggestion.popularity for suggestion in suggestions]
+    assert popularity == sorted(popularity, reverse=True)
+    publisher = next(suggestion for suggestion in repo.suggest('big fish', 10) if suggestion.kind == 'publisher')
+    assert publisher.popularity == len(repo.search_games_by_publisher('Big Fish Games'))
+    assert repo.suggest('') == [] and repo.suggest('zzzz') == []
+
+def test_suggest_ignores_case_and_accents(session_factory):
+    # Check prefixes with accents or in another case match as in the memory repository
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    for prefix, text in [('Matú', 'Matúš Kačeriak'), ('matus', 'Matúš Kačeriak'),
+                         ('Campiã', 'Campião Games'), ('TEAM SÄ', 'Team Sämst')]:
+        assert text in [suggestion.text for suggestion in repo.suggest(prefix)]
+
+def test_search_games_fuzzy(session_factory):
+    # Check fuzzy search ranks typo matches and follows game updates
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    games = repo.search_games_fuzzy('call of duti')
+    assert games[0].game_id == 7940
+    assert [game.publisher.publisher_name for game in repo.search_games_fuzzy('big fsh games')][:6] == ['Big Fish Games'] * 6
+    new_game = repo.get_games_by_id(7940)
+    renamed = Game(7940, 'Zebra Racing')
+    renamed.release_date = new_game.release_date
+    renamed.price = new_game.price
+    renamed.image_url = new_game.image_url
+    renamed.publisher = Publisher('Activision')
+    repo.update_game(renamed)
+    repo.reset_session()
+    assert repo.search_games_fuzzy('zebra racng')[0].game_id == 7940
+    assert 7940 not in [game.game_id for game in repo.search_games_fuzzy('call of duti')]
+    repo.remove_game(7940)
+    assert repo.search_games_fuzzy('zebra racng') == []
+
+def test_add_games_bulk_replaces_games_and_keeps_reviews(session_factory):
+    # Check bulk loading adds publishers, genres and trigrams, lets the last game with an ID win and keeps reviews
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    repo.add_review(repo.get_user('kelvin'), repo.get_games_by_id(7940), 5, 'Great game')
+    games = []
+    for game_id, title in ((7940, 'Old Title'), (7940, 'Zebra Racing'), (5, 'Typing Tutor')):
+        game = Game(game_id, title)
+        game.price = 1.5
+        game.release_date = 'Jan 1, 2024'
+        game.image_url = 'https://example.com/game.jpg'
+        game.publisher = Publisher('Zebra Studios')
+        game.add_genre(Genre('Racing'))
+        games.append(game)
+    repo.add_games_bulk(games, batch_size=2)
+    repo.reset_session()
+    assert len(repo.get_games()) == 982
+    game = repo.get_games_by_id(7940)
+    assert game.title == 'Zebra Racing' and game.genres == [Genre('Racing')]
+    assert game.release_date == 'Jan 1, 2024'
+    assert len(game.reviews) == 1
+    assert Publisher('Zebra Studios') in repo.get_publishers()
+    assert Genre('Racing') in repo.get_genres()
+    assert {5, 7940} <= {game.game_id for game in repo.get_genre_of_games('Racing')}
+    assert repo.search_games_fuzzy('zebra racng')[0].game_id == 7940
+
+def test_search_games_full_text(session_factory):
+    # Check full-text search covers descriptions, ranks title matches first and follows game updates
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    assert [game.game_id for game in repo.search_games_full_text('infinity ward')] == [7940]
+    games = repo.search_games_full_text('machine')
+    assert 'machine' in games[0].title.lower()
+    assert len(repo.search_games_full_text('machine', limit=3)) == 3
+    assert repo.search_games_full_text('duty"* (') == repo.search_games_full_text('duty')
+    assert repo.search_games_full_text('') == []
+    assert [game.game_id for game in repo.search_games_by_title('modern warf')] == [7940]
+    renamed = Game(7940, 'Zebra Racing')
+    renamed.release_date = 'Jan 1, 2024'
+    renamed.price = 0.5
+    renamed.image_url = 'https://example.com/zebra.jpg'
+    renamed.publisher = Publisher('Activision')
+    repo.update_game(renamed)
+    repo.reset_session()
+    assert [game.game_id for game in repo.search_games_by_title('zebra')] == [7940]
+    assert repo.search_games_full_text('infinity ward') == []
+    repo.remove_game(7940)
+    assert repo.search_games_by_title('zebra') == []
+
+def test_full_text_search_uses_index(session_factory):
+    session = session_factory()
+    plan = ' '.join(row[-1] for row in session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT rowid FROM search_games WHERE search_games MATCH 'duty'")))
+    assert 'VIRTUAL TABLE INDEX' in plan
+
+def test_repository_queries_use_indexes(session_factory):
+    # Check the query plan of every query made by lookups and searches reads tables through an index
+    repo = database_repository.SqlAlchemyRepository(session_factory)
+    engine = session_factory.kw['bind']
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+
+    repo.add_user(User('Kelvin', 'ABCDEF1234'))
+    event.listen(engine, 'before_cursor_execute', record)
+    user = repo.get_user('KELVIN')
+    game = repo.get_games_by_id(7940)
+    repo.add_review(user, game, 5, 'Great game')
+    repo.get_user_review(repo.get_user('kelvin'))
+    repo.add_wish_game(repo.get_user('kelvin'), repo.get_games_by_id(7940))
+    repo.get_wishlist(repo.get_user('kelvin'))
+    repo.get_genre_of_games('Action')
+    repo.get_number_of_genre_games('Action')
+    repo.get_games_by_ids([7940, 12140])
+    repo.search_games_by_title('call of')
+    repo.search_games_by_publisher('activision')
+    repo.search_games_full_text('infinity ward')
+    repo.search_games_fuzzy('call of duti')
+    repo.suggest('ca')
+    repo.search_games_by_tags('Action RPG OR Shooter')
+    repo.get_tag_counts()
+    repo.get_games_by_id(12140).tags
+    repo.released_between(datetime.date(2020, 1, 1), datetime.date(2021, 1, 1))
+    repo.count_released_between(datetime.date(2020, 1, 1))
+    repo.search_games_by_category('Single-player AND Steam Cloud')
+    # Sorting by review count or rating orders by an aggregate over the
+    # reviews of every game, so those sorts are left out.
+    for sort_criteria in ['title', 'game_id', 'release_date', 'price']:
+        repo.get_sorted_games(sort_criteria, limit=10)
+        repo.get_sorted_games(sort_criteria, genre='Action', limit=10, descending=True)
+    filters = [{'genre': 'Action'}, {'min_price': 5}, {'max_price': 10},
+               {'released_from': datetime.date(2010, 1, 1)}, {'released_to': datetime.date(2015, 1, 1)},
+               {'facets': {'genres': ['Indie']}}, {'facets': {'publishers': ['Activision']}},
+               {'facets': {'platforms': ['mac']}}, {'facets': {'categories': ['Single-player']}},
+               {'genre': 'Action', 'max_price': 10, 'facets': {'platforms': ['mac'], 'genres': ['Indie']}}]
+    for kwargs in [{}] + filters:
+        repo.get_facet_counts(**kwargs)
+        for sort_criteria in ['title', 'game_id', 'release_date', 'price']:
+            repo.filter_game_ids(sort_criteria, **kwargs)
+    event.remove(engine, 'before_cursor_execute', record)
+    assert len(statements) > 100
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+            # Reading the games in game ID order walks the table itself,
+            # which is the index on the ID.
+            in_id_order = 'ORDER BY game.id' in statement and not any('TEMP B-TREE' in step for step in plan)
+            scans = [step for step in plan
+                     if step.startswith('SCAN') and 'INDEX' not in step
+                     and not (step == 'SCAN game' and in_id_order)]
+            assert scans == [], statement
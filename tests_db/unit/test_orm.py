@@ -1,6 +1,10 @@
 import pytest
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.exc import IntegrityError
-from games.domainmodel.model import Game, User, Review, Genre, Wishlist, Publisher
+from sqlalchemy.orm import clear_mappers
+from games.adapters import orm
+from games.adapters.orm import SchemaUpgradeException, map_model_to_tables, metadata, upgrade_schema
+from games.domainmodel.model import Game, User, Review, Genre, Wishlist, Publisher, PLATFORM_FLAGS
 import datetime
 
 
@@ -27,7 +31,7 @@ def insert_users(empty_session, values):
     return keys
 
 def insert_game(empty_session):
-    sql = "INSERT INTO game (id, game_title, price, release_date, description, publisher, image_url, tags) VALUES (:id, :game_title, :price, :release_date, :description, :publisher, :image_url, :tags)"
+    sql = "INSERT INTO game (id, game_title, price, release_date, description, publisher, image_url) VALUES (:id, :game_title, :price, :release_date, :description, :publisher, :image_url)"
     params = {
         'id': 454680,
         'game_title': 'MetaTron',
@@ -35,10 +39,11 @@ def insert_game(empty_session):
         'release_date': 'Dec 19, 2016',
         'description': 'You are TRON!',
         'publisher': 'TubbyKiD UG (haftungsbeschränkt)',
-        'image_url': 'https://cdn.akamai.steamstatic.com/steam/apps/454680/ss_898bf6187d7a60a1cd59b728a9acca41cafeeebb.1920x1080.jpg?t=1545358112',
-        'tags': 'Action'
+        'image_url': 'https://cdn.akamai.steamstatic.com/steam/apps/454680/ss_898bf6187d7a60a1cd59b728a9acca41cafeeebb.1920x1080.jpg?t=1545358112'
     }
     empty_session.execute(sql, params)
+    empty_session.execute("INSERT INTO tag (tag_name, tag_key) VALUES ('Action', 'action')")
+    empty_session.execute("INSERT INTO game_tags (game_id, tag_name) VALUES (454680, 'Action')")
     row = empty_session.execute('SELECT id FROM game WHERE id = 454680').fetchone()
     return row[0]
 
@@ -128,6 +133,7 @@ def test_loading_game(empty_session):
     expected_game = make_game()
     fetched_game = empty_session.query(Game).one()
     assert fetched_game == expected_game
+    assert fetched_game.tags == {'Action'}
 
 def test_review_games(empty_session):
     # This test function inserts a game review into the database and checks if the review is associated with the game.
@@ -287,3 +293,103 @@ def test_user_review_relationship(empty_session):
     get_user_reviews = user1.reviews
     assert len(get_user_reviews) == 1
     assert review1.user == user1
+
+def test_username_key_is_normalized_and_unique(empty_session):
+    insert_user(empty_session, (' Kelvin ', 'Abcdef1234'))
+    assert empty_session.execute('SELECT username_key FROM user').all() == [('kelvin',)]
+    with pytest.raises(IntegrityError):
+        insert_user(empty_session, ('KELVIN', 'Abcdef1234'))
+
+def test_clearing_mappers_restores_slots():
+    # Check the domain classes keep their attributes in slots again once unmapped
+    clear_mappers()
+    map_model_to_tables()
+    clear_mappers()
+    game = Game(1, 'MetaTron')
+    game.publisher = Publisher('Kelvin Developers')
+    game.add_genre(Genre('Adventure'))
+    game.add_tag('Action')
+    for instance in (game, game.publisher, game.genres[0]):
+        assert not vars(instance)
+    assert game.tags == {'Action'}
+
+
+# The schema of the first version of the database.
+BASELINE_SCHEMA = (
+    'CREATE TABLE genre (genre_name VARCHAR(255) NOT NULL, PRIMARY KEY (genre_name))',
+    'CREATE TABLE publisher (publisher_name VARCHAR(255) NOT NULL, PRIMARY KEY (publisher_name))',
+    'CREATE TABLE user (id INTEGER NOT NULL, username VARCHAR(255) NOT NULL, password VARCHAR(255) NOT NULL, '
+    'PRIMARY KEY (id), UNIQUE (username))',
+    'CREATE TABLE game (id INTEGER NOT NULL, game_title VARCHAR(255) NOT NULL, price INTEGER NOT NULL, '
+    'release_date VARCHAR(15) NOT NULL, description VARCHAR(1024), publisher VARCHAR(255), '
+    'image_url VARCHAR(1024) NOT NULL, website_url VARCHAR(1024), video_url VARCHAR(1024), '
+    'tags VARCHAR(1024) NOT NULL, system_dict JSON, PRIMARY KEY (id), '
+    'FOREIGN KEY(publisher) REFERENCES publisher (publisher_name))',
+    'CREATE TABLE wishlist (id INTEGER NOT NULL, user INTEGER, PRIMARY KEY (id), FOREIGN KEY(user) REFERENCES user (id))',
+    'CREATE TABLE game_genres (id INTEGER NOT NULL, game_id INTEGER, genre_name VARCHAR(255), PRIMARY KEY (id), '
+    'FOREIGN KEY(game_id) REFERENCES game (id), FOREIGN KEY(genre_name) REFERENCES genre (genre_name))',
+    'CREATE TABLE review (id INTEGER NOT NULL, user INTEGER, game INTEGER, rating INTEGER NOT NULL, '
+    'comment VARCHAR(1024) NOT NULL, timestamp VARCHAR(30) NOT NULL, PRIMARY KEY (id), '
+    'FOREIGN KEY(user) REFERENCES user (id), FOREIGN KEY(game) REFERENCES game (id))',
+    'CREATE TABLE wishlist_games (id INTEGER NOT NULL, wishlist_id INTEGER, game_id INTEGER, PRIMARY KEY (id), '
+    'FOREIGN KEY(wishlist_id) REFERENCES wishlist (id), FOREIGN KEY(game_id) REFERENCES game (id))',
+    "INSERT INTO user (username, password) VALUES ('Kelvin', 'Abcdef1234')",
+    "INSERT INTO publisher VALUES ('Activision')",
+    "INSERT INTO game (id, game_title, price, release_date, publisher, image_url, tags, system_dict) VALUES "
+    "(7940, 'Call of Duty 4', 9.99, 'Nov 12, 2007', 'Activision', 'https://example.com/cod.jpg', '', "
+    """'{"windows": true, "mac": true, "linux": false}')""",
+    "INSERT INTO review (user, game, rating, comment, timestamp) VALUES (1, 7940, 5, 'Great', '2023-10-01 10:00:00')",
+)
+
+
+def make_baseline_database(path):
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.exec_driver_sql(statement)
+    return engine
+
+
+def test_upgrade_schema_brings_baseline_database_up_to_date(tmp_path):
+    # Check a database of the first version gets every later column, table and index, with their values filled in
+    engine = make_baseline_database(tmp_path / 'games.db')
+    upgrade_schema(engine)
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT id FROM user WHERE username_key = 'kelvin'").all() == [(1,)]
+        plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN SELECT id FROM user WHERE username_key = 'kelvin'").all()
+        assert 'ix_user_username_key' in plan[0][-1]
+        assert connection.exec_driver_sql('SELECT title_key, publisher_key FROM game').one() == ('call of duty 4', 'activision')
+        assert connection.exec_driver_sql('SELECT release_ordinal, platforms FROM game').one() == \
+            (datetime.date(2007, 11, 12).toordinal(), PLATFORM_FLAGS['windows'] | PLATFORM_FLAGS['mac'])
+        assert connection.exec_driver_sql("SELECT rowid FROM search_games WHERE search_games MATCH 'duty'").all() == [(7940,)]
+        assert connection.exec_driver_sql("SELECT count(*) FROM search_trigrams WHERE trigram = 'dut'").scalar() == 1
+        assert connection.exec_driver_sql('SELECT count(*) FROM review').scalar() == 1
+    inspector = inspect(engine)
+    assert {column['name'] for column in inspector.get_columns('game')} == set(metadata.tables['game'].columns.keys())
+    assert set(metadata.tables) <= set(inspector.get_table_names())
+    assert {'ix_review_game', 'ix_review_user_game'} <= {index['name'] for index in inspector.get_indexes('review')}
+    upgrade_schema(engine)
+    engine.dispose()
+
+
+def test_upgrade_schema_changes_nothing_when_it_fails(tmp_path, monkeypatch):
+    # Check an unknown column is refused before any change, and a failed upgrade is rolled back
+    engine = make_baseline_database(tmp_path / 'games.db')
+    with engine.begin() as connection:
+        connection.exec_driver_sql('ALTER TABLE review ADD COLUMN mood VARCHAR(10)')
+    with pytest.raises(SchemaUpgradeException):
+        upgrade_schema(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql('ALTER TABLE review DROP COLUMN mood')
+    tables = inspect(engine).get_table_names()
+
+    def fail(*args):
+        raise RuntimeError('Trigrams failed')
+    monkeypatch.setattr(orm, 'search_trigram_rows', fail)
+    with pytest.raises(RuntimeError):
+        upgrade_schema(engine)
+    inspector = inspect(engine)
+    assert inspector.get_table_names() == tables
+    assert 'tags' in {column['name'] for column in inspector.get_columns('game')}
+    assert 'username_key' not in {column['name'] for column in inspector.get_columns('user')}
+    engine.dispose()
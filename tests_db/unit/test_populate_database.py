@@ -5,7 +5,7 @@ from games.adapters.orm import metadata
 def test_database_populate_inspect_table_names(database_engine):
     # Test to check table information
     inspector = inspect(database_engine)
-    assert inspector.get_table_names() == ['game', 'game_genres', 'genre', 'publisher', 'review', 'user', 'wishlist', 'wishlist_games']
+    assert inspector.get_table_names() == ['game', 'game_categories', 'game_genres', 'game_tags', 'genre', 'publisher', 'review', 'search_games', 'search_games_config', 'search_games_data', 'search_games_docsize', 'search_games_idx', 'search_trigrams', 'tag', 'user', 'wishlist', 'wishlist_games']
 
 def test_database_populate_select_all_games(database_engine):
     # Test to check games
@@ -25,7 +25,7 @@ def test_database_populate_select_all_games(database_engine):
 def test_database_populate_select_all_publishers(database_engine):
     # Test to check publishers
     inspector = inspect(database_engine)
-    name_of_publisher_tables = inspector.get_table_names()[3]
+    name_of_publisher_tables = inspector.get_table_names()[5]
     with database_engine.connect() as connection:
         select_statement = select([metadata.tables[name_of_publisher_tables]])
         result = connection.execute(select_statement)
@@ -37,7 +37,7 @@ def test_database_populate_select_all_publishers(database_engine):
 def test_database_populate_select_all_genres(database_engine):
     # Test to check genres
     inspector = inspect(database_engine)
-    name_of_genre_table = inspector.get_table_names()[2]
+    name_of_genre_table = inspector.get_table_names()[4]
     with database_engine.connect() as connection:
         select_statement = select([metadata.tables[name_of_genre_table]])
         result = connection.execute(select_statement)
@@ -50,7 +50,7 @@ def test_database_populate_select_all_genres(database_engine):
 def test_database_populate_select_all_genres_association(database_engine):
     # Test to check genres association table
     inspector = inspect(database_engine)
-    name_of_genre_table = inspector.get_table_names()[1]
+    name_of_genre_table = inspector.get_table_names()[2]
     with database_engine.connect() as connection:
         select_statement = select([metadata.tables[name_of_genre_table]])
         result = connection.execute(select_statement)
@@ -59,3 +59,11 @@ def test_database_populate_select_all_genres_association(database_engine):
             all_genres.append((row['game_id'], row['genre_name']))
         assert all_genres[0] == (7940, 'Action')
 
+
+def test_database_populate_select_all_tags_association(database_engine):
+    # Test to check tags association table
+    with database_engine.connect() as connection:
+        select_statement = select([metadata.tables['game_tags']]).where(metadata.tables['game_tags'].c.game_id == 7940)
+        tags = {row['tag_name'] for row in connection.execute(select_statement)}
+        assert {'FPS', 'Action', 'Multiplayer'} <= tags
+        assert connection.execute(select([metadata.tables['tag']]).where(metadata.tables['tag'].c.tag_name == 'Action RPG')).first()['tag_key'] == 'action rpg'